@@ -1,15 +1,45 @@
-from fastapi import FastAPI
-from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+import numpy as np
 import pandas as pd
-import joblib
 from pathlib import Path
+import base64
+import json
 import logging
+import math
 import os
+import time
 from urllib.parse import urlparse, quote_plus
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
+from policy.anomaly import ScoredAuditLog
+from policy.artifacts import lookup_table_path
+from policy.authz import PolicyEngine
+from policy.batching import MicroBatcher
+from policy.cache import ProfileCache
+from policy.db import get_engine, read_audit_logs, read_permissions_and_users, window_start
+from policy.executor import ExecutorSaturatedError, ExecutorUnavailableError, InferenceExecutor, StaleStateError
+from policy.ingest import RecentEventBuffer
+from policy.labels import permission_ids
+from policy.lookup import LookupTable
+from policy.metrics import REGISTRY, MetricsMiddleware, count, gauge, render_histogram, span
+from policy.refresh import AuditLogRefresher, CsvAuditTail, DatabaseAuditSource
+from policy.registry import (
+    ModelBundle,
+    ModelFileWatcher,
+    ModelRegistry,
+    ModelValidationError,
+    ReloadInProgressError,
+    load_bundle,
+)
+from policy.rightsizing import FILTER_FIELDS, InMemoryRightsizing, SqlRightsizing, rightsizing_cutoff
+from policy.serialization import FastJSONResponse, dumps
+from policy.snapshot import read_table
+from policy.startup import FAILED, READY, StartupLoader
+
 # =========================
 # LOAD MODEL
 # =========================
@@ -21,8 +51,13 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_PATH = BASE_DIR / "permission_recommender.pkl"
 
-logger.info("Loading model from %s", MODEL_PATH)
-model = joblib.load(MODEL_PATH)
+# Everything below is loaded in the background after the server starts
+# (see STARTUP at the end of this file); endpoints check readiness first.
+models = ModelRegistry()
+permissions = None
+users = None
+audit_logs = None
+user_profiles = None
 
 
 def build_db_url() -> str | None:
@@ -53,38 +88,24 @@ def build_db_url() -> str | None:
     )
 
 
-def load_data_from_db():
-    db_url = build_db_url()
-    if not db_url:
-        return None
+def load_permissions_from_db(db_url: str):
+    logger.info("Loading permissions and users from database")
+    return read_permissions_and_users(get_engine(db_url))
 
-    engine = create_engine(db_url)
-    logger.info("Loading permissions, audit logs, and users from database")
-
-    permissions_query = """
-    SELECT u.user_id, p.id AS permission_id, p.resource_type, p.action, p.scope
-    FROM users u
-    JOIN roles r ON u.role_id = r.id
-    JOIN role_permissions rp ON rp.role_id = r.id
-    JOIN permissions p ON p.id = rp.permission_id
-    UNION ALL
-    SELECT u.user_id, p.id AS permission_id, p.resource_type, p.action, p.scope
-    FROM users u
-    JOIN user_additional_permissions uap ON uap.user_id = u.id
-    JOIN permissions p ON p.id = uap.permission_id
-    """
-    users_query = """
-    SELECT u.user_id, r.name AS role, u.department, u.branch, u.position,
-           u.has_license, u.seniority, u.employment_type
-    FROM users u
-    JOIN roles r ON r.id = u.role_id
-    """
 
-    permissions_df = pd.read_sql(permissions_query, engine).drop_duplicates()
-    audit_logs_df = pd.read_sql("SELECT * FROM audit_logs", engine)
-    users_df = pd.read_sql(users_query, engine)
+# Only events newer than this many days (from midnight) are loaded; 0 loads
+# everything. Rightsizing rejects longer lookbacks.
+AUDIT_LOG_WINDOW_DAYS = int(os.getenv("AUDIT_LOG_WINDOW_DAYS", "0"))
+AUDIT_LOAD_CHUNK_SIZE = int(os.getenv("AUDIT_LOAD_CHUNK_SIZE", "50000"))
+# Follow rows appended after startup (0 turns the background refresh off).
+AUDIT_REFRESH_INTERVAL_SECONDS = float(os.getenv("AUDIT_REFRESH_INTERVAL_SECONDS", "0"))
+AUDIT_REFRESH_MAX_BATCH = int(os.getenv("AUDIT_REFRESH_MAX_BATCH", "10000"))
+
 
-    return permissions_df, audit_logs_df, users_df
+def load_audit_logs_from_db(db_url: str) -> pd.DataFrame:
+    since = window_start(AUDIT_LOG_WINDOW_DAYS)
+    logger.info("Loading audit logs from database%s", f" since {since}" if since is not None else "")
+    return read_audit_logs(get_engine(db_url), since=since, chunk_size=AUDIT_LOAD_CHUNK_SIZE)
 
 
 def normalize_audit_logs(df: pd.DataFrame) -> pd.DataFrame:
@@ -94,38 +115,293 @@ def normalize_audit_logs(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-# Load data (for rightsizing / anomaly)
-db_data = load_data_from_db()
-if db_data is None:
-    logger.info("SPRING_DATASOURCE_URL not set; loading data from CSV files")
-    permissions = pd.read_csv(BASE_DIR / "permissions.csv")
-    audit_logs = pd.read_csv(BASE_DIR / "audit_logs.csv")
-    users = pd.read_csv(BASE_DIR / "users.csv")
-else:
-    permissions, audit_logs, users = db_data
-
-audit_logs = normalize_audit_logs(audit_logs)
-
-# Build permission labels in correct order (must match training)
-permissions["label"] = permissions["resource_type"] + "_" + permissions["action"]
-PERMISSION_LABELS = sorted(permissions["label"].unique())
-PERMISSION_ID_BY_LABEL = {}
-if "permission_id" in permissions.columns:
-    PERMISSION_ID_BY_LABEL = (
-        permissions.dropna(subset=["permission_id"])
-        .drop_duplicates(subset=["label"])
-        .set_index("label")["permission_id"]
-        .to_dict()
+def expand_user_permissions(
+    users: pd.DataFrame,
+    permissions: pd.DataFrame,
+    role_permissions: pd.DataFrame,
+    user_additional_permissions: pd.DataFrame,
+) -> pd.DataFrame:
+    """Per-user assigned permissions from CSV exports (same shape as the DB query)."""
+    catalog = permissions[["id", "resource_type", "action", "scope"]].rename(columns={"id": "permission_id"})
+    role_assigned = users[["user_id", "role_id"]].merge(role_permissions, on="role_id")
+    user_assigned = user_additional_permissions.rename(columns={"user_id": "id"}).merge(
+        users[["id", "user_id"]], on="id"
+    )
+    assigned = pd.concat(
+        [role_assigned[["user_id", "permission_id"]], user_assigned[["user_id", "permission_id"]]],
+        ignore_index=True,
     )
-elif "id" in permissions.columns:
-    PERMISSION_ID_BY_LABEL = (
-        permissions.dropna(subset=["id"])
-        .drop_duplicates(subset=["label"])
-        .set_index("label")["id"]
-        .to_dict()
+    return assigned.merge(catalog, on="permission_id").drop_duplicates()
+
+
+def license_to_binary(value) -> int:
+    return 1 if str(value).strip().lower() in {"true", "1", "yes"} else 0
+
+
+def normalize_users(df: pd.DataFrame, roles: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Derive the role/license profile columns from a raw users export."""
+    if "role" not in df.columns and roles is not None and "role_id" in df.columns:
+        df = df.copy()
+        df["role"] = df["role_id"].map(roles.set_index("id")["name"])
+    if "license" not in df.columns:
+        df = df.copy()
+        if "has_license" in df.columns:
+            df["license"] = df["has_license"].map(lambda v: "Yes" if license_to_binary(v) else "No")
+        else:
+            df["license"] = "No"
+    return df
+
+
+SNAPSHOT_DIR = os.getenv("DATA_SNAPSHOT_DIR", str(BASE_DIR / ".snapshots"))
+
+
+def read_source_csv(name: str, parse_dates=(), categorical: bool = False) -> pd.DataFrame:
+    """Read a CSV export, through its columnar snapshot unless DATA_SNAPSHOT_DIR is empty."""
+    if not SNAPSHOT_DIR:
+        df = pd.read_csv(BASE_DIR / name)
+        for column in parse_dates:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+        return df
+    return read_table(BASE_DIR / name, SNAPSHOT_DIR, parse_dates=parse_dates, categorical=categorical)
+
+
+PROFILE_FIELDS = ["role", "department", "branch", "position", "employment_type", "license", "seniority"]
+
+
+LOOKUP_TABLE_MODE = os.getenv("LOOKUP_TABLE_MODE", "off")
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn")
+MODEL_WATCH_INTERVAL_SECONDS = float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", "0"))
+# Canned profile every model must score before it is activated.
+PROBE_PROFILE = {"role": "Doctor", "department": "Khoa_Noi", "branch": "CN_HN", "license": "Yes", "seniority": "Senior"}
+
+
+# Permission id by label, set by the "permissions" step; empty until it has run.
+permission_catalog: dict = {}
+
+
+def load_permission_catalog() -> dict:
+    """Fallback permission ids for model artifacts that do not carry their own.
+
+    Never reads the database: this is the catalog the "permissions" step
+    loaded once it has run, otherwise permissions.csv (empty without one).
+    """
+    if permission_catalog:
+        return permission_catalog
+    if not (BASE_DIR / "permissions.csv").exists():
+        return {}
+    catalog = read_source_csv("permissions.csv")
+    return permission_ids(catalog, "id" if "id" in catalog.columns else "permission_id")
+
+
+def resolve_permission_ids() -> None:
+    """Fill in ids the loaded models could not resolve, from the catalog just loaded."""
+    changed = False
+    for bundle in (models.current, models.previous):
+        if bundle is not None and any(pid is None for pid in bundle.id_by_label.values()):
+            bundle.id_by_label = {
+                label: permission_catalog.get(label) if pid is None else pid
+                for label, pid in bundle.id_by_label.items()
+            }
+            changed = True
+    if changed:
+        response_cache.clear()
+
+
+def load_model_bundle() -> ModelBundle:
+    logger.info("Loading model from %s", MODEL_PATH)
+    bundle = load_bundle(
+        MODEL_PATH,
+        load_permission_catalog(),
+        normalize_user_profile(pd.DataFrame([PROBE_PROFILE])),
+        lookup_table=lambda bundle: load_lookup_table(bundle, LOOKUP_TABLE_MODE),
+        engine=INFERENCE_ENGINE,
     )
+    logger.info("Loaded model version %s (%s inference)", bundle.version, bundle.engine)
+    return bundle
+
+
+def load_model() -> None:
+    models.reload(load_model_bundle)
+    executor.invalidate()
+
+
+def load_permissions() -> None:
+    """Users and their assigned permissions."""
+    global permissions, users, user_profiles, permission_catalog
+    db_url = build_db_url()
+    if db_url is None:
+        logger.info("SPRING_DATASOURCE_URL not set; loading permissions and users from CSV files")
+        loaded_permissions = read_source_csv("permissions.csv")
+        loaded_users = normalize_users(read_source_csv("users.csv"), read_source_csv("roles.csv"))
+        if "user_id" not in loaded_permissions.columns:
+            loaded_permissions = expand_user_permissions(
+                loaded_users,
+                loaded_permissions,
+                read_source_csv("role_permissions.csv"),
+                read_source_csv("user_additional_permissions.csv"),
+            )
+    else:
+        loaded_permissions, loaded_users = load_permissions_from_db(db_url)
+        loaded_users = normalize_users(loaded_users)
+
+    loaded_permissions["label"] = loaded_permissions["resource_type"] + "_" + loaded_permissions["action"]
+    user_profiles = normalize_user_profile(
+        loaded_users[["user_id"] + [c for c in PROFILE_FIELDS + ["has_license_binary"] if c in loaded_users.columns]]
+    ).drop_duplicates(subset=["user_id"]).set_index("user_id")
+    permissions, users = loaded_permissions, loaded_users
+    if "permission_id" in loaded_permissions.columns:
+        permission_catalog = permission_ids(loaded_permissions, "permission_id")
+        resolve_permission_ids()
+
+
+def load_audit_logs() -> None:
+    global audit_logs
+    db_url = build_db_url()
+    if db_url is None:
+        logger.info("SPRING_DATASOURCE_URL not set; loading audit logs from CSV files")
+        # Taken before reading: rows appended meanwhile are re-read by the
+        # tail and dropped there by id.
+        offset = (BASE_DIR / "audit_logs.csv").stat().st_size
+        loaded = read_source_csv("audit_logs.csv", parse_dates=["timestamp"], categorical=True)
+        last_seen_id = int(loaded["id"].max()) if len(loaded) else 0
+        since = window_start(AUDIT_LOG_WINDOW_DAYS)
+        if since is not None:
+            loaded = loaded[loaded["timestamp"] >= since].reset_index(drop=True)
+        source = CsvAuditTail(BASE_DIR / "audit_logs.csv", offset)
+    else:
+        source = DatabaseAuditSource(get_engine(db_url), chunk_size=AUDIT_LOAD_CHUNK_SIZE)
+        floor = source.last_id()
+        loaded = load_audit_logs_from_db(db_url)
+        last_seen_id = max(floor, int(loaded["id"].max()) if len(loaded) else 0)
+    audit_logs = normalize_audit_logs(loaded)
+    audit_refresher.reset(source, last_seen_id)
+
+
+FEATURE_COLUMNS = [
+    "role",
+    "department",
+    "branch",
+    "position",
+    "employment_type",
+    "license",
+    "has_license_binary",
+    "seniority",
+]
+
+RECOMMEND_BATCH_MAX_SIZE = int(os.getenv("RECOMMEND_BATCH_MAX_SIZE", "1000"))
+REORG_MAX_USERS = int(os.getenv("REORG_MAX_USERS", "50000"))
+
+
+def load_lookup_table(bundle: ModelBundle, mode: str) -> LookupTable | None:
+    """Load (or build, for mode "build") the precompiled profile lookup table."""
+    if mode not in {"load", "build"}:
+        return None
+
+    path = lookup_table_path(MODEL_PATH)
+    if path.exists():
+        table = LookupTable.load(path)
+        if table.version == bundle.version and table.features == FEATURE_COLUMNS:
+            logger.info("Loaded lookup table with %s profiles from %s", len(table), path)
+            return table
+        logger.warning("Lookup table %s does not match model version %s", path, bundle.version)
+
+    if mode != "build":
+        return None
+
+    logger.info("Building lookup table for model version %s", bundle.version)
+    table = LookupTable.build(bundle.model, FEATURE_COLUMNS, version=bundle.version, predict=bundle.predict_scores)
+    table.save(path)
+    logger.info("Saved lookup table with %s profiles to %s", len(table), path)
+    return table
+
+
+recommendation_cache = ProfileCache(
+    maxsize=int(os.getenv("RECOMMEND_CACHE_SIZE", "4096")),
+    ttl_seconds=float(os.getenv("RECOMMEND_CACHE_TTL_SECONDS", "3600")),
+)
+# Encoded response bodies of /recommend/new-user and /recommend/job-transfer,
+# keyed on the endpoint and the normalized profiles.
+response_cache = ProfileCache(maxsize=recommendation_cache.maxsize, ttl_seconds=recommendation_cache.ttl_seconds)
+
+
+# =========================
+# EXECUTION BACKEND
+# =========================
+# inline: model scoring and analytics run on the request thread (unbounded
+# unless EXECUTOR_WORKERS is set); process: in worker processes holding a
+# copy of the loaded state.
+EXECUTOR_BACKEND = os.getenv("EXECUTOR_BACKEND", "inline")
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", str(os.cpu_count() or 1) if EXECUTOR_BACKEND == "process" else "0"))
+EXECUTOR_QUEUE_SIZE = int(os.getenv("EXECUTOR_QUEUE_SIZE", "32"))
+EXECUTOR_TIMEOUT_SECONDS = float(os.getenv("EXECUTOR_TIMEOUT_SECONDS", "0"))
+EXECUTOR_RETRY_AFTER_SECONDS = 1
+
+
+def executor_state() -> dict:
+    """What executor tasks read: the loaded models and the in-memory indexes."""
+    return {
+        "models": (models.current, models.previous),
+        "rightsizing": rightsizing if isinstance(rightsizing, InMemoryRightsizing) else None,
+        "scored_audit_logs": scored_audit_logs,
+    }
+
 
-app = FastAPI(title="AI Permission Recommendation API")
+def init_executor_worker(state: dict) -> None:
+    """Install the server's state, as of when the workers started, in a worker process."""
+    global rightsizing, scored_audit_logs
+    models.current, models.previous = state["models"]
+    rightsizing, scored_audit_logs = state["rightsizing"], state["scored_audit_logs"]
+
+
+executor = InferenceExecutor(
+    EXECUTOR_BACKEND,
+    workers=EXECUTOR_WORKERS,
+    queue_size=EXECUTOR_QUEUE_SIZE,
+    timeout_seconds=EXECUTOR_TIMEOUT_SECONDS or None,
+    initializer=init_executor_worker,
+    snapshot=executor_state,
+    preload=[__name__],
+)
+
+
+# Micro-batching: concurrent uncached recommendation requests wait up to
+# MICRO_BATCH_WAIT_MS and are scored together (off: lowest single-request latency).
+MICRO_BATCH = os.getenv("MICRO_BATCH", "off")
+MICRO_BATCH_WAIT_MS = float(os.getenv("MICRO_BATCH_WAIT_MS", "2"))
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+
+
+def run_task(fn, *args):
+    """Run ``fn(*args)`` on the executor; 429 when its queue is full, 503 when it fails to answer."""
+    try:
+        return executor.run(fn, *args)
+    except ExecutorSaturatedError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(EXECUTOR_RETRY_AFTER_SECONDS)})
+    except ExecutorUnavailableError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(EXECUTOR_RETRY_AFTER_SECONDS)})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.start()
+    watcher = None
+    if MODEL_WATCH_INTERVAL_SECONDS > 0:
+        watcher = ModelFileWatcher(MODEL_PATH, MODEL_WATCH_INTERVAL_SECONDS, load_model)
+        watcher.start()
+    if AUDIT_REFRESH_INTERVAL_SECONDS > 0:
+        audit_refresher.start()
+    yield
+    startup.stop()
+    if watcher is not None:
+        watcher.stop()
+    audit_refresher.stop()
+    if batcher is not None:
+        batcher.stop()
+    executor.shutdown()
+
+
+app = FastAPI(title="AI Permission Recommendation API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 # =========================
 # REQUEST SCHEMAS
@@ -142,19 +418,104 @@ class UserProfile(BaseModel):
     has_license_binary: int | None = None
 
 
+class NewUserBatchRequest(BaseModel):
+    profiles: list[UserProfile]
+
+
 class JobTransferRequest(BaseModel):
     old_profile: UserProfile
     new_profile: UserProfile
 
 
+class ReorganizationRule(BaseModel):
+    match: dict[str, str]
+    changes: dict[str, str]
+
+
+class UserTransfer(BaseModel):
+    user_id: str
+    changes: dict[str, str]
+
+
+class ReorganizationRequest(BaseModel):
+    rules: list[ReorganizationRule] = []
+    transfers: list[UserTransfer] = []
+    include_users: bool = True
+
+
 class RightsizingRequest(BaseModel):
     lookback_days: int = 90
+    limit: int = 20
+    cursor: str | None = None
+    role: str | None = None
+    department: str | None = None
+    branch: str | None = None
+    label: str | None = None
 
 
 class AnomalyRequest(BaseModel):
     risk_threshold: int = 3
 
 
+class AuditEvent(BaseModel):
+    id: int | None = None
+    user_id: str
+    resource_type: str
+    resource_id: str | None = None
+    action: str
+    allowed: bool | None = None
+    success: bool | None = None
+    policy_id: str | None = None
+    deny_reasons: str | None = None
+    risk_score: int | None = None
+    timestamp: str
+    ip_address: str | None = None
+    user_agent: str | None = None
+
+
+# Authorization inputs mirror emr_authz.rego's input document. Fields left
+# out are undefined to the policy, which is not the same as null. Ids may be
+# strings or numbers, and fields the policy does not read are passed through.
+class AuthzSubject(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    user_id: str | int | None = None
+    role: str | None = None
+    branch: str | None = None
+    department: str | None = None
+    assigned_patients: list[str | int] | None = None
+
+
+class AuthzResource(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: str | None = None
+    branch: str | None = None
+    owner_department: str | None = None
+    patient_id: str | int | None = None
+    sensitivity: str | None = None
+    created_by: str | int | None = None
+
+
+class AuthzEnvironment(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    hour: float | None = None
+    emergency_mode: bool | None = None
+    export_approved: bool | None = None
+    is_bulk: bool | None = None
+    approval_ticket_id: str | None = None
+
+
+class AuthzRequest(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    subject: AuthzSubject | None = None
+    resource: AuthzResource | None = None
+    action: str | None = None
+    environment: AuthzEnvironment | None = None
+
+
 # =========================
 # HELPER
 # =========================
@@ -172,31 +533,142 @@ def normalize_user_profile(df: pd.DataFrame) -> pd.DataFrame:
         df["employment_type"] = df["employment_type"].fillna("FullTime")
 
     if "has_license_binary" not in df.columns or df["has_license_binary"].isna().all():
-        df["has_license_binary"] = df["license"].map(
-            lambda v: 1 if str(v).strip().lower() in {"true", "1", "yes"} else 0
-        )
+        df["has_license_binary"] = df["license"].map(license_to_binary)
     else:
-        df["has_license_binary"] = df["has_license_binary"].fillna(
-            df["license"].map(lambda v: 1 if str(v).strip().lower() in {"true", "1", "yes"} else 0)
-        )
+        df["has_license_binary"] = df["has_license_binary"].fillna(df["license"].map(license_to_binary))
 
     return df
 
 
-def recommend_permissions(user_df, threshold=0.6):
-    proba = model.predict_proba(user_df)
-    labels = model.named_steps["classifier"].estimators_
-    columns = model.feature_names_in_
+def profile_key(profile: UserProfile) -> tuple:
+    """Normalized feature tuple of a profile, matching normalize_user_profile."""
+    has_license_binary = profile.has_license_binary
+    if has_license_binary is None:
+        has_license_binary = license_to_binary(profile.license)
+    return (
+        profile.role,
+        profile.department,
+        profile.branch,
+        profile.position if profile.position is not None else profile.role,
+        profile.employment_type if profile.employment_type is not None else "FullTime",
+        profile.license,
+        int(has_license_binary),
+        profile.seniority,
+    )
+
+
+def predict_task(version: str, df: pd.DataFrame) -> np.ndarray:
+    """Scores from the loaded bundle of ``version`` (run on the executor)."""
+    for bundle in (models.current, models.previous):
+        if bundle is not None and bundle.version == version:
+            return bundle.predict_scores(df)
+    raise StaleStateError(f"Model version {version} is not loaded in this worker")
+
+
+def predict_scores(bundle: ModelBundle, df: pd.DataFrame) -> np.ndarray:
+    """Positive-class probability for every (profile row, permission label)."""
+    if batcher is not None:
+        return batcher.predict(bundle, df[FEATURE_COLUMNS])
+    return execute_scores(bundle, df)
+
+
+def execute_scores(bundle: ModelBundle, df: pd.DataFrame) -> np.ndarray:
+    """Scores computed on the execution backend."""
+    try:
+        return run_task(predict_task, bundle.version, df)
+    except StaleStateError:
+        # The workers were forked before this version was loaded.
+        executor.invalidate()
+        return bundle.predict_scores(df)
+
+
+def cached_scores(bundle: ModelBundle, key: tuple) -> np.ndarray | None:
+    if bundle.lookup_table is not None:
+        scores = bundle.lookup_table.lookup(key)
+        if scores is not None:
+            return scores
+    return recommendation_cache.get(key, bundle.version)
 
-    results = []
-    for idx, label in enumerate(model.classes_ if hasattr(model, "classes_") else range(len(proba))):
-        confidence = proba[idx][0][1]
+
+def score_profiles(bundle: ModelBundle, profiles: list[UserProfile]) -> np.ndarray:
+    """Scores for each profile, in order.
+
+    Profiles are answered from the lookup table or the cache where possible;
+    the remaining distinct profiles are normalized and scored in one batch.
+    """
+    scores = np.empty((len(profiles), len(bundle.labels)))
+    pending = {}
+    with span("cache_lookup"):
+        for row, profile in enumerate(profiles):
+            key = profile_key(profile)
+            cached = cached_scores(bundle, key)
+            if cached is not None:
+                scores[row] = cached
+            else:
+                pending.setdefault(key, (profile, []))[1].append(row)
+
+    if pending:
+        with span("normalize"):
+            df = normalize_user_profile(pd.DataFrame([profile.dict() for profile, _ in pending.values()]))
+        count("profiles_scored", len(df))
+        with span("predict"):
+            predicted = predict_scores(bundle, df)
+        for (key, (_, rows)), profile_scores in zip(pending.items(), predicted):
+            scores[rows] = profile_scores
+            recommendation_cache.put(key, bundle.version, profile_scores)
+    return scores
+
+
+def score_frame(bundle: ModelBundle, df: pd.DataFrame) -> np.ndarray:
+    """Scores for each row of an already normalized profile frame."""
+    keys = list(df[FEATURE_COLUMNS].itertuples(index=False, name=None))
+    scores = np.empty((len(keys), len(bundle.labels)))
+    pending = {}
+    with span("cache_lookup"):
+        for row, key in enumerate(keys):
+            cached = cached_scores(bundle, key)
+            if cached is not None:
+                scores[row] = cached
+            else:
+                pending.setdefault(key, []).append(row)
+
+    if pending:
+        count("profiles_scored", len(pending))
+        with span("predict"):
+            predicted = predict_scores(bundle, pd.DataFrame(list(pending), columns=FEATURE_COLUMNS))
+        for (key, rows), profile_scores in zip(pending.items(), predicted):
+            scores[rows] = profile_scores
+            recommendation_cache.put(key, bundle.version, profile_scores)
+    return scores
+
+
+def score_profile(bundle: ModelBundle, profile: UserProfile) -> np.ndarray:
+    return score_profiles(bundle, [profile])[0]
+
+
+def format_recommendations(bundle: ModelBundle, scores: np.ndarray, threshold: float = 0.6) -> list[dict]:
+    recommendations = []
+    for idx, label in enumerate(bundle.labels):
+        confidence = scores[idx]
         if confidence >= threshold:
-            results.append({
-                "permission": model.output_names_[idx] if hasattr(model, "output_names_") else idx,
+            recommendations.append({
+                "permission_id": bundle.id_by_label.get(label),
+                "permission": label,
                 "confidence": round(confidence, 2)
             })
-    return results
+    return recommendations
+
+
+batcher = (
+    MicroBatcher(
+        execute_scores,
+        max_wait_ms=MICRO_BATCH_WAIT_MS,
+        max_batch=MICRO_BATCH_MAX_SIZE,
+        max_in_flight=EXECUTOR_WORKERS if EXECUTOR_BACKEND == "process" else 1,
+    )
+    if MICRO_BATCH == "on"
+    else None
+)
 
 
 # =========================
@@ -204,54 +676,81 @@ def recommend_permissions(user_df, threshold=0.6):
 # =========================
 @app.post("/recommend/new-user")
 def recommend_new_user(profile: UserProfile):
+    require("model")
+    bundle = models.current
     logger.info("Received permission recommendation request for new user")
-    df = normalize_user_profile(pd.DataFrame([profile.dict()]))
-    proba = model.predict_proba(df)
-
-    recommendations = []
-    for idx, label in enumerate(PERMISSION_LABELS):
-        confidence = proba[idx][0][1]
-        if confidence >= 0.6:
-            recommendations.append({
-                "permission_id": PERMISSION_ID_BY_LABEL.get(label),
-                "permission": label,
-                "confidence": round(confidence, 2)
+    key = ("new-user", profile_key(profile))
+    body = response_cache.get(key, bundle.version)
+    if body is None:
+        scores = score_profile(bundle, profile)
+        with span("format"):
+            recommendations = format_recommendations(bundle, scores)
+        with span("encode"):
+            body = dumps({
+                "type": "NEW_USER",
+                "model_version": bundle.version,
+                "recommendations": recommendations
             })
+        response_cache.put(key, bundle.version, body)
+        count("recommendations", len(recommendations))
+    return FastJSONResponse(body)
+
+
+@app.post("/recommend/new-user/batch")
+def recommend_new_user_batch(req: NewUserBatchRequest):
+    require("model")
+    bundle = models.current
+    logger.info("Received batch permission recommendation request for %s new users", len(req.profiles))
+    if len(req.profiles) > RECOMMEND_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(req.profiles)} exceeds the maximum of {RECOMMEND_BATCH_MAX_SIZE}",
+        )
 
-    return {
-        "type": "NEW_USER",
-        "recommendations": recommendations
-    }
+    start = time.perf_counter()
+    scores = score_profiles(bundle, req.profiles)
+    with span("format"):
+        results = [
+            {"index": idx, "recommendations": format_recommendations(bundle, profile_scores)}
+            for idx, profile_scores in enumerate(scores)
+        ]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    count("recommendations", sum(len(result["recommendations"]) for result in results))
+
+    with span("encode"):
+        return FastJSONResponse({
+            "type": "NEW_USER_BATCH",
+            "model_version": bundle.version,
+            "count": len(results),
+            "elapsed_ms": round(elapsed_ms, 2),
+            "results": results
+        })
 
 
 # =========================
 # API 2: JOB TRANSFER
 # =========================
-@app.post("/recommend/job-transfer")
-def recommend_job_transfer(req: JobTransferRequest):
-    logger.info("Received permission recommendation request for job transfer")
-    old_df = normalize_user_profile(pd.DataFrame([req.old_profile.dict()]))
-    new_df = normalize_user_profile(pd.DataFrame([req.new_profile.dict()]))
-
-    old_proba = model.predict_proba(old_df)
-    new_proba = model.predict_proba(new_df)
+def job_transfer_response(bundle: ModelBundle, req: JobTransferRequest) -> dict:
+    old_proba = score_profile(bundle, req.old_profile)
+    new_proba = score_profile(bundle, req.new_profile)
 
     old_scores = {
-        PERMISSION_LABELS[idx]: old_proba[idx][0][1]
-        for idx in range(len(PERMISSION_LABELS))
+        bundle.labels[idx]: old_proba[idx]
+        for idx in range(len(bundle.labels))
     }
     new_scores = {
-        PERMISSION_LABELS[idx]: new_proba[idx][0][1]
-        for idx in range(len(PERMISSION_LABELS))
+        bundle.labels[idx]: new_proba[idx]
+        for idx in range(len(bundle.labels))
     }
 
     old_perms = {label for label, score in old_scores.items() if score >= 0.6}
     new_perms = {label for label, score in new_scores.items() if score >= 0.6}
+    count("recommendations", len(old_perms | new_perms))
 
     def format_permissions(labels, scores):
         items = [
             {
-                "permission_id": PERMISSION_ID_BY_LABEL.get(label),
+                "permission_id": bundle.id_by_label.get(label),
                 "permission": label,
                 "confidence": round(scores[label], 2)
             }
@@ -261,6 +760,7 @@ def recommend_job_transfer(req: JobTransferRequest):
 
     return {
         "type": "JOB_TRANSFER",
+        "model_version": bundle.version,
         "added_permissions": format_permissions(new_perms - old_perms, new_scores),
         "removed_permissions": format_permissions(old_perms - new_perms, old_scores),
         "retained_permissions": format_permissions(old_perms & new_perms, new_scores),
@@ -272,85 +772,602 @@ def recommend_job_transfer(req: JobTransferRequest):
     }
 
 
+@app.post("/recommend/job-transfer")
+def recommend_job_transfer(req: JobTransferRequest):
+    require("model")
+    bundle = models.current
+    logger.info("Received permission recommendation request for job transfer")
+    key = ("job-transfer", profile_key(req.old_profile), profile_key(req.new_profile))
+    body = response_cache.get(key, bundle.version)
+    if body is None:
+        content = job_transfer_response(bundle, req)
+        with span("encode"):
+            body = dumps(content)
+        response_cache.put(key, bundle.version, body)
+    return FastJSONResponse(body)
+
+
+@app.get("/recommend/cache/stats")
+def recommendation_cache_stats():
+    return {**recommendation_cache.stats(), "responses": response_cache.stats()}
+
+
+@app.get("/recommend/batching/stats")
+def micro_batching_stats():
+    """Batch counts and histograms of batch size, scoring latency and queue wait."""
+    return batcher.stats() if batcher is not None else {"enabled": False}
+
+
+# =========================
+# API 2b: REORGANIZATION (BULK JOB TRANSFER)
+# =========================
+def check_profile_fields(fields) -> None:
+    unknown = sorted(set(fields) - set(PROFILE_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown profile fields: {unknown}")
+
+
+def apply_profile_changes(df: pd.DataFrame, mask, changes: dict[str, str]) -> None:
+    for field, value in changes.items():
+        df.loc[mask, field] = value
+    if "license" in changes:
+        df.loc[mask, "has_license_binary"] = license_to_binary(changes["license"])
+
+
+@app.post("/recommend/reorganization")
+def recommend_reorganization(req: ReorganizationRequest):
+    require("model", "permissions")
+    bundle = models.current
+    logger.info(
+        "Received reorganization request with %s rules and %s transfers",
+        len(req.rules), len(req.transfers),
+    )
+    start = time.perf_counter()
+
+    with span("apply_changes"):
+        affected = pd.Series(False, index=user_profiles.index)
+        new_profiles = user_profiles.copy()
+        for rule in req.rules:
+            if not rule.match:
+                raise HTTPException(status_code=422, detail="A rule's match must name at least one profile field")
+            check_profile_fields(rule.match)
+            check_profile_fields(rule.changes)
+            mask = pd.Series(True, index=user_profiles.index)
+            for field, value in rule.match.items():
+                mask &= user_profiles[field] == value
+            apply_profile_changes(new_profiles, mask, rule.changes)
+            affected |= mask
+
+        unknown_user_ids = []
+        for transfer in req.transfers:
+            check_profile_fields(transfer.changes)
+            if transfer.user_id not in user_profiles.index:
+                unknown_user_ids.append(transfer.user_id)
+                continue
+            apply_profile_changes(new_profiles, transfer.user_id, transfer.changes)
+            affected[transfer.user_id] = True
+    count("rows_scanned", len(user_profiles))
+    n_affected = int(affected.sum())
+    if n_affected > REORG_MAX_USERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{n_affected} affected users exceed the maximum of {REORG_MAX_USERS} (REORG_MAX_USERS)",
+        )
+
+    old_df = user_profiles[affected]
+    new_df = new_profiles[affected]
+    scores = score_frame(bundle, pd.concat([old_df, new_df]))
+
+    with span("diff"):
+        old_perms = scores[: len(old_df)] >= 0.6
+        new_perms = scores[len(old_df) :] >= 0.6
+
+        added = new_perms & ~old_perms
+        removed = old_perms & ~new_perms
+        retained = old_perms & new_perms
+
+        labels = np.array(bundle.labels)
+        users_out = []
+        if req.include_users:
+            users_out = [
+                {
+                    "user_id": user_id,
+                    "added_permissions": labels[added[row]].tolist(),
+                    "removed_permissions": labels[removed[row]].tolist(),
+                    "retained_permissions": labels[retained[row]].tolist(),
+                }
+                for row, user_id in enumerate(old_df.index)
+            ]
+
+        summary = [
+            {
+                "permission_id": bundle.id_by_label.get(label),
+                "permission": label,
+                "added": int(n_added),
+                "removed": int(n_removed),
+                "retained": int(n_retained),
+            }
+            for label, n_added, n_removed, n_retained in zip(
+                bundle.labels, added.sum(axis=0), removed.sum(axis=0), retained.sum(axis=0)
+            )
+            if n_added or n_removed or n_retained
+        ]
+    count("recommendations", int((new_perms | old_perms).sum()))
+
+    with span("encode"):
+        return FastJSONResponse({
+            "type": "REORGANIZATION",
+            "model_version": bundle.version,
+            "affected_users": len(old_df),
+            "unknown_user_ids": unknown_user_ids,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "summary": summary,
+            "users": users_out,
+            "strategy": {
+                "added": "secondary assignment with expiry",
+                "retained": "scoped or read-only",
+                "removed": "revoke or downgrade"
+            }
+        })
+
+
 # =========================
 # API 3: RIGHTSIZING
 # =========================
+RIGHTSIZING_MAX_PAGE_SIZE = int(os.getenv("RIGHTSIZING_MAX_PAGE_SIZE", "1000"))
+# auto: push the query down to the database when one is configured;
+# memory: always use the loaded audit logs; sql: require the database.
+RIGHTSIZING_MODE = os.getenv("RIGHTSIZING_MODE", "auto")
+
+rightsizing = None
+
+
+def build_rightsizing() -> None:
+    global rightsizing
+    db_url = build_db_url() if RIGHTSIZING_MODE != "memory" else None
+    if RIGHTSIZING_MODE == "sql" and db_url is None:
+        raise ValueError("RIGHTSIZING_MODE=sql needs SPRING_DATASOURCE_URL")
+    if db_url is not None:
+        rightsizing = SqlRightsizing(get_engine(db_url))
+        logger.info("Rightsizing queries are pushed down to the database")
+        return
+    built = InMemoryRightsizing(permissions, user_profiles, audit_logs)
+    logger.info(
+        "Built usage cube from %s allowed audit events (%s user/label/day cells)",
+        built.cube.events, built.cube.cells,
+    )
+    rightsizing = built
+    executor.invalidate()
+
+
+def encode_cursor(user_id: str, label: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([user_id, label]).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> tuple[str, str] | None:
+    """The (user_id, label) pair a cursor points at."""
+    if not cursor:
+        return None
+    try:
+        user_id, label = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return user_id, label
+
+
+def check_lookback(req: RightsizingRequest) -> None:
+    """Reject lookbacks reaching past the audit-log window that was loaded."""
+    in_memory = isinstance(rightsizing, InMemoryRightsizing)
+    if in_memory and AUDIT_LOG_WINDOW_DAYS and req.lookback_days > AUDIT_LOG_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"lookback_days must be at most {AUDIT_LOG_WINDOW_DAYS} (AUDIT_LOG_WINDOW_DAYS)",
+        )
+
+
+def rightsizing_filters(req: RightsizingRequest) -> dict:
+    return {field: getattr(req, field) for field in FILTER_FIELDS if getattr(req, field) is not None}
+
+
+def rightsizing_page(
+    cutoff: pd.Timestamp, filters: dict, after: tuple[str, str] | None, limit: int
+) -> tuple[list[dict], int]:
+    """Up to ``limit + 1`` unused permissions after ``after``, and the assigned count."""
+    unused = []
+    with span("unused"):
+        for records in rightsizing.iter_unused(cutoff, filters, after, limit=limit + 1):
+            unused.extend(records)
+            if len(unused) > limit:
+                break
+    with span("count"):
+        total_assigned = rightsizing.count(filters)
+    return unused[: limit + 1], total_assigned
+
+
 @app.post("/recommend/rightsizing")
 def recommend_rightsizing(req: RightsizingRequest):
+    require("rightsizing")
     logger.info("Received rightsizing request with lookback_days=%s", req.lookback_days)
-    audit_logs["timestamp"] = pd.to_datetime(audit_logs["timestamp"], errors="coerce")
-    cutoff = pd.Timestamp.now() - pd.Timedelta(days=req.lookback_days)
+    if not 1 <= req.limit <= RIGHTSIZING_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {RIGHTSIZING_MAX_PAGE_SIZE}")
+    check_lookback(req)
+
+    filters = rightsizing_filters(req)
+    args = (rightsizing_cutoff(req.lookback_days), filters, decode_cursor(req.cursor), req.limit)
+    # The SQL path waits on the database, not the CPU, so it stays on the request thread.
+    if isinstance(rightsizing, InMemoryRightsizing):
+        unused, total_assigned = run_task(rightsizing_page, *args)
+    else:
+        unused, total_assigned = rightsizing_page(*args)
 
-    recent = audit_logs[
-        (audit_logs["timestamp"] >= cutoff) &
-        (audit_logs["allowed"] == True)
-    ]
+    next_cursor = None
+    if len(unused) > req.limit:
+        unused = unused[: req.limit]
+        next_cursor = encode_cursor(unused[-1]["user_id"], unused[-1]["label"])
+    count("recommendations", len(unused))
 
-    recent = recent.copy()
-    recent["label"] = recent["resource_type"] + "_" + recent["action"]
+    with span("encode"):
+        return FastJSONResponse({
+            "type": "RIGHTSIZING",
+            "total_assigned": total_assigned,
+            "unused_permissions": unused,
+            "next_cursor": next_cursor
+        })
 
-    usage = (
-        recent.groupby(["user_id", "label"])
-        .size()
-        .reset_index(name="usage_count")
-    )
 
-    assigned = permissions.copy()
-    assigned["label"] = assigned["resource_type"] + "_" + assigned["action"]
+@app.post("/recommend/rightsizing/stream")
+def stream_rightsizing(req: RightsizingRequest):
+    require("rightsizing")
+    logger.info("Received rightsizing stream request with lookback_days=%s", req.lookback_days)
+    check_lookback(req)
+    filters = rightsizing_filters(req)
+    cutoff = rightsizing_cutoff(req.lookback_days)
+    after = decode_cursor(req.cursor)
+    source = rightsizing
 
-    merged = assigned.merge(
-        usage, on=["user_id", "label"], how="left"
-    ).fillna(0)
+    def ndjson():
+        for records in source.iter_unused(cutoff, filters, after):
+            yield b"".join(dumps(record) + b"\n" for record in records)
 
-    unused = merged[merged["usage_count"] == 0]
-
-    return {
-        "type": "RIGHTSIZING",
-        "total_assigned": len(merged),
-        "unused_permissions": unused.head(20).to_dict(orient="records")
-    }
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 # =========================
 # API 4: ANOMALY
 # =========================
+scored_audit_logs = None
+recent_events = None
+
+
+def build_anomaly_detection() -> None:
+    global scored_audit_logs, recent_events
+    scored = ScoredAuditLog(audit_logs, users)
+    logger.info("Scored %s audit events for anomaly detection", len(scored))
+    recent_events = RecentEventBuffer(
+        scored.role_by_user,
+        maxlen=int(os.getenv("AUDIT_BUFFER_SIZE", "50000")),
+        scorer=scored.scorer,
+    )
+    scored_audit_logs = scored
+    executor.invalidate()
+
+
+def anomaly_samples(risk_threshold: int) -> tuple[int, list[dict]]:
+    """Count and up to 20 sample rows of loaded audit events at or above the threshold."""
+    # Missing values stay NaN/NaT here; the JSON encoder writes them as null.
+    with span("samples"):
+        samples = scored_audit_logs.samples(risk_threshold).to_dict(orient="records")
+    with span("count"):
+        detected = scored_audit_logs.count(risk_threshold)
+    count("rows_scanned", len(scored_audit_logs))
+    return detected, samples
+
+
 @app.post("/recommend/anomaly")
 def detect_anomaly(req: AnomalyRequest):
+    require("anomaly")
     logger.info("Received anomaly detection request with risk_threshold=%s", req.risk_threshold)
-    role_allowed = {
-        "Doctor": ["MedicalRecord", "Prescription", "LabResult"],
-        "Nurse": ["VitalSigns", "MedicalRecord"],
-        "Receptionist": ["PatientProfile", "Appointment"],
-        "Cashier": ["BillingRecord", "Invoice"],
-        "HR": ["StaffProfile"]
+    detected, samples = run_task(anomaly_samples, req.risk_threshold)
+    with span("recent_events"):
+        if len(samples) < 20:
+            samples.extend(recent_events.samples(req.risk_threshold, limit=20 - len(samples)))
+        detected += recent_events.count(req.risk_threshold)
+    count("recommendations", len(samples))
+
+    with span("encode"):
+        return FastJSONResponse({
+            "type": "ANOMALY",
+            "detected": detected,
+            "samples": samples
+        })
+
+
+# =========================
+# API 5: AUDIT INGESTION
+# =========================
+@app.post("/audit/ingest")
+def ingest_audit_events(events: AuditEvent | list[AuditEvent], risk_threshold: int = 3):
+    require("anomaly")
+    if isinstance(events, AuditEvent):
+        events = [events]
+    logger.info("Received %s audit events for ingestion", len(events))
+
+    records = []
+    for event in events:
+        record = event.dict()
+        if record["allowed"] is None:
+            record["allowed"] = record["success"]
+        del record["success"]
+        records.append(record)
+    with span("score"):
+        # Events the audit-log source already delivered are counted from there.
+        risk_scores = recent_events.ingest(records, loaded_through=audit_refresher.last_seen_id)
+    count("rows_scanned", len(records))
+
+    return {
+        "type": "AUDIT_INGEST",
+        "ingested": len(records),
+        "anomalies": int((risk_scores >= risk_threshold).sum()),
+        "risk_scores": risk_scores.tolist()
     }
 
-    logs = audit_logs.merge(
-        users[["user_id", "role"]], on="user_id", how="left"
-    )
 
-    logs = logs.copy()
-    logs["hour"] = pd.to_datetime(logs["timestamp"]).dt.hour
-    logs["unexpected_resource"] = logs.apply(
-        lambda row: row["resource_type"] not in role_allowed.get(row["role"], []),
-        axis=1,
-    )
-    logs["risk_score"] = (
-        (logs["unexpected_resource"].astype(int) * 3)
-        + (~logs["hour"].between(8, 18)).astype(int) * 2
-        + (logs["allowed"] == False).astype(int)
+# =========================
+# API 6: AUTHORIZATION DECISIONS
+# =========================
+AUTHZ_POLICY_PATH = Path(os.getenv("AUTHZ_POLICY_PATH", str(BASE_DIR / "emr_authz.rego")))
+AUTHZ_BATCH_MAX_SIZE = int(os.getenv("AUTHZ_BATCH_MAX_SIZE", "10000"))
+authz_engine = None
+authz_requests = TypeAdapter(list[AuthzRequest])
+
+
+def load_authz() -> None:
+    global authz_engine
+    authz_engine = PolicyEngine.from_file(AUTHZ_POLICY_PATH)
+    logger.info("Loaded authorization policy from %s", AUTHZ_POLICY_PATH)
+
+
+@app.post("/authz/decide")
+def authz_decide(body: dict | list = Body(...), explain: bool = False):
+    """The emr.authz decision for one input document (an ``AuthzRequest``), or for a list of them.
+
+    ``explain`` adds the rule values behind each decision (deny reasons are
+    only part of the decision itself when access is allowed). The batch
+    size is checked before the documents are validated.
+    """
+    require("authz")
+    single = isinstance(body, dict)
+    if not single and len(body) > AUTHZ_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(body)} exceeds the maximum of {AUTHZ_BATCH_MAX_SIZE}",
+        )
+    with span("validate"):
+        try:
+            requests = authz_requests.validate_python([body] if single else body)
+        except ValidationError as exc:
+            errors = exc.errors(include_url=False)
+            for error in errors:
+                error["loc"] = ("body",) + (error["loc"][1:] if single else error["loc"])
+            raise RequestValidationError(errors)
+
+    documents = [request.dict(exclude_unset=True) for request in requests]
+    with span("decide"):
+        decisions = authz_engine.decide_batch(documents)
+        explanations = [authz_engine.evaluate(document) for document in documents] if explain else None
+
+    with span("encode"):
+        if single:
+            content = {"decision": decisions[0], "explain": explanations[0]} if explain else decisions[0]
+        else:
+            content = {"type": "AUTHZ_BATCH", "count": len(decisions), "decisions": decisions}
+            if explain:
+                content["explain"] = explanations
+        return FastJSONResponse(content)
+
+
+# =========================
+# AUDIT LOG REFRESH
+# =========================
+def apply_audit_rows(rows: pd.DataFrame) -> None:
+    """Fold audit-log rows added since startup into the usage cube and the anomaly index.
+
+    The executor applies them in its workers too, so they keep up without
+    being restarted. Ingested events among the rows leave the recent-event
+    buffer, so they are counted once.
+    """
+    executor.update(extend_audit_indexes, normalize_audit_logs(rows))
+    if recent_events is not None:
+        recent_events.discard(rows["id"])
+
+
+def extend_audit_indexes(rows: pd.DataFrame) -> None:
+    if isinstance(rightsizing, InMemoryRightsizing):
+        rightsizing.cube.extend(rows)
+    if scored_audit_logs is not None:
+        scored_audit_logs.extend(rows)
+
+
+def audit_indexes_built() -> bool:
+    return startup.status["audit_logs"] == READY and all(
+        startup.status[name] in (READY, FAILED) for name in ("rightsizing", "anomaly")
     )
 
-    anomalies = logs[logs["risk_score"] >= req.risk_threshold]
-    samples = (
-        anomalies.head(20)
-        .replace([float("inf"), float("-inf")], pd.NA)
-        .where(pd.notnull(anomalies.head(20)), None)
-        .to_dict(orient="records")
+
+audit_refresher = AuditLogRefresher(
+    apply_audit_rows,
+    AUDIT_REFRESH_INTERVAL_SECONDS,
+    max_batch=AUDIT_REFRESH_MAX_BATCH,
+    ready=audit_indexes_built,
+)
+
+
+@app.get("/audit/staleness")
+def audit_staleness():
+    """How far the in-memory audit indexes are behind the audit-log source."""
+    require("audit_logs")
+    return audit_refresher.status()
+
+
+# =========================
+# STARTUP & HEALTH
+# =========================
+# The model loads first so recommendation endpoints come up before the
+# (much larger) audit data has been read and indexed.
+# A component that fails to load (say, the database is down at boot) is
+# retried with exponential backoff; STARTUP_MAX_ATTEMPTS (0: no limit) caps
+# the attempts, after which it is failed for good and liveness fails too.
+STARTUP_RETRY_SECONDS = float(os.getenv("STARTUP_RETRY_SECONDS", "5"))
+STARTUP_RETRY_MAX_SECONDS = float(os.getenv("STARTUP_RETRY_MAX_SECONDS", "300"))
+STARTUP_MAX_ATTEMPTS = int(os.getenv("STARTUP_MAX_ATTEMPTS", "0"))
+startup = StartupLoader(
+    [
+        ("model", load_model, ()),
+        ("permissions", load_permissions, ()),
+        ("audit_logs", load_audit_logs, ()),
+        ("rightsizing", build_rightsizing, ("permissions", "audit_logs")),
+        ("anomaly", build_anomaly_detection, ("permissions", "audit_logs")),
+        ("authz", load_authz, ()),
+    ],
+    retry_seconds=STARTUP_RETRY_SECONDS,
+    max_retry_seconds=STARTUP_RETRY_MAX_SECONDS,
+    max_attempts=STARTUP_MAX_ATTEMPTS,
+)
+STARTUP_RETRY_AFTER_SECONDS = 5
+
+
+def require(*components: str) -> None:
+    """Fail fast with 503 while the components an endpoint needs are not loaded.
+
+    ``Retry-After`` is only sent while they may still load: not for a
+    component that has failed for good.
+    """
+    missing = startup.missing(components)
+    if missing:
+        retry_after = startup.retry_after(missing)
+        if retry_after is None:
+            raise HTTPException(status_code=503, detail=f"Required components failed to load: {', '.join(missing)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Required components are not loaded: {', '.join(missing)}",
+            headers={"Retry-After": str(max(STARTUP_RETRY_AFTER_SECONDS, math.ceil(retry_after)))},
+        )
+
+
+@app.get("/health/live")
+def health_live():
+    """Fails once a component has failed for good, so the orchestrator restarts the process."""
+    uptime = round(time.time() - startup.started_at, 1)
+    failed = startup.failed()
+    if failed:
+        return JSONResponse(status_code=503, content={"status": "failed", "uptime_seconds": uptime, "failed": failed})
+    return {"status": "alive", "uptime_seconds": uptime}
+
+
+@app.get("/health/ready")
+def health_ready():
+    components = startup.report()
+    if startup.ready():
+        status = "ready"
+    elif any(component["status"] == FAILED for component in components.values()):
+        status = "failed"
+    else:
+        status = "loading"
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={"status": status, "model_version": models.version, "components": components},
     )
 
-    return jsonable_encoder({
-        "type": "ANOMALY",
-        "detected": len(anomalies),
-        "samples": samples
-    })
+
+# =========================
+# MODEL ADMINISTRATION
+# =========================
+@app.get("/admin/model")
+def model_status():
+    return models.status()
+
+
+@app.post("/admin/model/reload")
+def reload_model():
+    """Load MODEL_PATH, smoke-test it and swap it in; the old model stays loaded for rollback."""
+    require("model")
+    previous_version = models.version
+    try:
+        bundle = models.reload(load_model_bundle)
+    except ReloadInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except ModelValidationError as exc:
+        raise HTTPException(status_code=422, detail=f"Model rejected: {exc}")
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Could not load model: {type(exc).__name__}: {exc}")
+    executor.invalidate()
+
+    return {
+        "type": "MODEL_RELOAD",
+        "model_version": bundle.version,
+        "previous_version": previous_version,
+        "changed": bundle.version != previous_version,
+    }
+
+
+@app.post("/admin/model/rollback")
+def rollback_model():
+    require("model")
+    try:
+        bundle = models.rollback()
+    except LookupError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    executor.invalidate()
+
+    return {
+        "type": "MODEL_ROLLBACK",
+        "model_version": bundle.version,
+        "previous_version": models.previous.version,
+    }
+
+
+@app.get("/admin/executor")
+def executor_status():
+    """Queue depth, rejections, and wait and execution times of the execution backend."""
+    return executor.stats()
+
+
+# =========================
+# METRICS
+# =========================
+def component_metrics() -> list[tuple]:
+    """Gauges read from the executor, caches, audit refresher and micro-batcher at scrape time."""
+    stats = executor.stats()
+    families = [
+        gauge("policy_executor_in_flight", "Tasks admitted to the execution backend.", stats["in_flight"]),
+        gauge("policy_executor_queue_depth", "Admitted tasks waiting for a worker.", stats["queue_depth"]),
+        ("policy_executor_rejected_total", "counter", "Tasks rejected because the queue was full.",
+         [f"policy_executor_rejected_total {stats['rejected']}"]),
+    ]
+    cache_lines = []
+    for cache, name in ((recommendation_cache, "scores"), (response_cache, "responses")):
+        cache_stats = cache.stats()
+        for result in ("hits", "misses"):
+            cache_lines.append(f'policy_cache_requests_total{{cache="{name}",result="{result}"}} {cache_stats[result]}')
+    families.append(("policy_cache_requests_total", "counter", "Cache lookups by cache and result.", cache_lines))
+    status = audit_refresher.status()
+    families.append(gauge("policy_audit_rows_behind", "Audit rows not yet applied to the indexes.", status["rows_behind"]))
+    if status["seconds_behind"] is not None:
+        families.append(gauge(
+            "policy_audit_seconds_behind", "Seconds since the indexes last caught up.", status["seconds_behind"]
+        ))
+    if batcher is not None:
+        families.append(("policy_microbatch_size", "histogram", "Rows per micro-batch.",
+                         render_histogram("policy_microbatch_size", batcher.batch_size)))
+        families.append(("policy_microbatch_queue_wait_ms", "histogram", "Time requests waited for their batch.",
+                         render_histogram("policy_microbatch_queue_wait_ms", batcher.queue_wait_ms)))
+    return families
+
+
+REGISTRY.add_collector(component_metrics)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Request, stage and component metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,109 @@
+"""Authorization decisions per second for policy.authz.PolicyEngine.
+
+Requests are drawn (seeded) from the roles, resource types and actions of
+emr_authz.rego, with branches, departments, patients and hours that allow
+about half of them. "decide" is one request at a time,
+"batch[n]" is decide_batch on n requests, "evaluate" computes every rule
+(the explain output) and "+encode" adds the orjson response body.
+Usage (from the repo root):
+
+    python benchmarks/bench_authz.py --requests 100000 --batch-sizes 1 100 10000
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from policy.authz import PolicyEngine
+from policy.serialization import dumps
+
+ROOT = Path(__file__).resolve().parents[1]
+BRANCHES = ["CN_HN", "CN_HCM"]
+DEPARTMENTS = ["Khoa_Noi", "Khoa_Ngoai", "Khoa_Nhi"]
+PATIENTS = [f"P{i:03d}" for i in range(20)]
+
+
+def make_requests(engine: PolicyEngine, n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    role_perms = engine.tables["role_perms"]
+    roles = sorted(role_perms)
+    resources = sorted({resource for grants in role_perms.values() for resource in grants})
+    actions = sorted({action for grants in role_perms.values() for allowed in grants.values() for action in allowed})
+    requests = []
+    for i in range(n):
+        role = rng.choice(roles)
+        if rng.random() < 0.7:
+            resource_type = rng.choice(sorted(role_perms[role]))
+            action = rng.choice(sorted(role_perms[role][resource_type]))
+        else:
+            resource_type, action = rng.choice(resources), rng.choice(actions)
+        branch, department = rng.choice(BRANCHES), rng.choice(DEPARTMENTS)
+        requests.append({
+            "subject": {
+                "user_id": f"U{i % 500:03d}", "role": role, "branch": branch, "department": department,
+                "assigned_patients": rng.sample(PATIENTS, 3),
+            },
+            "resource": {
+                "type": resource_type,
+                "branch": branch if rng.random() < 0.8 else rng.choice(BRANCHES),
+                "owner_department": department if rng.random() < 0.7 else rng.choice(DEPARTMENTS),
+                "patient_id": rng.choice(PATIENTS),
+                "sensitivity": rng.choice(["Low", "Medium", "High"]),
+                "created_by": f"U{rng.randrange(500):03d}",
+            },
+            "action": action,
+            "environment": {"hour": rng.randrange(24), "is_bulk": rng.random() < 0.1},
+        })
+    return requests
+
+
+def per_second(fn, n: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--policy", type=Path, default=ROOT / "emr_authz.rego")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = PolicyEngine.from_file(args.policy)
+    requests = make_requests(engine, args.requests, args.seed)
+    allowed = sum(engine.decide(request)["allow"] for request in requests)
+    print(f"{args.requests} requests, {allowed / args.requests:.0%} allowed")
+
+    def batches(size: int, encode: bool = False):
+        def run():
+            for start in range(0, len(requests), size):
+                decisions = engine.decide_batch(requests[start:start + size])
+                if encode:
+                    dumps(decisions)
+        return run
+
+    def each(fn):
+        def run():
+            for request in requests:
+                fn(request)
+        return run
+
+    cases = {"decide": each(engine.decide), "evaluate": each(engine.evaluate)}
+    for size in args.batch_sizes:
+        cases[f"batch[{size}]"] = batches(size)
+        cases[f"batch[{size}]+encode"] = batches(size, encode=True)
+
+    print(f"{'case':<24}{'decisions/s':>14}{'us/decision':>14}")
+    for name, fn in cases.items():
+        rate = per_second(fn, len(requests), args.repeat)
+        print(f"{name:<24}{rate:>14,.0f}{1e6 / rate:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Single-profile scoring under concurrency: one call per request vs. micro-batching.
+
+Closed-loop client threads each score one random profile at a time, the
+way concurrent uncached /recommend/new-user requests do, either calling the
+model directly or through policy.batching.MicroBatcher. Reports profiles
+scored per second, per-request latency percentiles and the mean batch size,
+for the sklearn and the compiled engine.
+Usage (from the repo root):
+
+    python benchmarks/bench_batching.py --clients 1 8 32 --wait-ms 2
+"""
+import argparse
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from policy.batching import MicroBatcher
+from policy.forest import CompiledForest, positive_scores
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def random_profiles(model, n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, transformer, features in model.named_steps["preprocess"].transformers_:
+        if name == "cat":
+            for feature, categories in zip(features, transformer.categories_):
+                columns[feature] = rng.choice(categories, n)
+    columns["has_license_binary"] = rng.integers(0, 2, n)
+    return pd.DataFrame(columns)
+
+
+def run(score, profiles: pd.DataFrame, clients: int, duration: float) -> tuple[float, float, float]:
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset: int) -> None:
+        row = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            score(profiles.iloc[[row % len(profiles)]])
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            row += clients
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    return len(latencies) / elapsed, p50, p99
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, default=ROOT / "permission_recommender.pkl")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    profiles = random_profiles(model, 4096)
+    engines = {
+        "sklearn": lambda df: positive_scores(model, df),
+        "compiled": CompiledForest.from_pipeline(model).predict_scores,
+    }
+
+    print(f"{'engine':<10}{'clients':>8}{'mode':>9}{'profiles/s':>12}{'p50':>10}{'p99':>10}{'batch':>7}")
+    for engine, predict in engines.items():
+        for clients in args.clients:
+            batcher = MicroBatcher(lambda _, df: predict(df), max_wait_ms=args.wait_ms, max_batch=args.max_batch)
+            for mode, score in (("direct", predict), ("batched", lambda df: batcher.predict(None, df))):
+                rate, p50, p99 = run(score, profiles, clients, args.duration)
+                batch = f"{batcher.requests / batcher.batches:.1f}" if mode == "batched" and batcher.batches else ""
+                print(f"{engine:<10}{clients:>8}{mode:>9}{rate:>12.1f}{p50:>8.1f}ms{p99:>8.1f}ms{batch:>7}")
+            batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
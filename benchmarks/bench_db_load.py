@@ -0,0 +1,77 @@
+"""Audit-log loading from a database: SELECT * vs. chunked, projected reads.
+
+Builds a SQLite database by repeating audit_logs.csv with timestamps spread
+over a year, then loads it with the old full `pd.read_sql("SELECT *")`
+and with policy.db.read_audit_logs, with and without a time window.
+Reports load time, peak traced memory and the size of the result.
+Usage (from the repo root):
+
+    python benchmarks/bench_db_load.py --rows 1000000 --window-days 90
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from policy.db import read_audit_logs, window_start
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def build_database(path: Path, rows: int, seed: int = 0):
+    engine = create_engine(f"sqlite:///{path}")
+    source = pd.read_csv(ROOT / "audit_logs.csv")
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp.now().normalize()
+    for start in range(0, rows, 100_000):
+        n = min(100_000, rows - start)
+        chunk = source.iloc[rng.integers(0, len(source), n)].reset_index(drop=True)
+        chunk["id"] = np.arange(start + 1, start + n + 1)
+        chunk["timestamp"] = now - pd.to_timedelta(rng.integers(0, 365 * 86400, n), unit="s")
+        chunk.to_sql("audit_logs", engine, index=False, if_exists="append")
+    return engine
+
+
+def measure(load) -> tuple[float, float, pd.DataFrame]:
+    """Load time untraced (tracemalloc slows row-by-row fetching), then peak memory."""
+    start = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - start
+    del df
+    tracemalloc.start()
+    df = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--window-days", type=int, default=90)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_database(Path(tmp) / "audit.db", args.rows)
+        since = window_start(args.window_days)
+        runs = [
+            ("SELECT *", lambda: pd.read_sql("SELECT * FROM audit_logs", engine)),
+            ("chunked", lambda: read_audit_logs(engine, chunk_size=args.chunk_size)),
+            (f"chunked {args.window_days}d", lambda: read_audit_logs(engine, since=since, chunk_size=args.chunk_size)),
+        ]
+        print(f"{'loader':<16}{'rows':>10}{'columns':>9}{'time':>9}{'peak mem':>11}{'result':>10}")
+        for name, load in runs:
+            elapsed, peak_mb, df = measure(load)
+            size_mb = df.memory_usage(deep=True).sum() / 1e6
+            print(f"{name:<16}{len(df):>10}{len(df.columns):>9}{elapsed:>8.1f}s{peak_mb:>9.0f}MB{size_mb:>8.0f}MB")
+            del df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Throughput and latency vs. concurrency for each execution backend.
+
+Starts the API once per backend (`inline` is the behaviour without a pool:
+handlers score on Starlette's threadpool), then runs closed-loop clients at
+each concurrency level for a fixed time. Clients alternate uncached
+new-user recommendations (distinct profiles, cache off) with anomaly
+queries. A client turned away with 429 waits for Retry-After before its
+next request. Reports completed requests per second, latency percentiles
+of answered requests, and how many were turned away.
+Usage (from the repo root):
+
+    python benchmarks/bench_executor.py --concurrency 1 4 16 64 --duration 20
+"""
+import argparse
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+RETRY_AFTER_SECONDS = 1.0
+PROFILES = [
+    {"role": role, "department": department, "branch": branch, "license": license, "seniority": seniority}
+    for role, department, branch, license, seniority in itertools.product(
+        ["Doctor", "Nurse", "Cashier", "Pharmacist"],
+        ["Khoa_Noi", "Khoa_Ngoai", "Khoa_Duoc"],
+        ["CN_HN", "CN_HCM"],
+        ["Yes", "No"],
+        ["Junior", "Senior"],
+    )
+]
+
+
+def request(port: int, path: str, body: dict | None = None) -> int:
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}", data=data, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return 0
+
+
+def load(port: int, concurrency: int, duration: float) -> dict:
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset: int) -> None:
+        for i in itertools.count(offset):
+            if time.perf_counter() >= deadline:
+                return
+            start = time.perf_counter()
+            if i % 2:
+                status = request(port, "/recommend/anomaly", {"risk_threshold": i % 7})
+            else:
+                status = request(port, "/recommend/new-user", PROFILES[i % len(PROFILES)])
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses.append(status)
+                if status == 200:
+                    latencies.append(elapsed)
+            if status == 429:
+                time.sleep(RETRY_AFTER_SECONDS)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n * 7919,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99]) if latencies else (float("nan"),) * 2
+    return {
+        "ok_per_s": statuses.count(200) / elapsed,
+        "p50_ms": p50,
+        "p99_ms": p99,
+        "rejected": statuses.count(429),
+        "errors": sum(1 for s in statuses if s not in (200, 429)),
+    }
+
+
+def run_backend(backend: str, workers: int, queue_size: int, port: int, concurrency: list[int], duration: float):
+    env = dict(
+        os.environ,
+        SPRING_DATASOURCE_URL="",
+        RECOMMEND_CACHE_SIZE="0",
+        EXECUTOR_BACKEND=backend,
+        EXECUTOR_WORKERS=str(workers if backend == "process" else 0),
+        EXECUTOR_QUEUE_SIZE=str(queue_size),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        start = time.perf_counter()
+        while request(port, "/health/ready") != 200:
+            if time.perf_counter() - start > 600:
+                raise RuntimeError(f"API with the {backend} backend did not become ready")
+            time.sleep(0.5)
+        load(port, 2, 2.0)
+        for level in concurrency:
+            yield level, load(port, level, duration)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--backends", nargs="+", default=["inline", "process"], choices=["inline", "process"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size")
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{'backend':<9}{'clients':>8}{'ok/s':>8}{'p50':>10}{'p99':>10}{'429s':>7}{'errors':>8}")
+    for backend in args.backends:
+        for level, r in run_backend(backend, args.workers, args.queue_size, args.port, args.concurrency, args.duration):
+            print(
+                f"{backend:<9}{level:>8}{r['ok_per_s']:>8.1f}{r['p50_ms']:>8.0f}ms{r['p99_ms']:>8.0f}ms"
+                f"{r['rejected']:>7}{r['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Inference latency: sklearn predict_proba vs. the compiled forest engine.
+
+Profiles are drawn at random from the categories the model was trained on,
+so batches are mostly distinct profiles. Usage (from the repo root):
+
+    python benchmarks/bench_inference.py --batch-sizes 1 64 4096
+"""
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from policy.forest import CompiledForest, positive_scores
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def random_profiles(model, n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, transformer, features in model.named_steps["preprocess"].transformers_:
+        if name == "cat":
+            for feature, categories in zip(features, transformer.categories_):
+                columns[feature] = rng.choice(categories, n)
+    columns["has_license_binary"] = rng.integers(0, 2, n)
+    return pd.DataFrame(columns)
+
+
+def p50_ms(fn, df: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, default=ROOT / "permission_recommender.pkl")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 4096])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    start = time.perf_counter()
+    compiled = CompiledForest.from_pipeline(model)
+    print(
+        f"compiled {compiled.n_trees} trees in {(time.perf_counter() - start) * 1000:.0f} ms "
+        f"({compiled.nbytes / 1e6:.1f} MB of tables, {compiled.words} x {compiled.dtype} per tree)"
+    )
+
+    print(f"{'batch':>6}{'sklearn p50':>14}{'compiled p50':>14}{'speedup':>9}{'max |diff|':>12}")
+    for batch in args.batch_sizes:
+        df = random_profiles(model, batch)
+        diff = np.abs(compiled.predict_scores(df) - positive_scores(model, df)).max()
+        sklearn_ms = p50_ms(lambda d: positive_scores(model, d), df, args.repeat)
+        compiled_ms = p50_ms(compiled.predict_scores, df, args.repeat)
+        print(
+            f"{batch:>6}{sklearn_ms:>12.1f}ms{compiled_ms:>12.2f}ms"
+            f"{sklearn_ms / compiled_ms:>8.0f}x{diff:>12.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Audit events ingested per second: RecentEventBuffer.ingest and POST /audit/ingest.
+
+Synthetic events (seeded) in the audit_logs column schema are sent in
+batches. "buffer" scores and buffers them in-process with
+policy.ingest.RecentEventBuffer; "http" starts the API with uvicorn (CSV
+mode) and posts each batch to /audit/ingest, so it adds request parsing,
+validation and the response body.
+Usage (from the repo root):
+
+    python benchmarks/bench_ingest.py --events 200000 --batch-sizes 100 20000
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from policy.anomaly import ROLE_ALLOWED_RESOURCES
+from policy.ingest import RecentEventBuffer
+
+ROOT = Path(__file__).resolve().parents[1]
+RESOURCES = sorted({resource for resources in ROLE_ALLOWED_RESOURCES.values() for resource in resources})
+
+
+def make_events(n: int, user_ids: list[str], seed: int) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2026-01-01T00:00:00", "s")
+    timestamps = (start + rng.integers(0, 30 * 86400, n).astype("timedelta64[s]")).astype(str)
+    users = rng.choice(user_ids, n)
+    resources = rng.choice(RESOURCES, n)
+    allowed = rng.random(n) < 0.85
+    return [
+        {
+            "user_id": str(user), "resource_type": str(resource), "action": "read",
+            "allowed": bool(ok), "timestamp": str(timestamp).replace("T", " "),
+        }
+        for user, resource, ok, timestamp in zip(users, resources, allowed, timestamps)
+    ]
+
+
+def post(port: int, path: str, body=None) -> int:
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}", data=data, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=300) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return 0
+
+
+def bench_buffer(events: list[dict], role_by_user: pd.Series, size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        buffer = RecentEventBuffer(role_by_user)
+        batches = [[dict(event) for event in events[i:i + size]] for i in range(0, len(events), size)]
+        start = time.perf_counter()
+        for batch in batches:
+            buffer.ingest(batch)
+        best = min(best, time.perf_counter() - start)
+    return len(events) / best
+
+
+def bench_http(events: list[dict], sizes: list[int], port: int, repeat: int) -> dict[int, float]:
+    env = dict(os.environ, SPRING_DATASOURCE_URL="")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port)], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        deadline = time.perf_counter() + 600
+        while post(port, "/health/ready") != 200:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("The API did not become ready")
+            time.sleep(0.5)
+        rates = {}
+        for size in sizes:
+            batches = [events[i:i + size] for i in range(0, len(events), size)]
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for batch in batches:
+                    if post(port, "/audit/ingest", batch) != 200:
+                        raise RuntimeError("POST /audit/ingest failed")
+                best = min(best, time.perf_counter() - start)
+            rates[size] = len(events) / best
+        return rates
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 20_000])
+    parser.add_argument("--cases", nargs="+", default=["buffer", "http"], choices=["buffer", "http"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    users = pd.read_csv(ROOT / "users.csv", usecols=["user_id", "role_id"])
+    roles = pd.read_csv(ROOT / "roles.csv", usecols=["id", "name"]).set_index("id")["name"]
+    role_by_user = users.set_index("user_id")["role_id"].map(roles)
+    events = make_events(args.events, users["user_id"].tolist(), args.seed)
+
+    rates = {}
+    if "buffer" in args.cases:
+        for size in args.batch_sizes:
+            rates[f"buffer[{size}]"] = bench_buffer(events, role_by_user, size, args.repeat)
+    if "http" in args.cases:
+        for size, rate in bench_http(events, args.batch_sizes, args.port, args.repeat).items():
+            rates[f"http[{size}]"] = rate
+
+    print(f"{'case':<16}{'events/s':>12}{'us/event':>12}")
+    for name, rate in rates.items():
+        print(f"{name:<16}{rate:>12,.0f}{1e6 / rate:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Label-matrix construction: dense pivot_table + merge vs. sparse CSR.
+
+Generates synthetic users and permission assignments (scoped permissions
+give thousands of labels), then times building the user x label target and
+splitting it into train/test, and reports peak traced memory. The dense
+path is skipped when its matrix alone would exceed --dense-limit-gb.
+Usage (from the repo root):
+
+    python benchmarks/bench_labels.py --users 10000 100000 1000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from policy.labels import label_matrix
+
+
+def synthetic(n_users: int, n_labels: int, per_user: int, seed: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    user_ids = pd.Series([f"U{i:07d}" for i in range(n_users)])
+    users = pd.DataFrame({
+        "user_id": user_ids,
+        "role": rng.choice(["Doctor", "Nurse", "Cashier", "HR"], n_users),
+    })
+    # Users of the same role share most permissions, like role-based grants.
+    n_assignments = n_users * per_user
+    owners = np.repeat(np.arange(n_users), per_user)
+    labels = (rng.zipf(1.3, n_assignments) + owners % 4 * 97) % n_labels
+    permissions = pd.DataFrame({
+        "user_id": user_ids.to_numpy()[owners],
+        "label": pd.Series([f"Resource{i // 4}_{['read', 'create', 'update', 'approve'][i % 4]}" for i in range(n_labels)])
+        .to_numpy()[labels],
+    })
+    return users, permissions
+
+
+def dense(users: pd.DataFrame, permissions: pd.DataFrame):
+    label_df = (
+        permissions.assign(value=1)
+        .pivot_table(index="user_id", columns="label", values="value", fill_value=0)
+        .reset_index()
+    )
+    data = users.merge(label_df, on="user_id", how="left")
+    data.fillna(0, inplace=True)
+    return data[[c for c in label_df.columns if c != "user_id"]]
+
+
+def sparse(users: pd.DataFrame, permissions: pd.DataFrame):
+    return label_matrix(users["user_id"], permissions)[0]
+
+
+def measure(build, users: pd.DataFrame, permissions: pd.DataFrame) -> tuple[float, float, object]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    Y = build(users, permissions)
+    train_test_split(users, Y, test_size=0.2, random_state=42)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, Y
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--labels", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=25, help="assignments per user (before duplicates)")
+    parser.add_argument("--dense-limit-gb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'users':>9}{'labels':>8}{'nnz':>11}{'method':>8}{'build+split':>13}{'peak mem':>11}")
+    for n_users in args.users:
+        users, permissions = synthetic(n_users, args.labels, args.per_user)
+        for method, build in (("dense", dense), ("sparse", sparse)):
+            if method == "dense" and n_users * args.labels * 8 > args.dense_limit_gb * 1e9:
+                print(f"{n_users:>9}{args.labels:>8}{'':>11}{method:>8}{'skipped':>13}{'':>11}")
+                continue
+            elapsed, peak_mb, Y = measure(build, users, permissions)
+            nnz = Y.nnz if method == "sparse" else ""
+            print(f"{n_users:>9}{Y.shape[1]:>8}{nnz:>11}{method:>8}{elapsed:>12.2f}s{peak_mb:>9.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Response serialization per endpoint: FastAPI's default path vs. orjson.
+
+"before" is what the endpoints did: the anomaly endpoint's NaN scrubbing
+and to_dict, then `jsonable_encoder` and Starlette's `json.dumps` (which
+FastAPI runs on every returned dict). "after" is policy.serialization.dumps
+on the raw records. "cached" is returning body bytes kept in the response
+cache. Payloads are built from the trained model and the CSV exports.
+Usage (from the repo root):
+
+    python benchmarks/bench_serialization.py --repeat 200
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from policy.anomaly import ScoredAuditLog
+from policy.forest import positive_scores
+from policy.serialization import dumps
+
+ROOT = Path(__file__).resolve().parents[1]
+PROFILE = {
+    "role": "Doctor", "department": "Khoa_Noi", "branch": "CN_HN", "position": "Doctor",
+    "employment_type": "FullTime", "license": "Yes", "has_license_binary": 1, "seniority": "Senior",
+}
+
+
+def starlette_render(content) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def recommendations(labels: list[str], scores: np.ndarray) -> list[dict]:
+    return [
+        {"permission_id": idx + 1, "permission": label, "confidence": round(score, 2)}
+        for idx, (label, score) in enumerate(zip(labels, scores))
+        if score >= 0.6
+    ]
+
+
+def payloads(model) -> dict:
+    labels = list(getattr(model, "permission_labels_", range(len(model[-1].estimators_))))
+    labels = [str(label) for label in labels]
+    profiles = pd.DataFrame([dict(PROFILE, role=role) for role in ["Doctor", "Nurse", "Cashier", "HR"]] * 250)
+    scores = positive_scores(model, profiles)
+    new_user = {"type": "NEW_USER", "model_version": "v", "recommendations": recommendations(labels, scores[0])}
+    batch = {
+        "type": "NEW_USER_BATCH", "model_version": "v", "count": len(scores), "elapsed_ms": 1.0,
+        "results": [{"index": i, "recommendations": recommendations(labels, row)} for i, row in enumerate(scores)],
+    }
+    job_transfer = {
+        "type": "JOB_TRANSFER", "model_version": "v",
+        "added_permissions": recommendations(labels, scores[1]),
+        "removed_permissions": recommendations(labels, scores[0]),
+        "retained_permissions": recommendations(labels, np.minimum(scores[0], scores[1])),
+    }
+    return {"new-user": new_user, "new-user/batch (1000)": batch, "job-transfer": job_transfer}
+
+
+def timed_us(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, default=ROOT / "permission_recommender.pkl")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = {}
+    for name, payload in payloads(joblib.load(args.model)).items():
+        body = dumps(payload)
+        assert json.loads(body) == json.loads(starlette_render(payload))
+        cases[name] = (lambda p=payload: starlette_render(p), lambda p=payload: dumps(p), lambda b=body: b)
+
+    logs = pd.read_csv(ROOT / "audit_logs.csv", parse_dates=["timestamp"])
+    scored = ScoredAuditLog(logs, pd.read_csv(ROOT / "users.csv").merge(
+        pd.read_csv(ROOT / "roles.csv").rename(columns={"id": "role_id", "name": "role"}), on="role_id", how="left"
+    ))
+
+    def anomaly_before(threshold: int) -> bytes:
+        samples = scored.samples(threshold)
+        records = (
+            samples.replace([float("inf"), float("-inf")], pd.NA)
+            .astype(object)
+            .where(pd.notnull(samples), None)
+            .to_dict(orient="records")
+        )
+        return starlette_render(jsonable_encoder({"type": "ANOMALY", "detected": scored.count(threshold), "samples": records}))
+
+    def anomaly_after(threshold: int) -> bytes:
+        records = scored.samples(threshold).to_dict(orient="records")
+        return dumps({"type": "ANOMALY", "detected": scored.count(threshold), "samples": records})
+
+    assert json.loads(anomaly_before(3)) == json.loads(anomaly_after(3))
+    cases["anomaly"] = (lambda: anomaly_before(3), lambda: anomaly_after(3), None)
+
+    print(f"{'endpoint':<24}{'bytes':>9}{'before':>11}{'after':>11}{'speedup':>9}{'cached':>10}")
+    for name, (before, after, cached) in cases.items():
+        before_us, after_us = timed_us(before, args.repeat), timed_us(after, args.repeat)
+        cached_col = f"{timed_us(cached, args.repeat):>8.1f}us" if cached else f"{'':>10}"
+        print(
+            f"{name:<24}{len(after()):>9}{before_us:>9.0f}us{after_us:>9.0f}us"
+            f"{before_us / after_us:>8.1f}x{cached_col}"
+        )
+
+
+if __name__ == "__main__":
+    main()
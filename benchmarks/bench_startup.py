@@ -0,0 +1,66 @@
+"""Audit-log load time: CSV parsing vs. the columnar snapshot.
+
+Compares audit_logs.csv (v1), audit_logs_v2.csv and a 10x copy of v2.
+Usage (from the repo root):
+
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from policy.snapshot import read_table
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def csv_load(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    return df
+
+
+def timed(fn, *args, repeat: int = 3, **kwargs) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="copies of v2 in the synthetic dataset")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        scaled = tmp / f"audit_logs_x{args.scale}.csv"
+        v2 = pd.read_csv(ROOT / "audit_logs_v2.csv")
+        big = pd.concat([v2] * args.scale, ignore_index=True)
+        big["id"] = range(1, len(big) + 1)
+        big.to_csv(scaled, index=False)
+
+        print(f"{'dataset':<24}{'rows':>10}{'csv':>10}{'build':>10}{'snapshot':>10}{'speedup':>9}")
+        for path in [ROOT / "audit_logs.csv", ROOT / "audit_logs_v2.csv", scaled]:
+            snapshots = tmp / "snapshots"
+            rows = len(csv_load(path))
+            csv_time = timed(csv_load, path)
+            start = time.perf_counter()
+            read_table(path, snapshots, parse_dates=["timestamp"])
+            build_time = time.perf_counter() - start
+            snapshot_time = timed(read_table, path, snapshots, parse_dates=["timestamp"])
+            print(
+                f"{path.name:<24}{rows:>10,}{csv_time * 1000:>8.1f}ms{build_time * 1000:>8.1f}ms"
+                f"{snapshot_time * 1000:>8.1f}ms{csv_time / snapshot_time:>8.1f}x"
+            )
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Microbenchmark suite for the recommendation, rightsizing and anomaly code paths.
+
+Runs without a database. Cases:
+
+- recommend.normalize: ``normalize_user_profile`` on 1 and 1000 profiles
+- recommend.predict: ``predict_proba`` scores for 1 profile and a batch of 1000
+- rightsizing.build: building the in-memory usage cube
+- rightsizing.page: the first page (100 rows) and assigned count, per ``lookback_days``
+- rightsizing.scan: every unused permission, per ``lookback_days``
+- anomaly.score: scoring every loaded audit event
+- anomaly.query: ``detected`` count and samples at risk threshold 3
+
+Recommendation cases run on the shipped v1 and v2 CSV exports. Rightsizing
+and anomaly cases also run on synthetic datasets: the v1 export tiled
+``--scales`` times, with renamed users and jittered timestamps. Lookbacks
+count back from the newest event, so results do not depend on today's date.
+Without ``permission_recommender.pkl`` a small model is trained on the v1
+users first.
+
+Each case reports the best and median time over repeats. ``--output``
+writes them as JSON; ``--baseline`` compares the run with an earlier file
+and exits with status 1 when any case's best time grew by more than
+``--threshold`` and by more than ``--noise-ms``. ``--compare OLD NEW``
+compares two files without running. Compare runs from the same machine.
+Usage (from the repo root):
+
+    python benchmarks/bench_suite.py --output bench.json
+    python benchmarks/bench_suite.py --baseline bench.json --threshold 0.25
+    python benchmarks/bench_suite.py --compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api import (  # noqa: E402
+    FEATURE_COLUMNS,
+    PROFILE_FIELDS,
+    expand_user_permissions,
+    normalize_audit_logs,
+    normalize_user_profile,
+    normalize_users,
+)
+from policy.anomaly import ScoredAuditLog  # noqa: E402
+from policy.artifacts import load_model  # noqa: E402
+from policy.forest import positive_scores  # noqa: E402
+from policy.labels import label_matrix  # noqa: E402
+from policy.rightsizing import InMemoryRightsizing, rightsizing_cutoff  # noqa: E402
+from policy.topology import build_pipeline, fit_pipeline  # noqa: E402
+
+CATEGORICAL_FEATURES = [column for column in FEATURE_COLUMNS if column != "has_license_binary"]
+SHIPPED = {"v1": "", "v2": "_v2"}
+
+
+def load_shipped(suffix: str) -> dict:
+    """The CSV exports of one shipped dataset, shaped the way the API loads them."""
+    roles = pd.read_csv(ROOT / "roles.csv")
+    users = pd.read_csv(ROOT / f"users{suffix}.csv")
+    additional = pd.read_csv(ROOT / f"user_additional_permissions{suffix}.csv")
+    logs = pd.read_csv(ROOT / f"audit_logs{suffix}.csv", parse_dates=["timestamp"])
+    return assemble(users, roles, additional, logs)
+
+
+def assemble(users: pd.DataFrame, roles: pd.DataFrame, additional: pd.DataFrame, logs: pd.DataFrame) -> dict:
+    users = normalize_users(users, roles)
+    permissions = expand_user_permissions(
+        users, pd.read_csv(ROOT / "permissions.csv"), pd.read_csv(ROOT / "role_permissions.csv"), additional
+    )
+    permissions["label"] = permissions["resource_type"] + "_" + permissions["action"]
+    profiles = normalize_user_profile(
+        users[["user_id"] + [c for c in PROFILE_FIELDS + ["has_license_binary"] if c in users.columns]]
+    ).drop_duplicates(subset=["user_id"]).set_index("user_id")
+    return {
+        "users": users,
+        "permissions": permissions,
+        "profiles": profiles,
+        "audit_logs": normalize_audit_logs(logs),
+        "roles": roles,
+        "additional": additional,
+    }
+
+
+def tiled(base: dict, scale: int, seed: int = 0) -> dict:
+    """``base`` repeated ``scale`` times; copy k renames user U0001 to U0001-k."""
+    rng = np.random.default_rng(seed)
+    users, additional, logs = base["users"], base["additional"], base["audit_logs"]
+    copies = np.repeat(np.arange(scale), len(users))
+    big_users = pd.concat([users] * scale, ignore_index=True)
+    big_users["id"] = big_users["id"] + copies * (int(users["id"].max()) + 1)
+    big_users["user_id"] = big_users["user_id"] + "-" + copies.astype(str)
+
+    copies = np.repeat(np.arange(scale), len(additional))
+    big_additional = pd.concat([additional] * scale, ignore_index=True)
+    big_additional["user_id"] = big_additional["user_id"] + copies * (int(users["id"].max()) + 1)
+
+    copies = np.repeat(np.arange(scale), len(logs))
+    big_logs = pd.concat([logs] * scale, ignore_index=True)
+    big_logs["id"] = np.arange(1, len(big_logs) + 1)
+    big_logs["user_id"] = big_logs["user_id"].astype(str) + "-" + copies.astype(str)
+    jitter = rng.integers(-12 * 3600, 12 * 3600, len(big_logs)).astype("timedelta64[s]")
+    big_logs["timestamp"] = big_logs["timestamp"] + jitter
+    return assemble(big_users, base["roles"], big_additional, big_logs)
+
+
+def train_small_model(data: dict):
+    """A capped multi-output forest on the v1 users, for runs without an artifact."""
+    Y, labels = label_matrix(data["users"]["user_id"], data["permissions"])
+    X = normalize_user_profile(data["users"]).fillna(0)[FEATURE_COLUMNS]
+    preprocessor = ColumnTransformer(transformers=[
+        ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL_FEATURES),
+        ("num", "passthrough", ["has_license_binary"]),
+    ])
+    model = fit_pipeline(build_pipeline("capped", preprocessor), X, Y)
+    model.permission_labels_ = labels
+    return model
+
+
+def measure(fn, min_time: float, max_repeats: int) -> dict:
+    """Best and median seconds per call; repeats until ``min_time`` has passed (at least 3 calls)."""
+    fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < 3 or (time.perf_counter() - start < min_time and len(times) < max_repeats):
+        call_start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - call_start)
+    return {"best": min(times), "median": float(np.median(times)), "repeats": len(times)}
+
+
+def recommendation_cases(model, data: dict) -> dict:
+    raw = data["users"][PROFILE_FIELDS]
+    many = raw.sample(1000, replace=True, random_state=0).reset_index(drop=True)
+    one = raw.iloc[[0]].reset_index(drop=True)
+    batch = normalize_user_profile(many)[FEATURE_COLUMNS]
+    single = normalize_user_profile(one)[FEATURE_COLUMNS]
+    return {
+        "recommend.normalize[1]": lambda: normalize_user_profile(one),
+        "recommend.normalize[1000]": lambda: normalize_user_profile(many),
+        "recommend.predict[1]": lambda: positive_scores(model, single),
+        "recommend.predict[1000]": lambda: positive_scores(model, batch),
+    }
+
+
+def rightsizing_cases(data: dict, lookbacks: list[int]) -> dict:
+    args = (data["permissions"], data["profiles"], data["audit_logs"])
+    rightsizing = InMemoryRightsizing(*args)
+    last_event = data["audit_logs"]["timestamp"].max()
+    cases = {"rightsizing.build": lambda: InMemoryRightsizing(*args)}
+    for days in lookbacks:
+        cutoff = rightsizing_cutoff(days, now=last_event)
+
+        def page(cutoff=cutoff) -> None:
+            unused = []
+            for records in rightsizing.iter_unused(cutoff, {}, limit=101):
+                unused.extend(records)
+                if len(unused) > 100:
+                    break
+            rightsizing.count({})
+
+        cases[f"rightsizing.page[lookback={days}]"] = page
+        cases[f"rightsizing.scan[lookback={days}]"] = (
+            lambda cutoff=cutoff: list(chain.from_iterable(rightsizing.iter_unused(cutoff, {})))
+        )
+    return cases
+
+
+def anomaly_cases(data: dict) -> dict:
+    logs, users = data["audit_logs"], data["users"]
+    scored = ScoredAuditLog(logs, users)
+
+    def query() -> None:
+        scored.count(3)
+        scored.samples(3).to_dict(orient="records")
+
+    return {"anomaly.score": lambda: ScoredAuditLog(logs, users), "anomaly.query": query}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, threshold: float, noise_ms: float) -> list[str]:
+    """Print best times side by side; returns the cases that regressed.
+
+    A case regressed when it is slower than ``1 + threshold`` times the
+    baseline and also ``noise_ms`` slower in absolute terms.
+    """
+    if baseline["meta"].get("model") != current["meta"].get("model"):
+        print(f"warning: baseline model {baseline['meta'].get('model')} != {current['meta'].get('model')}")
+    regressions = []
+    print(f"\n{'case':<52}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<52}{'':>12}{result['best'] * 1000:>10.2f}ms{'new':>9}")
+            continue
+        change = result["best"] / before["best"] - 1
+        flag = ""
+        if change > threshold and (result["best"] - before["best"]) * 1000 > noise_ms:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<52}{before['best'] * 1000:>10.2f}ms{result['best'] * 1000:>10.2f}ms{change:>+8.0%}{flag}")
+    return regressions
+
+
+def report(regressions: list[str], threshold: float) -> int:
+    if not regressions:
+        print(f"\nNo case is more than {threshold:.0%} slower than the baseline.")
+        return 0
+    print(f"\nFAILED: {len(regressions)} case(s) more than {threshold:.0%} slower than the baseline:", file=sys.stderr)
+    for name in regressions:
+        print(f"  {name}", file=sys.stderr)
+    return 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, default=ROOT / "permission_recommender.pkl")
+    parser.add_argument("--scales", type=int, nargs="*", default=[10, 100],
+                        help="synthetic datasets: the v1 export tiled this many times")
+    parser.add_argument("--lookbacks", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--cases", nargs="*", default=[], help="only run cases whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to repeat each case for")
+    parser.add_argument("--max-repeats", type=int, default=50)
+    parser.add_argument("--output", type=Path, help="write results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--noise-ms", type=float, default=0.5, help="slowdowns below this many ms are noise")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.loads(path.read_text()) for path in args.compare)
+        return report(compare(old, new, args.threshold, args.noise_ms), args.threshold)
+
+    datasets = {name: load_shipped(suffix) for name, suffix in SHIPPED.items()}
+    for scale in args.scales:
+        datasets[f"v1x{scale}"] = tiled(datasets["v1"], scale)
+
+    if args.model.exists():
+        model, model_id = load_model(args.model)
+    else:
+        print(f"{args.model.name} not found; training a small model on the v1 users")
+        model, model_id = train_small_model(datasets["v1"]), "trained:capped"
+
+    results = {}
+    print(f"{'case':<52}{'best':>12}{'median':>12}{'repeats':>9}")
+    for dataset, data in datasets.items():
+        cases = {}
+        if dataset in SHIPPED:
+            cases.update(recommendation_cases(model, data))
+        cases.update(rightsizing_cases(data, args.lookbacks))
+        cases.update(anomaly_cases(data))
+        for case, fn in cases.items():
+            name = f"{dataset}/{case}"
+            if args.cases and not any(part in name for part in args.cases):
+                continue
+            result = measure(fn, args.min_time, args.max_repeats)
+            results[name] = result
+            print(f"{name:<52}{result['best'] * 1000:>10.2f}ms{result['median'] * 1000:>10.2f}ms{result['repeats']:>9}")
+
+    run = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "model": model_id,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "machine": platform.machine(),
+            "datasets": {name: {"users": len(d["users"]), "audit_logs": len(d["audit_logs"])} for name, d in datasets.items()},
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(run, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        return report(compare(baseline, run, args.threshold, args.noise_ms), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
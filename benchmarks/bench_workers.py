@@ -0,0 +1,145 @@
+"""Memory per worker: `uvicorn --workers N` vs. preloaded gunicorn workers.
+
+Starts the API in each mode, waits until it is ready and the memory has
+settled, sends some warm-up traffic, then reads PSS (proportional set size;
+shared pages are split between the processes sharing them) and USS (pages
+private to one process) from /proc. Linux only.
+Usage (from the repo root):
+
+    python benchmarks/bench_workers.py --workers 1 4 8
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PROFILE = {"role": "Doctor", "department": "Khoa_Noi", "branch": "CN_HN", "license": "Yes", "seniority": "Senior"}
+
+
+def command(mode: str, workers: int, port: int) -> list[str]:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--workers", str(workers)]
+    return [sys.executable, "-m", "gunicorn", "api:app", "--bind", f"127.0.0.1:{port}", "--workers", str(workers)]
+
+
+def children(pid: int) -> list[int]:
+    found = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        for child in (task / "children").read_text().split():
+            found.append(int(child))
+            found.extend(children(int(child)))
+    return found
+
+
+def memory_kb(pid: int) -> dict[str, int]:
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def request(port: int, path: str, body: dict | None = None) -> int:
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}", data=data, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return 0
+
+
+def wait_settled(pid: int, timeout: float = 600.0) -> None:
+    """Wait until the process tree's total PSS stops growing."""
+    deadline = time.time() + timeout
+    previous, stable = 0, 0
+    while time.time() < deadline and stable < 3:
+        time.sleep(1.0)
+        total = sum(memory_kb(p)["pss"] for p in [pid] + children(pid))
+        stable = stable + 1 if abs(total - previous) < 0.01 * total else 0
+        previous = total
+
+
+def measure(mode: str, workers: int, port: int, warmup: int) -> dict:
+    env = dict(os.environ, SPRING_DATASOURCE_URL="")
+    proc = subprocess.Popen(
+        command(mode, workers, port), cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        start = time.perf_counter()
+        ready = 0
+        while ready < 3 * workers:
+            ready = ready + 1 if request(port, "/health/ready") == 200 else 0
+            if time.perf_counter() - start > 600:
+                raise RuntimeError(f"{mode} with {workers} workers did not become ready")
+            time.sleep(0.05 if ready else 0.5)
+        ready_s = time.perf_counter() - start
+        wait_settled(proc.pid)
+
+        for i in range(warmup):
+            request(port, "/recommend/new-user", dict(PROFILE, seniority=["Junior", "Senior"][i % 2]))
+            request(port, "/recommend/anomaly", {"risk_threshold": 3})
+        wait_settled(proc.pid)
+
+        workers_pids = [p for p in children(proc.pid) if Path(f"/proc/{p}/cmdline").exists()]
+        if mode == "uvicorn":
+            # uvicorn's multiprocess supervisor spawns each worker through a
+            # resource tracker / spawn helper; keep only the serving processes.
+            workers_pids = [p for p in workers_pids if b"spawn_main" in Path(f"/proc/{p}/cmdline").read_bytes()]
+        master = memory_kb(proc.pid)
+        per_worker = [memory_kb(p) for p in workers_pids]
+        total_pss = master["pss"] + sum(m["pss"] for m in per_worker)
+        if not per_worker:
+            # `uvicorn --workers 1` serves from the main process.
+            per_worker = [master]
+        return {
+            "mode": mode,
+            "workers": workers,
+            "ready_s": round(ready_s, 1),
+            "total_pss_mb": round(total_pss / 1024, 1),
+            "worker_pss_mb": round(sum(m["pss"] for m in per_worker) / len(per_worker) / 1024, 1),
+            "worker_uss_mb": round(sum(m["uss"] for m in per_worker) / len(per_worker) / 1024, 1),
+            "worker_rss_mb": round(sum(m["rss"] for m in per_worker) / len(per_worker) / 1024, 1),
+        }
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--modes", nargs="+", default=["uvicorn", "gunicorn"], choices=["uvicorn", "gunicorn"])
+    parser.add_argument("--warmup", type=int, default=50, help="warm-up request pairs before measuring")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'workers':>8}{'ready':>8}{'total PSS':>12}{'PSS/worker':>12}{'USS/worker':>12}{'RSS/worker':>12}")
+    for mode in args.modes:
+        for workers in args.workers:
+            r = measure(mode, workers, args.port, args.warmup)
+            print(
+                f"{r['mode']:<10}{r['workers']:>8}{r['ready_s']:>7.1f}s{r['total_pss_mb']:>10.1f}MB"
+                f"{r['worker_pss_mb']:>10.1f}MB{r['worker_uss_mb']:>10.1f}MB{r['worker_rss_mb']:>10.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
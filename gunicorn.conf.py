@@ -0,0 +1,45 @@
+"""Multi-worker serving: load the model and data once, then fork the workers.
+
+    gunicorn api:app                       # workers from WEB_CONCURRENCY (default 1)
+    WEB_CONCURRENCY=4 gunicorn api:app
+
+The master imports api.py (preload_app) and, once gunicorn is ready, runs
+every startup step synchronously before forking. The workers inherit the
+loaded model and DataFrames copy-on-write, so those pages stay shared.
+Garbage collection is disabled in the master from on_starting, after the
+import and before the startup steps load the data, and everything loaded
+is moved to the permanent generation (gc.freeze) before forking; otherwise
+the first collection in each worker would write to every object header and
+unshare the pages.
+
+No worker runs until the steps are done, so they cannot be retried in the
+background as under uvicorn. A failing step is retried at most
+STARTUP_MAX_ATTEMPTS times (GUNICORN_STARTUP_MAX_ATTEMPTS, default 5, when
+that is 0); if a component still failed, the master exits with status 4 so
+its supervisor restarts it.
+"""
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    gc.disable()
+
+
+def when_ready(server):
+    import api
+
+    api.startup.max_attempts = api.STARTUP_MAX_ATTEMPTS or int(os.getenv("GUNICORN_STARTUP_MAX_ATTEMPTS", "5"))
+    api.startup.run()
+    failed = api.startup.failed()
+    if failed:
+        server.halt(reason=f"Startup failed: {', '.join(failed)}", exit_status=4)
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
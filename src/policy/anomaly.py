@@ -0,0 +1,174 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Normal behaviour per role: resources a role is expected to touch.
+ROLE_ALLOWED_RESOURCES = {
+    "Doctor": ["MedicalRecord", "Prescription", "LabResult"],
+    "Nurse": ["VitalSigns", "MedicalRecord"],
+    "Receptionist": ["PatientProfile", "Appointment"],
+    "Cashier": ["BillingRecord", "Invoice"],
+    "HR": ["StaffProfile"],
+}
+
+WORK_HOURS = (8, 18)
+UNEXPECTED_RESOURCE_WEIGHT = 3
+OFF_HOURS_WEIGHT = 2
+FAILED_ACCESS_WEIGHT = 1
+MAX_RISK_SCORE = UNEXPECTED_RESOURCE_WEIGHT + OFF_HOURS_WEIGHT + FAILED_ACCESS_WEIGHT
+SAMPLE_SCAN_CHUNK = 1 << 16
+
+
+def _codes(values, categories: list) -> np.ndarray:
+    """Integer codes of ``values`` in ``categories``; unknown values get len(categories)."""
+    codes = pd.Index(categories).get_indexer(pd.Index(values)).astype(np.intp)
+    codes[codes < 0] = len(categories)
+    return codes
+
+
+class AnomalyScorer:
+    """Vectorized version of the role / off-hours / failed-access risk rules.
+
+    Roles and resource types are integer-coded once, and role -> resource
+    membership is a lookup in a boolean matrix whose last row and column
+    stand for unknown roles and resources (always unexpected).
+    """
+
+    def __init__(self, role_allowed: dict = ROLE_ALLOWED_RESOURCES):
+        self.roles = list(role_allowed)
+        self.resources = sorted({resource for resources in role_allowed.values() for resource in resources})
+        resource_index = {resource: i for i, resource in enumerate(self.resources)}
+        self.allowed = np.zeros((len(self.roles) + 1, len(self.resources) + 1), dtype=bool)
+        for role_code, role in enumerate(self.roles):
+            for resource in role_allowed[role]:
+                self.allowed[role_code, resource_index[resource]] = True
+
+    def unexpected_resource(self, roles, resource_types) -> np.ndarray:
+        return ~self.allowed[_codes(roles, self.roles), _codes(resource_types, self.resources)]
+
+    def score(self, roles, resource_types, timestamps, allowed) -> dict[str, np.ndarray]:
+        """Rule flags and risk score for each event."""
+        hour = pd.to_datetime(pd.Series(timestamps), errors="coerce").dt.hour.to_numpy()
+        unexpected = self.unexpected_resource(roles, resource_types)
+        off_hours = ~((hour >= WORK_HOURS[0]) & (hour <= WORK_HOURS[1]))
+        failed = (pd.Series(allowed) == False).to_numpy(dtype=bool)
+        risk_score = (
+            unexpected.astype(np.int8) * UNEXPECTED_RESOURCE_WEIGHT
+            + off_hours.astype(np.int8) * OFF_HOURS_WEIGHT
+            + failed.astype(np.int8) * FAILED_ACCESS_WEIGHT
+        )
+        return {
+            "hour": hour,
+            "unexpected_resource": unexpected,
+            "off_hours": off_hours,
+            "failed_access": failed,
+            "risk_score": risk_score,
+        }
+
+
+class ScoredAuditLog:
+    """Audit log enriched with the user's role and rule flags, scored once.
+
+    Counts per risk score are kept as a histogram, so the number of
+    anomalies at any threshold is a suffix sum, and sample rows per
+    threshold are cached after the first request. Events appended later
+    with ``extend`` are scored on their own and kept as extra parts.
+    """
+
+    def __init__(self, logs: pd.DataFrame, users: pd.DataFrame, scorer: AnomalyScorer | None = None):
+        self.scorer = scorer or AnomalyScorer()
+        self.role_by_user = users.drop_duplicates(subset=["user_id"]).set_index("user_id")["role"]
+        self.parts: list[tuple[pd.DataFrame, np.ndarray]] = []
+        self.histogram = np.zeros(MAX_RISK_SCORE + 1, dtype=np.int64)
+        self.rows = 0
+        self._sample_rows: dict[tuple[int, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.extend(logs, merge_small=False)
+
+    def __getstate__(self) -> dict:
+        # Pickled into executor workers; the lock is not picklable.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _score(self, logs: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+        frame = logs.copy()
+        frame["role"] = frame["user_id"].map(self.role_by_user)
+        scored = self.scorer.score(frame["role"], frame["resource_type"], frame["timestamp"], frame["allowed"])
+        frame["hour"] = scored["hour"]
+        frame["unexpected_resource"] = scored["unexpected_resource"]
+        frame["risk_score"] = scored["risk_score"].astype(np.int64)
+        return frame, scored["risk_score"]
+
+    def extend(self, logs: pd.DataFrame, merge_small: bool = True) -> None:
+        """Score and append events; the cost depends only on ``logs``.
+
+        A trailing part smaller than one scan chunk absorbs the new events,
+        so frequent small appends do not pile up parts.
+        """
+        frame, risk_score = self._score(logs)
+        counts = np.bincount(risk_score, minlength=MAX_RISK_SCORE + 1)
+        with self._lock:
+            parts = list(self.parts)
+            if merge_small and parts and len(parts[-1][0]) < SAMPLE_SCAN_CHUNK:
+                last_frame, last_score = parts.pop()
+                frame = pd.concat([last_frame, frame], ignore_index=True)
+                risk_score = np.concatenate([last_score, risk_score])
+            parts.append((frame, risk_score))
+            self.parts = parts
+            self.histogram = self.histogram + counts
+            self.rows += len(logs)
+            # New rows come after every cached sample, so full samples stay valid.
+            self._sample_rows = {key: rows for key, rows in self._sample_rows.items() if len(rows) >= key[1]}
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return pd.concat([frame for frame, _ in self.parts], ignore_index=True)
+
+    @property
+    def risk_score(self) -> np.ndarray:
+        return np.concatenate([risk_score for _, risk_score in self.parts])
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def count(self, threshold: int) -> int:
+        return int(self.histogram[max(threshold, 0):].sum())
+
+    def sample_rows(self, threshold: int, limit: int = 20) -> np.ndarray:
+        key = (threshold, limit)
+        rows = self._sample_rows.get(key)
+        if rows is None:
+            parts = self.parts
+            found = []
+            offset = 0
+            for _, risk_score in parts:
+                for start in range(0, len(risk_score), SAMPLE_SCAN_CHUNK):
+                    chunk = np.flatnonzero(risk_score[start:start + SAMPLE_SCAN_CHUNK] >= threshold)
+                    found.append(chunk + offset + start)
+                    if sum(len(part) for part in found) >= limit:
+                        break
+                else:
+                    offset += len(risk_score)
+                    continue
+                break
+            rows = np.concatenate(found)[:limit] if found else np.empty(0, dtype=np.intp)
+            if len(rows) >= limit or self.parts is parts:
+                self._sample_rows[key] = rows
+        return rows
+
+    def samples(self, threshold: int, limit: int = 20) -> pd.DataFrame:
+        rows = self.sample_rows(threshold, limit)
+        pieces = []
+        offset = 0
+        for frame, _ in self.parts:
+            local = rows[(rows >= offset) & (rows < offset + len(frame))] - offset
+            if len(local):
+                pieces.append(frame.iloc[local])
+            offset += len(frame)
+        return pd.concat(pieces) if len(pieces) > 1 else (pieces[0] if pieces else self.parts[0][0].iloc[[]])
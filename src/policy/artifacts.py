@@ -0,0 +1,27 @@
+import hashlib
+import io
+from pathlib import Path
+from typing import Any
+
+import joblib
+
+
+def model_version(path: Path) -> str:
+    """Short content hash identifying a model artifact."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def load_model(path: Path) -> tuple[Any, str]:
+    """Load the model at ``path`` with its ``model_version``, reading the file once."""
+    data = Path(path).read_bytes()
+    return joblib.load(io.BytesIO(data)), hashlib.sha256(data).hexdigest()[:12]
+
+
+def lookup_table_path(model_path: Path) -> Path:
+    """Location of the precompiled lookup table stored next to a model."""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + ".lookup.npz")
@@ -0,0 +1,308 @@
+"""In-process evaluation of the ``emr.authz`` policy (emr_authz.rego).
+
+The data tables (``role_perms``, ``high_risk_actions``,
+``high_risk_resources``) are read from the .rego file, so the engine follows
+edits to them. The rules are compiled into indexes keyed on integer codes of
+role, resource type and action. A decision runs a fixed number of dict and
+bitmask lookups, without interpreting Rego.
+
+Semantics follow the policy's intent where the file is not valid Rego
+(``or`` between rule bodies, ``in`` without ``future.keywords``):
+
+- a boolean rule that does not hold is false, including inside
+  ``bool_to_int``, so ``risk_score`` is always defined;
+- an input field that is missing never compares equal. JSON ``null`` equals
+  ``null``, as in Rego;
+- ``env.hour`` that is missing, null or not a number counts as off-hours
+  (``not (env.hour >= 8)`` holds);
+- ``decision`` is only built when ``allow`` holds, because ``policy_id`` is
+  undefined otherwise. Every denial therefore returns the default decision.
+  ``evaluate`` returns the individual rule values, deny reasons included;
+- the sets ``deny_reasons`` and ``obligations`` are returned as lists,
+  sorted by reason and by obligation type.
+"""
+import json
+import re
+from pathlib import Path
+
+DEFAULT_DECISION = {
+    "allow": False,
+    "policy_id": "DEFAULT_DENY",
+    "deny_reasons": [],
+    "obligations": [],
+    "risk_score": 0,
+}
+DECISION_KEYS = tuple(DEFAULT_DECISION)
+
+# Resource sets and role lists used in the rule bodies of emr_authz.rego.
+CLINICAL_RESOURCES = frozenset({
+    "MedicalRecord", "ClinicalNote", "VitalSigns", "Prescription", "LabResult", "ImagingResult", "DischargeSummary",
+})
+PATIENT_DATA_RESOURCES = frozenset({
+    "MedicalRecord", "ClinicalNote", "VitalSigns", "Prescription", "LabResult", "ImagingResult", "PatientProfile",
+})
+ROLE_DENIED_RESOURCES = {
+    "Receptionist": (CLINICAL_RESOURCES, "RECEPTIONIST_NO_CLINICAL_ACCESS"),
+    "Cashier": (CLINICAL_RESOURCES - {"DischargeSummary"}, "CASHIER_NO_CLINICAL_ACCESS"),
+    "HR": (
+        CLINICAL_RESOURCES - {"DischargeSummary"} | {"BillingRecord", "Invoice", "InsuranceClaim"},
+        "HR_NO_PATIENT_OR_FINANCE_ACCESS",
+    ),
+    "ITAdmin": (PATIENT_DATA_RESOURCES, "ITADMIN_NO_PATIENT_DATA"),
+}
+BRANCH_SCOPED_ROLES = frozenset({"Doctor", "Nurse", "Receptionist", "Cashier", "HR"})
+SOD_RESOURCES = frozenset({"Invoice", "InsuranceClaim", "Prescription"})
+BRANCH_SCOPED_RESOURCES = frozenset({
+    "PatientProfile", "Appointment", "AdmissionRecord", "TransferRecord", "BillingRecord", "Invoice",
+    "InsuranceClaim", "MedicalReport", "OperationReport", "FinancialReport",
+})
+HR_STAFF_RESOURCES = frozenset({"StaffProfile", "WorkSchedule", "TrainingRecord"})
+MANAGER_STAFF_RESOURCES = frozenset({"StaffProfile", "WorkSchedule"})
+SYSTEM_RESOURCES = frozenset({"SystemConfig", "AccessPolicy", "AuditLog", "IncidentCase"})
+SYSTEM_ROLES = frozenset({"ITAdmin", "SecurityAdmin"})
+
+OBLIGATIONS = {
+    "log_high_risk": {"type": "log_high_risk", "reason": "high_risk_action"},
+    "mask_fields": {"type": "mask_fields", "fields": ["national_id", "address"], "reason": "privacy_minimization"},
+    "rate_limit": {"type": "rate_limit", "limit_per_minute": 60, "reason": "bulk_access_control"},
+    "require_approval_ref": {"type": "require_approval_ref", "field": "environment.approval_ticket_id"},
+    "step_up_mfa": {"type": "step_up_mfa", "reason": "off_hours"},
+}
+
+# A missing input field (undefined in Rego), as opposed to JSON null.
+_UNDEFINED = object()
+# A role, resource type or action that is present but not a string.
+_OTHER = object()
+
+
+def _rego_literal(text: str, name: str):
+    """The value of ``name := <literal>`` in a Rego module, as JSON (sets become lists)."""
+    match = re.search(rf"^{name}\s*:=\s*", text, re.M)
+    if match is None:
+        raise ValueError(f"{name} is not defined in the policy")
+    depth = 0
+    for end in range(match.end(), len(text)):
+        depth += {"{": 1, "}": -1}.get(text[end], 0)
+        if depth == 0:
+            break
+    literal = re.sub(r"#[^\n]*", "", text[match.end():end + 1])
+    literal = re.sub(r'\{(\s*"[^"]*"(?:\s*,\s*"[^"]*")*\s*)\}', r"[\1]", literal)
+    return json.loads(literal)
+
+
+def load_tables(path: Path) -> dict:
+    """``role_perms`` and the high-risk sets of a policy file."""
+    text = Path(path).read_text(encoding="utf-8")
+    return {
+        "role_perms": {
+            role: {resource: frozenset(actions) for resource, actions in resources.items()}
+            for role, resources in _rego_literal(text, "role_perms").items()
+        },
+        "high_risk_actions": frozenset(_rego_literal(text, "high_risk_actions")),
+        "high_risk_resources": frozenset(_rego_literal(text, "high_risk_resources")),
+    }
+
+
+def _get(document, key: str):
+    return document.get(key, _UNDEFINED) if isinstance(document, dict) else _UNDEFINED
+
+
+def _equal(a, b) -> bool:
+    return a is not _UNDEFINED and b is not _UNDEFINED and a == b and isinstance(a, bool) == isinstance(b, bool)
+
+
+def _holds(value) -> bool:
+    """A Rego expression body: defined and not ``false``."""
+    return value is not _UNDEFINED and value is not False
+
+
+def _name(value):
+    """Strings as they are; any other defined value as a placeholder that matches no name."""
+    return value if isinstance(value, str) or value is _UNDEFINED else _OTHER
+
+
+class PolicyEngine:
+    """Decisions of ``data.emr.authz`` for input documents.
+
+    ``role``, ``resource.type`` and ``action`` are coded to integers once.
+    RBAC grants are a bitmask of action codes per (role, resource type), and
+    the role-based deny reasons a dict on the same key. ``decide`` stops at
+    the first failed condition; ``evaluate`` computes every rule.
+    """
+
+    def __init__(self, tables: dict):
+        self.tables = tables
+        role_perms = tables["role_perms"]
+        roles = sorted(set(role_perms) | set(ROLE_DENIED_RESOURCES) | BRANCH_SCOPED_ROLES | SYSTEM_ROLES | {"Manager"})
+        resources = sorted(
+            {resource for grants in role_perms.values() for resource in grants}
+            | CLINICAL_RESOURCES | PATIENT_DATA_RESOURCES | BRANCH_SCOPED_RESOURCES | HR_STAFF_RESOURCES
+            | SYSTEM_RESOURCES | tables["high_risk_resources"] | SOD_RESOURCES
+        )
+        actions = sorted(
+            {action for grants in role_perms.values() for allowed in grants.values() for action in allowed}
+            | tables["high_risk_actions"] | {"export", "approve"}
+        )
+        self.role_codes = {role: code for code, role in enumerate(roles)}
+        self.resource_codes = {resource: code for code, resource in enumerate(resources)}
+        self.action_codes = {action: code for code, action in enumerate(actions)}
+
+        self.grants: dict[tuple[int, int], int] = {}
+        for role, grants in role_perms.items():
+            for resource, allowed in grants.items():
+                mask = 0
+                for action in allowed:
+                    mask |= 1 << self.action_codes[action]
+                self.grants[self.role_codes[role], self.resource_codes[resource]] = mask
+        self.role_deny: dict[tuple[int, int], str] = {
+            (self.role_codes[role], self.resource_codes[resource]): reason
+            for role, (denied, reason) in ROLE_DENIED_RESOURCES.items()
+            for resource in denied
+        }
+        self.high_risk_action_mask = sum(1 << self.action_codes[action] for action in tables["high_risk_actions"])
+        self.high_risk_resource_codes = frozenset(self.resource_codes[r] for r in tables["high_risk_resources"])
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PolicyEngine":
+        return cls(load_tables(path))
+
+    def _read(self, request: dict) -> tuple:
+        subject, resource = _get(request, "subject"), _get(request, "resource")
+        environment, action = _get(request, "environment"), _name(_get(request, "action"))
+        role, resource_type = _name(_get(subject, "role")), _name(_get(resource, "type"))
+        return subject, resource, environment, action, role, resource_type
+
+    @staticmethod
+    def _off_hours(environment) -> bool:
+        hour = _get(environment, "hour")
+        return not (isinstance(hour, (int, float)) and not isinstance(hour, bool) and 8 <= hour <= 18)
+
+    @staticmethod
+    def _patient_assigned(subject, resource) -> bool:
+        patient = _get(resource, "patient_id")
+        if patient is _UNDEFINED or patient is None:
+            return False
+        assigned = _get(subject, "assigned_patients")
+        if isinstance(assigned, dict):
+            assigned = assigned.values()
+        elif not isinstance(assigned, (list, tuple, set, frozenset)):
+            return False
+        return any(_equal(patient, value) for value in assigned)
+
+    def _abac_ok(self, subject, resource, role, resource_type) -> bool:
+        if resource_type in CLINICAL_RESOURCES:
+            if role == "Doctor" and self._patient_assigned(subject, resource):
+                return True
+            if (
+                role == "Nurse"
+                and self._patient_assigned(subject, resource)
+                and _equal(_get(subject, "department"), _get(resource, "owner_department"))
+            ):
+                return True
+        if resource_type in SYSTEM_RESOURCES and role in SYSTEM_ROLES:
+            return True
+        same_department = _equal(_get(subject, "department"), _get(resource, "owner_department"))
+        if resource_type == "MedicalReport" and (role == "Doctor" or (role == "Manager" and same_department)):
+            return True
+        if not _equal(_get(subject, "branch"), _get(resource, "branch")):
+            return False
+        return (
+            resource_type in BRANCH_SCOPED_RESOURCES
+            or (role == "HR" and resource_type in HR_STAFF_RESOURCES)
+            or (role == "Manager" and resource_type in MANAGER_STAFF_RESOURCES and same_department)
+        )
+
+    def _deny_reasons(self, subject, resource, environment, action, role, resource_type) -> list[str]:
+        reasons = []
+        role_reason = self.role_deny.get((self.role_codes.get(role), self.resource_codes.get(resource_type)))
+        if role_reason is not None:
+            reasons.append(role_reason)
+        if action == "delete" and resource_type in PATIENT_DATA_RESOURCES:
+            reasons.append("NO_DELETE_PATIENT_DATA")
+        if action == "export" and resource_type == "MedicalRecord":
+            emergency = _holds(_get(environment, "emergency_mode"))
+            if not emergency and not _holds(_get(environment, "export_approved")):
+                reasons.append("EXPORT_REQUIRES_APPROVAL_OR_EMERGENCY")
+            if emergency and role is not _UNDEFINED and role != "SecurityAdmin":
+                reasons.append("ONLY_SECURITYADMIN_CAN_EXPORT_IN_EMERGENCY")
+        if role in BRANCH_SCOPED_ROLES and not _equal(_get(subject, "branch"), _get(resource, "branch")):
+            reasons.append("BRANCH_MISMATCH")
+        if (
+            action == "approve"
+            and resource_type in SOD_RESOURCES
+            and _equal(_get(resource, "created_by"), _get(subject, "user_id"))
+        ):
+            reasons.append("SOD_CREATOR_CANNOT_APPROVE")
+        return sorted(reasons)
+
+    def _rbac_allows(self, role, resource_type, action) -> bool:
+        mask = self.grants.get((self.role_codes.get(role), self.resource_codes.get(resource_type)), 0)
+        code = self.action_codes.get(action)
+        return code is not None and bool(mask >> code & 1)
+
+    def _risk_score(self, resource, environment, action, resource_type) -> int:
+        action_code = self.action_codes.get(action)
+        high_risk_action = action_code is not None and bool(self.high_risk_action_mask >> action_code & 1)
+        return (
+            2 * self._off_hours(environment)
+            + 3 * (action == "export")
+            + 2 * (_get(resource, "sensitivity") == "High")
+            + 3 * (self.resource_codes.get(resource_type) in self.high_risk_resource_codes)
+            + 2 * high_risk_action
+        )
+
+    def _obligations(self, environment, action, role, resource_type) -> list[dict]:
+        names = []
+        action_code = self.action_codes.get(action)
+        if action_code is not None and self.high_risk_action_mask >> action_code & 1:
+            names.append("log_high_risk")
+        if resource_type == "PatientProfile" and role is not _UNDEFINED and role != "Receptionist":
+            names.append("mask_fields")
+        if _holds(_get(environment, "is_bulk")):
+            names.append("rate_limit")
+        if action == "export":
+            names.append("require_approval_ref")
+        if self._off_hours(environment):
+            names.append("step_up_mfa")
+        return [OBLIGATIONS[name] for name in names]
+
+    def evaluate(self, request: dict) -> dict:
+        """Every rule of the policy for one input document."""
+        subject, resource, environment, action, role, resource_type = self._read(request)
+        rbac_allows = self._rbac_allows(role, resource_type, action)
+        abac_ok = self._abac_ok(subject, resource, role, resource_type)
+        deny_reasons = self._deny_reasons(subject, resource, environment, action, role, resource_type)
+        allow = rbac_allows and abac_ok and not deny_reasons
+        return {
+            "allow": allow,
+            "policy_id": f"ALLOW_{role}_{resource_type}_{action}" if allow else None,
+            "deny_reasons": deny_reasons,
+            "obligations": self._obligations(environment, action, role, resource_type) if allow else [],
+            "risk_score": self._risk_score(resource, environment, action, resource_type),
+            "rbac_allows": rbac_allows,
+            "abac_ok": abac_ok,
+        }
+
+    def decide(self, request: dict) -> dict:
+        """The ``decision`` document for one input document."""
+        subject, resource, environment, action, role, resource_type = self._read(request)
+        if (
+            not self._rbac_allows(role, resource_type, action)
+            or not self._abac_ok(subject, resource, role, resource_type)
+            or self._deny_reasons(subject, resource, environment, action, role, resource_type)
+        ):
+            return default_decision()
+        return {
+            "allow": True,
+            "policy_id": f"ALLOW_{role}_{resource_type}_{action}",
+            "deny_reasons": [],
+            "obligations": self._obligations(environment, action, role, resource_type),
+            "risk_score": self._risk_score(resource, environment, action, resource_type),
+        }
+
+    def decide_batch(self, requests: list[dict]) -> list[dict]:
+        return [self.decide(request) for request in requests]
+
+
+def default_decision() -> dict:
+    return {**DEFAULT_DECISION, "deny_reasons": [], "obligations": []}
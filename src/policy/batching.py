@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from policy.metrics import LATENCY_BUCKETS_MS, Histogram, size_buckets
+
+
+class _Pending:
+    __slots__ = ("bundle", "df", "future", "enqueued")
+
+    def __init__(self, bundle: Any, df: pd.DataFrame):
+        self.bundle = bundle
+        self.df = df
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring calls into one vectorized prediction.
+
+    Request threads block in ``predict``. A collector thread takes the
+    oldest waiting request and keeps collecting until ``max_wait_ms`` after
+    it arrived or until ``max_batch`` rows are waiting, then scores all of
+    them with one call of ``predict`` per model bundle and hands each caller
+    its rows. Rows that are identical across requests are scored once.
+    Up to ``max_in_flight`` batches are scored at the same time (one per
+    executor worker); while they are busy, new requests accumulate into the
+    next batch. Calls with ``max_batch`` rows or more skip the queue.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[Any, pd.DataFrame], np.ndarray],
+        max_wait_ms: float = 2.0,
+        max_batch: int = 64,
+        max_in_flight: int = 1,
+    ):
+        self.predict_fn = predict
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.unique_rows = 0
+        self.batch_size = Histogram(size_buckets(max_batch))
+        self.batch_latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self._queue: queue.SimpleQueue[_Pending | None] = queue.SimpleQueue()
+        self._slots = threading.Semaphore(max_in_flight)
+        self._pool: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._pool = ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="micro-batch")
+                self._thread = threading.Thread(target=self.run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+
+    def predict(self, bundle: Any, df: pd.DataFrame) -> np.ndarray:
+        """Scores for the rows of ``df``, computed in a batch with concurrent calls."""
+        if len(df) >= self.max_batch:
+            return self.predict_fn(bundle, df)
+        self.start()
+        pending = _Pending(bundle, df)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def _collect(self) -> list[_Pending] | None:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, rows = [first], len(first.df)
+        deadline = first.enqueued + self.max_wait
+        while rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already waiting.
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)
+                break
+            batch.append(pending)
+            rows += len(pending.df)
+        return batch
+
+    def run(self) -> None:
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            if batch is None:
+                return
+            self._pool.submit(self._score, batch)
+
+    def _score(self, batch: list[_Pending]) -> None:
+        try:
+            groups: dict[int, list[_Pending]] = {}
+            for pending in batch:
+                groups.setdefault(id(pending.bundle), []).append(pending)
+            for group in groups.values():
+                self._score_group(group)
+        finally:
+            self._slots.release()
+
+    def _score_group(self, group: list[_Pending]) -> None:
+        started = time.perf_counter()
+        for pending in group:
+            self.queue_wait_ms.observe((started - pending.enqueued) * 1000)
+        try:
+            frame = pd.concat([pending.df for pending in group], ignore_index=True)
+            keys = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            scores = self.predict_fn(group[0].bundle, frame.iloc[first].reset_index(drop=True))[inverse]
+        except BaseException as exc:
+            for pending in group:
+                pending.future.set_exception(exc)
+            return
+        self.batch_latency_ms.observe((time.perf_counter() - started) * 1000)
+        self.batch_size.observe(len(frame))
+        with self._lock:
+            self.batches += 1
+            self.requests += len(group)
+            self.rows += len(frame)
+            self.unique_rows += len(first)
+        offset = 0
+        for pending in group:
+            pending.future.set_result(scores[offset:offset + len(pending.df)])
+            offset += len(pending.df)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch": self.max_batch,
+            "max_in_flight": self.max_in_flight,
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "unique_rows": self.unique_rows,
+            "batch_size": self.batch_size.snapshot(),
+            "batch_latency_ms": self.batch_latency_ms.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
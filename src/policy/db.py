@@ -0,0 +1,152 @@
+import functools
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import MetaData, Table, create_engine, select
+from sqlalchemy.engine import Engine
+
+# Audit-log columns the endpoints use; ip_address, user_agent and the stored
+# risk_score (recomputed by the anomaly scorer) are never read.
+AUDIT_LOG_COLUMNS = (
+    "id",
+    "user_id",
+    "resource_type",
+    "resource_id",
+    "action",
+    "allowed",
+    "policy_id",
+    "deny_reasons",
+    "timestamp",
+)
+CATEGORY_COLUMNS = ("user_id", "resource_type", "resource_id", "action", "policy_id", "deny_reasons")
+
+
+@functools.lru_cache(maxsize=None)
+def get_engine(db_url: str) -> Engine:
+    """One engine, and so one connection pool, per database URL."""
+    return create_engine(db_url, pool_pre_ping=True)
+
+
+PERMISSIONS_QUERY = """
+SELECT u.user_id, p.id AS permission_id, p.resource_type, p.action, p.scope
+FROM users u
+JOIN roles r ON u.role_id = r.id
+JOIN role_permissions rp ON rp.role_id = r.id
+JOIN permissions p ON p.id = rp.permission_id
+UNION ALL
+SELECT u.user_id, p.id AS permission_id, p.resource_type, p.action, p.scope
+FROM users u
+JOIN user_additional_permissions uap ON uap.user_id = u.id
+JOIN permissions p ON p.id = uap.permission_id
+"""
+USERS_QUERY = """
+SELECT u.user_id, r.name AS role, u.department, u.branch, u.position,
+       u.has_license, u.seniority, u.employment_type
+FROM users u
+JOIN roles r ON r.id = u.role_id
+"""
+
+
+def read_permissions_and_users(engine: Engine) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Assigned permissions (role grants plus additional grants) and user profiles."""
+    permissions = pd.read_sql(PERMISSIONS_QUERY, engine).drop_duplicates()
+    users = pd.read_sql(USERS_QUERY, engine)
+    return permissions, users
+
+
+def window_start(days: int, now: pd.Timestamp | None = None) -> pd.Timestamp | None:
+    """Midnight ``days`` days before ``now``, or None for no window.
+
+    Day-aligned like the usage cube, so every rightsizing lookback of up to
+    ``days`` days sees all of its events.
+    """
+    if days <= 0:
+        return None
+    return (now or pd.Timestamp.now()).normalize() - pd.Timedelta(days=days)
+
+
+def audit_log_table(engine: Engine) -> Table:
+    return Table("audit_logs", MetaData(), autoload_with=engine)
+
+
+def audit_log_query(
+    table: Table,
+    since: pd.Timestamp | None = None,
+    after_id: int | None = None,
+    limit: int | None = None,
+    columns=AUDIT_LOG_COLUMNS,
+):
+    """SELECT of the wanted columns that exist, with the filters pushed down.
+
+    Older schemas call the outcome column ``success``; it is selected as
+    ``allowed``. ``after_id``/``limit`` read the next rows by id.
+    """
+    selected = []
+    for name in columns:
+        if name in table.c:
+            selected.append(table.c[name])
+        elif name == "allowed" and "success" in table.c:
+            selected.append(table.c["success"].label("allowed"))
+    query = select(*selected)
+    if since is not None:
+        query = query.where(table.c["timestamp"] >= since.to_pydatetime())
+    if after_id is not None:
+        query = query.where(table.c["id"] > after_id).order_by(table.c["id"])
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def compact_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Convert one chunk of rows to compact dtypes as it arrives."""
+    for name in chunk.columns:
+        if name in CATEGORY_COLUMNS:
+            chunk[name] = chunk[name].astype("category")
+        elif name == "timestamp":
+            chunk[name] = pd.to_datetime(chunk[name], errors="coerce")
+        elif name == "id":
+            chunk[name] = pd.to_numeric(chunk[name], downcast="integer")
+    return chunk
+
+
+def concat_compact(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compacted chunks, merging the categories of each column.
+
+    Each column is taken out of the chunks as it is concatenated, so the
+    chunks and the result together hold about one copy of the data.
+    """
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    columns = {}
+    for name in list(chunks[0].columns):
+        parts = [chunk.pop(name) for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[name] = pd.Series(union_categoricals(parts), name=name)
+        else:
+            columns[name] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_audit_logs(
+    engine: Engine,
+    since: pd.Timestamp | None = None,
+    chunk_size: int = 50_000,
+    after_id: int | None = None,
+    limit: int | None = None,
+    table: Table | None = None,
+) -> pd.DataFrame:
+    """Audit logs through a server-side cursor, ``chunk_size`` rows at a time.
+
+    Only one raw chunk is held at a time; earlier chunks are already in
+    compact dtypes. The compacted chunks are all kept until the end, so
+    memory still grows with the number of rows read (``since`` bounds it):
+    the peak is the compact result plus one raw chunk.
+    """
+    query = audit_log_query(table if table is not None else audit_log_table(engine), since, after_id, limit)
+    chunks = []
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as conn:
+        for chunk in pd.read_sql(query, conn, chunksize=chunk_size):
+            chunks.append(compact_chunk(chunk))
+    if not chunks:
+        return compact_chunk(pd.DataFrame(columns=[column.name for column in query.selected_columns]))
+    return concat_compact(chunks)
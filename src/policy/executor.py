@@ -0,0 +1,302 @@
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from policy.metrics import collect, replay
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("inline", "process")
+# Workers start from a clean interpreter, not a fork of the threaded server,
+# so no lock can be inherited while another thread holds it.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the admission queue is full; the caller should retry later."""
+
+
+class ExecutorUnavailableError(RuntimeError):
+    """Raised when a task timed out or its worker process died."""
+
+
+class StaleStateError(RuntimeError):
+    """Raised in a worker whose loaded state no longer matches the request."""
+
+
+def _init_worker(initializer: Callable[..., None] | None, state: bytes | None) -> None:
+    if initializer is None:
+        return
+    if state is None:
+        initializer()
+    else:
+        initializer(pickle.loads(state))
+
+
+def _timed(fn: Callable, args: tuple):
+    """Run ``fn`` in the worker; returns the start time, execution time, result and metrics spans."""
+    started = time.time()
+    with collect() as collected:
+        result = fn(*args)
+    return started, time.time() - started, result, collected
+
+
+class LatencyWindow:
+    """The most recent samples of a duration, summarized as percentiles."""
+
+    def __init__(self, maxlen: int = 1024):
+        self.samples: deque[float] = deque(maxlen=maxlen)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"p50_ms": None, "p99_ms": None, "max_ms": None}
+        values = np.fromiter(self.samples, dtype=float) * 1000
+        p50, p99 = np.percentile(values, [50, 99])
+        return {"p50_ms": round(float(p50), 2), "p99_ms": round(float(p99), 2), "max_ms": round(float(values.max()), 2)}
+
+
+class InferenceExecutor:
+    """Runs CPU-bound request work with bounded admission.
+
+    ``inline`` runs tasks on the calling request thread, as the handlers
+    always did; with ``workers`` > 0 at most that many run at once. ``process``
+    runs them in ``workers`` worker processes. Either way at most
+    ``workers + queue_size`` tasks are admitted; the rest are rejected at
+    once with ``ExecutorSaturatedError``, so queueing delay stays bounded
+    under a burst. A task holds its slot until it has finished, even after
+    the caller gave up waiting on it.
+
+    Workers are started with ``START_METHOD`` (modules in ``preload`` are
+    imported once in the fork server) and load their state in
+    ``initializer``, which receives a pickled copy of ``snapshot()`` taken
+    when the workers start. Each worker has its own single-process pool, so
+    ``update`` can apply an incremental change to every worker in order
+    with the tasks. After a change that is cheaper to reload (a model swap,
+    rebuilt indexes) call ``invalidate`` to replace the workers.
+    """
+
+    def __init__(
+        self,
+        backend: str = "inline",
+        workers: int = 0,
+        queue_size: int = 32,
+        timeout_seconds: float | None = None,
+        initializer: Callable[..., None] | None = None,
+        snapshot: Callable[[], Any] | None = None,
+        preload: Sequence[str] = (),
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown executor backend {backend!r}; expected one of {BACKENDS}")
+        if backend == "process" and workers < 1:
+            raise ValueError("The process backend needs at least one worker")
+        self.backend = backend
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_seconds = timeout_seconds
+        self.initializer = initializer
+        self.snapshot = snapshot
+        self.preload = list(preload)
+        self.bounded = workers > 0
+        self._admitted = threading.BoundedSemaphore(workers + queue_size) if self.bounded else None
+        self._running = threading.BoundedSemaphore(workers) if backend == "inline" and self.bounded else None
+        self._pools: list[ProcessPoolExecutor] = []
+        # Unfinished tasks per pool, for dispatching to the least busy worker.
+        self._queued: list[int] = []
+        self._stale = False
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.pools_started = 0
+        self.updates = 0
+        self.wait = LatencyWindow()
+        self.execution = LatencyWindow()
+
+    def _start_pools(self) -> None:
+        state = pickle.dumps(self.snapshot(), protocol=pickle.HIGHEST_PROTOCOL) if self.snapshot else None
+        context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver" and self.preload:
+            # Imported once in the fork server, so new workers start warm.
+            context.set_forkserver_preload(self.preload)
+        self._pools = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(self.initializer, state))
+            for _ in range(self.workers)
+        ]
+        for pool in self._pools:
+            # Processes are started on the first submit; start them all now.
+            pool.submit(int)
+        self._queued = [0] * self.workers
+        self._stale = False
+        self.pools_started += 1
+        logger.info(
+            "Starting %s worker processes (%s, %.1f MB of state)",
+            self.workers, START_METHOD, len(state or b"") / 1e6,
+        )
+
+    def _shutdown_pools(self, cancel_futures: bool = False) -> None:
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=cancel_futures)
+        self._pools, self._queued = [], []
+
+    def _submit(self, fn: Callable, args: tuple) -> futures.Future:
+        with self._lock:
+            if self._stale:
+                self._shutdown_pools()
+            if not self._pools:
+                self._start_pools()
+            queued = self._queued
+            index = min(range(len(queued)), key=queued.__getitem__)
+            queued[index] += 1
+            future = self._pools[index].submit(_timed, fn, args)
+
+        def finished(_) -> None:
+            with self._lock:
+                queued[index] -= 1
+
+        future.add_done_callback(finished)
+        return future
+
+    def invalidate(self) -> None:
+        """Replace running workers with new ones started from a fresh snapshot.
+
+        Tasks already running finish in the old workers. The new ones start
+        loading now, so the next task does not wait for all of it.
+        """
+        with self._lock:
+            if self._pools:
+                self._shutdown_pools()
+                self._start_pools()
+
+    def update(self, fn: Callable, *args) -> None:
+        """Run ``fn(*args)`` here and in every worker, ordered with the tasks.
+
+        Tasks submitted after ``update`` returns see the change everywhere.
+        Workers started later get it through their snapshot. ``fn`` must be
+        a module-level function. A worker that fails to apply it is replaced
+        on the next task.
+        """
+        with self._lock:
+            fn(*args)
+            if not self._pools:
+                return
+            try:
+                if not self._stale:
+                    for pool in self._pools:
+                        pool.submit(fn, *args).add_done_callback(self._check_update)
+                    self.updates += 1
+                    return
+            except BrokenProcessPool:
+                pass
+            # The next task starts new workers from a snapshot that includes the change.
+            self._shutdown_pools()
+
+    def _check_update(self, future: futures.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("A worker failed to apply an update; restarting the workers: %s", future.exception())
+            # Called from a pool's own thread: leave the restart to the next task.
+            with self._lock:
+                self._stale = True
+
+    def _release(self) -> None:
+        with self._stats_lock:
+            self.in_flight -= 1
+        if self._admitted is not None:
+            self._admitted.release()
+
+    def _execute_inline(self, fn: Callable, args: tuple):
+        try:
+            if self._running is None:
+                return _timed(fn, args)
+            with self._running:
+                return _timed(fn, args)
+        finally:
+            self._release()
+
+    def _execute_process(self, fn: Callable, args: tuple):
+        try:
+            future = self._submit(fn, args)
+        except BrokenProcessPool as exc:
+            self._release()
+            with self._lock:
+                self._stale = True
+            raise ExecutorUnavailableError(f"Worker process died: {exc}")
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the task is done in its worker (or cancelled
+        # before it started), not when the caller stops waiting for it.
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except futures.TimeoutError:
+            future.cancel()
+            raise ExecutorUnavailableError(f"Task did not finish within {self.timeout_seconds} s")
+        except BrokenProcessPool as exc:
+            self.invalidate()
+            raise ExecutorUnavailableError(f"Worker process died: {exc}")
+
+    def run(self, fn: Callable, *args):
+        """Run ``fn(*args)`` on the backend and return its result.
+
+        ``fn`` and its arguments must be picklable for the process backend:
+        a module-level function and plain data.
+        """
+        if self._admitted is not None and not self._admitted.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise ExecutorSaturatedError(f"Executor queue is full ({self.workers + self.queue_size} tasks admitted)")
+        submitted = time.time()
+        with self._stats_lock:
+            self.in_flight += 1
+        execute = self._execute_inline if self.backend == "inline" else self._execute_process
+        try:
+            started, elapsed, result, collected = execute(fn, args)
+        except Exception:
+            with self._stats_lock:
+                self.failed += 1
+            raise
+        wait = max(started - submitted, 0.0)
+        with self._stats_lock:
+            self.completed += 1
+            self.wait.add(wait)
+            self.execution.add(elapsed)
+        # Spans recorded inside the task count towards the calling request.
+        replay(collected + [("stage", "executor_wait", wait)])
+        return result
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            in_flight = self.in_flight
+            wait, execution = self.wait.summary(), self.execution.summary()
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_size": self.queue_size if self.bounded else None,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.workers, 0) if self.bounded else 0,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "pools_started": self.pools_started,
+            "updates": self.updates,
+            "wait": wait,
+            "execution": execution,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._shutdown_pools(cancel_futures=True)
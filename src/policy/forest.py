@@ -0,0 +1,267 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+WORD_TYPES = {8: np.uint8, 16: np.uint16, 32: np.uint32, 64: np.uint64}
+# Rows x trees x words scored per step; bounds the size of the working arrays.
+CHUNK_CELLS = 1 << 16
+MAX_TABLE_BYTES = 256 << 20
+
+
+def _positive_column(classes) -> int | None:
+    """Column of the positive class in predict_proba output, if the label has one."""
+    matches = np.flatnonzero(np.asarray(classes) == 1)
+    return int(matches[0]) if len(matches) else None
+
+
+def _label_classifiers(classifier) -> list[tuple[list, list]]:
+    """(trees, classes) per label for either forest topology."""
+    if isinstance(classifier, MultiOutputClassifier):
+        return [(forest.estimators_, [forest.classes_]) for forest in classifier.estimators_]
+    if isinstance(classifier, RandomForestClassifier):
+        classes = classifier.classes_ if classifier.n_outputs_ > 1 else [classifier.classes_]
+        return [(classifier.estimators_, list(classes))]
+    raise TypeError(f"Unsupported classifier: {type(classifier).__name__}")
+
+
+def positive_scores(model: Pipeline, df: pd.DataFrame) -> np.ndarray:
+    """Positive-class probability per (row, label) through sklearn itself.
+
+    Works for per-label and native multi-output forests; a label trained on
+    a single class scores 1.0 if that class is positive and 0.0 otherwise.
+    """
+    proba = model.predict_proba(df)
+    if not isinstance(proba, list):
+        proba = [proba]
+    classes = [c for _, label_classes in _label_classifiers(model[-1]) for c in label_classes]
+    scores = np.zeros((len(df), len(proba)))
+    for label, (label_proba, label_classes) in enumerate(zip(proba, classes)):
+        column = _positive_column(label_classes)
+        if column is not None:
+            scores[:, label] = label_proba[:, column]
+    return scores
+
+
+def _leaf_layout(tree) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Leaf numbering from left to right, as used by ``CompiledForest``.
+
+    Returns the leaf node ids in that order, plus the first leaf number and
+    leaf count under every node. sklearn numbers children after their
+    parent, so one backward and one forward pass over the nodes suffice.
+    """
+    left, right = tree.children_left, tree.children_right
+    count = np.ones(tree.node_count, dtype=np.int64)
+    for node in range(tree.node_count - 1, -1, -1):
+        if left[node] >= 0:
+            count[node] = count[left[node]] + count[right[node]]
+    first = np.zeros(tree.node_count, dtype=np.int64)
+    for node in range(tree.node_count):
+        if left[node] >= 0:
+            first[left[node]] = first[node]
+            first[right[node]] = first[node] + count[left[node]]
+    leaves = np.flatnonzero(left < 0)
+    return leaves[np.argsort(first[leaves])], first, count
+
+
+class CompiledForest:
+    """A fitted preprocess + random forest pipeline flattened into NumPy arrays.
+
+    All trees of all labels are evaluated together with bitvectors (the
+    QuickScorer scheme). The leaves of each tree are numbered left to right,
+    and a split that sends a row right rules out the leaves of its left
+    subtree. The masks of every split are precombined per input value: one
+    table per categorical feature (indexed by category code, through the
+    one-hot encoder's category -> column map) and one per numeric column
+    (indexed by how many split thresholds the value exceeds). Scoring a
+    batch is one table lookup and AND per feature, a lowest-set-bit lookup
+    for the exit leaf of each tree, and an average of leaf values per label.
+    """
+
+    def __init__(
+        self,
+        categorical: list[tuple[str, dict, np.ndarray]],
+        numeric: list[tuple[str, np.ndarray, np.ndarray]],
+        leaf_offsets: np.ndarray,
+        leaf_values: np.ndarray,
+        label_trees: np.ndarray | None,
+        n_labels: int,
+    ):
+        self.categorical = categorical
+        self.numeric = numeric
+        self.leaf_offsets = leaf_offsets
+        self.leaf_values = leaf_values
+        self.label_trees = label_trees
+        self.n_labels = n_labels
+        tables = [table for *_, table in categorical + numeric]
+        self.dtype = tables[0].dtype if tables else np.dtype(np.uint8)
+        self.words = tables[0].shape[2] if tables else 1
+        if label_trees is not None:
+            self.label_starts = np.concatenate([[0], np.cumsum(label_trees)[:-1]])
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.leaf_offsets)
+
+    @property
+    def nbytes(self) -> int:
+        tables = [table for *_, table in self.categorical + self.numeric]
+        return sum(table.nbytes for table in tables) + self.leaf_values.nbytes
+
+    @classmethod
+    def from_pipeline(cls, model: Pipeline, max_table_bytes: int = MAX_TABLE_BYTES) -> "CompiledForest":
+        preprocess, classifier = model[0], model[-1]
+        if not isinstance(preprocess, ColumnTransformer):
+            raise TypeError(f"Unsupported preprocessing step: {type(preprocess).__name__}")
+
+        # (feature, categories, first one-hot column) or (feature, None, column)
+        encoded, n_columns = [], 0
+        for name, transformer, columns in preprocess.transformers_:
+            if transformer == "drop":
+                continue
+            if isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None:
+                    raise ValueError("OneHotEncoder with drop= is not supported")
+                for column, categories in zip(columns, transformer.categories_):
+                    encoded.append((column, list(categories), n_columns))
+                    n_columns += len(categories)
+            elif transformer == "passthrough" or (
+                isinstance(transformer, FunctionTransformer) and transformer.func is None
+            ):
+                for column in columns:
+                    encoded.append((column, None, n_columns))
+                    n_columns += 1
+            else:
+                raise TypeError(f"Unsupported transformer {name}: {type(transformer).__name__}")
+
+        label_classifiers = _label_classifiers(classifier)
+        n_labels = sum(len(classes) for _, classes in label_classifiers)
+        multi_output = len(label_classifiers) == 1 and n_labels > 1
+        trees = [(tree.tree_, classes) for label_trees, classes in label_classifiers for tree in label_trees]
+        # Leaf bitvectors: the narrowest unsigned type that fits, else 64-bit words.
+        max_leaves = int(max(t.n_leaves for t, _ in trees))
+        word_bits = min([bits for bits in WORD_TYPES if bits >= max_leaves], default=64)
+        words = (max_leaves + word_bits - 1) // word_bits
+        word_type, word_mask = WORD_TYPES[word_bits], (1 << word_bits) - 1
+
+        leaf_offsets = np.zeros(len(trees), dtype=np.intp)
+        leaf_values, split_tree, split_column, split_threshold, split_mask = [], [], [], [], []
+        ones = (1 << (word_bits * words)) - 1
+        n_leaves = 0
+        for index, (t, classes) in enumerate(trees):
+            leaves, first, count = _leaf_layout(t)
+            leaf_offsets[index] = n_leaves
+            n_leaves += len(leaves)
+            value = t.value[leaves] / t.value[leaves].sum(axis=2, keepdims=True)
+            positive = np.zeros((len(leaves), len(classes)))
+            for output, output_classes in enumerate(classes):
+                column = _positive_column(output_classes)
+                if column is not None:
+                    positive[:, output] = value[:, output, column]
+            leaf_values.append(positive)
+
+            for node in np.flatnonzero(t.children_left >= 0):
+                left = t.children_left[node]
+                lo, hi = int(first[left]), int(first[left] + count[left])
+                mask = ones ^ (((1 << hi) - 1) ^ ((1 << lo) - 1))
+                split_tree.append(index)
+                split_column.append(t.feature[node])
+                split_threshold.append(t.threshold[node])
+                split_mask.append([(mask >> (word_bits * w)) & word_mask for w in range(words)])
+
+        split_tree = np.array(split_tree, dtype=np.intp)
+        split_column = np.array(split_column, dtype=np.intp)
+        split_threshold = np.array(split_threshold, dtype=np.float64)
+        split_mask = np.array(split_mask, dtype=word_type).reshape(-1, words)
+
+        def column_table(column: int) -> tuple[np.ndarray, np.ndarray]:
+            """Thresholds of one input column, and the combined mask per threshold count."""
+            on_column = split_column == column
+            thresholds = np.unique(split_threshold[on_column])
+            table_bytes = (len(thresholds) + 1) * len(trees) * words * word_bits // 8
+            if table_bytes > max_table_bytes:
+                raise ValueError(f"Column {column} needs a {table_bytes}-byte table (limit {max_table_bytes})")
+            table = np.full((len(thresholds) + 1, len(trees), words), word_mask, dtype=word_type)
+            for j, threshold in enumerate(thresholds, start=1):
+                table[j] = table[j - 1]
+                splits = on_column & (split_threshold == threshold)
+                np.bitwise_and.at(table[j], split_tree[splits], split_mask[splits])
+            return thresholds, table
+
+        def masks_at(thresholds: np.ndarray, table: np.ndarray, value: float) -> np.ndarray:
+            return table[np.searchsorted(thresholds, np.float64(np.float32(value)), side="left")]
+
+        categorical, numeric = [], []
+        for feature, categories, offset in encoded:
+            if categories is None:
+                numeric.append((feature, *column_table(offset)))
+                continue
+            # Row c: category c is 1 and the other columns 0; the last row is
+            # an unknown category (all columns 0, like handle_unknown="ignore").
+            columns = [column_table(offset + i) for i in range(len(categories))]
+            table = np.full((len(categories) + 1, len(trees), words), word_mask, dtype=word_type)
+            for code in range(len(categories) + 1):
+                for i, (thresholds, column_masks) in enumerate(columns):
+                    table[code] &= masks_at(thresholds, column_masks, 1.0 if i == code else 0.0)
+            categorical.append((feature, {c: i for i, c in enumerate(categories)}, table))
+
+        label_trees = None
+        if not multi_output:
+            label_trees = np.array([len(trees) for trees, _ in label_classifiers])
+
+        return cls(
+            categorical=categorical,
+            numeric=numeric,
+            leaf_offsets=leaf_offsets,
+            leaf_values=np.concatenate(leaf_values),
+            label_trees=label_trees,
+            n_labels=n_labels,
+        )
+
+    def encode(self, df: pd.DataFrame) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """Category codes per categorical feature and float32 values per numeric one."""
+        codes = []
+        for feature, categories, _ in self.categorical:
+            feature_codes = df[feature].map(categories).to_numpy(dtype=float)
+            codes.append(np.where(np.isnan(feature_codes), len(categories), feature_codes).astype(np.intp))
+        values = [df[feature].to_numpy(dtype=np.float32) for feature, _, _ in self.numeric]
+        return codes, values
+
+    def exit_leaves(self, codes: list[np.ndarray], values: list[np.ndarray]) -> np.ndarray:
+        """Leaf number reached in every tree, shape (rows, trees)."""
+        lookups = [table[feature_codes] for (_, _, table), feature_codes in zip(self.categorical, codes)]
+        for (_, thresholds, table), feature_values in zip(self.numeric, values):
+            # Number of thresholds below the value = splits that send the row right.
+            lookups.append(table[np.searchsorted(thresholds, feature_values.astype(np.float64), side="left")])
+        reachable = lookups[0]
+        for lookup in lookups[1:]:
+            np.bitwise_and(reachable, lookup, out=reachable)
+
+        if self.words == 1:
+            word, bits = 0, reachable[..., 0]
+        else:
+            word = (reachable != 0).argmax(axis=2)
+            bits = np.take_along_axis(reachable, word[..., None], axis=2)[..., 0]
+        one = self.dtype.type(1)
+        lowest = bits & (~bits + one)
+        return word * (self.dtype.itemsize * 8) + np.bitwise_count(lowest - one).astype(np.intp)
+
+    def predict_scores(self, df: pd.DataFrame) -> np.ndarray:
+        """Positive-class probability per (row, label), like ``positive_scores``."""
+        codes, values = self.encode(df)
+        scores = np.empty((len(df), self.n_labels))
+        chunk = max(1, CHUNK_CELLS // (self.n_trees * self.words))
+        for start in range(0, len(df), chunk):
+            rows = slice(start, start + chunk)
+            leaves = self.exit_leaves([c[rows] for c in codes], [v[rows] for v in values])
+            if self.label_trees is None:
+                # One forest predicting every label: average the leaf vectors.
+                scores[rows] = self.leaf_values[self.leaf_offsets + leaves].mean(axis=1)
+            else:
+                # One forest per label, trees stored label by label.
+                leaf_values = self.leaf_values[self.leaf_offsets + leaves, 0]
+                scores[rows] = np.add.reduceat(leaf_values, self.label_starts, axis=1) / self.label_trees
+        return scores
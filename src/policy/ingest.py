@@ -0,0 +1,101 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from policy.anomaly import MAX_RISK_SCORE, AnomalyScorer
+
+
+def _loaded_id(value) -> int | None:
+    return None if value is None or pd.isna(value) else int(value)
+
+
+def _loaded(value, loaded_through: int) -> bool:
+    event_id = _loaded_id(value)
+    return event_id is not None and event_id <= loaded_through
+
+
+def _histogram(events: list[dict]) -> np.ndarray:
+    return np.bincount([event["risk_score"] for event in events], minlength=MAX_RISK_SCORE + 1).astype(np.int64)
+
+
+class RecentEventBuffer:
+    """Ring buffer of the most recent audit events ingested after startup.
+
+    Events are scored on arrival with the same rules as the loaded audit
+    log. The histogram of risk scores covers the buffered events only: it
+    is updated incrementally as events arrive and are evicted, so anomaly
+    counts stay bounded by ``maxlen`` instead of growing with every event
+    ever ingested. ``ingested`` is the running total.
+
+    An event is counted once even when the audit source also delivers it:
+    events whose ``id`` the loaded log already holds are not buffered, and
+    ``discard`` drops buffered events once the refresh loads their rows.
+    """
+
+    def __init__(self, role_by_user: pd.Series, maxlen: int = 50_000, scorer: AnomalyScorer | None = None):
+        self.role_by_user = role_by_user
+        self.scorer = scorer or AnomalyScorer()
+        self.events: deque[dict] = deque(maxlen=maxlen)
+        self.histogram = np.zeros(MAX_RISK_SCORE + 1, dtype=np.int64)
+        self.ingested = 0
+        self._lock = threading.Lock()
+
+    def ingest(self, events: list[dict], loaded_through: int = 0) -> np.ndarray:
+        """Score and buffer ``events``; returns their risk scores.
+
+        Events with an ``id`` at or below ``loaded_through`` (the newest id
+        read from the audit source) are scored but not buffered.
+        """
+        if not events:
+            return np.empty(0, dtype=np.int8)
+        frame = pd.DataFrame(events)
+        roles = frame["user_id"].map(self.role_by_user)
+        scored = self.scorer.score(roles, frame["resource_type"], frame["timestamp"], frame["allowed"])
+
+        hours = scored["hour"].tolist()
+        unexpected = scored["unexpected_resource"].tolist()
+        risk_scores = scored["risk_score"].tolist()
+        for event, role, hour, is_unexpected, risk_score in zip(events, roles.tolist(), hours, unexpected, risk_scores):
+            event["role"] = None if pd.isna(role) else role
+            event["hour"] = None if pd.isna(hour) else int(hour)
+            event["unexpected_resource"] = is_unexpected
+            event["risk_score"] = risk_score
+
+        new = [event for event in events if not _loaded(event.get("id"), loaded_through)]
+        with self._lock:
+            self.ingested += len(new)
+            maxlen = self.events.maxlen
+            new = new[-maxlen:]
+            evicted = [self.events.popleft() for _ in range(max(len(self.events) + len(new) - maxlen, 0))]
+            self.events.extend(new)
+            self.histogram += _histogram(new) - _histogram(evicted)
+        return scored["risk_score"]
+
+    def discard(self, ids) -> int:
+        """Drop buffered events with these ids, now in the loaded log; returns how many were dropped."""
+        ids = {int(value) for value in ids if pd.notna(value)}
+        if not ids:
+            return 0
+        with self._lock:
+            dropped = [event for event in self.events if _loaded_id(event.get("id")) in ids]
+            if not dropped:
+                return 0
+            kept = [event for event in self.events if _loaded_id(event.get("id")) not in ids]
+            self.events = deque(kept, maxlen=self.events.maxlen)
+            self.histogram -= _histogram(dropped)
+        return len(dropped)
+
+    def count(self, threshold: int) -> int:
+        return int(self.histogram[max(threshold, 0):].sum())
+
+    def samples(self, threshold: int, limit: int = 20) -> list[dict]:
+        found = []
+        with self._lock:
+            for event in self.events:
+                if event["risk_score"] >= threshold:
+                    found.append(event)
+                    if len(found) >= limit:
+                        break
+        return found
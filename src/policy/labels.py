@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def label_matrix(
+    user_ids: pd.Series,
+    assignments: pd.DataFrame,
+    user_column: str = "user_id",
+    label_column: str = "label",
+) -> tuple[sp.csr_matrix, list[str]]:
+    """Binary (user x label) matrix in CSR form, built from integer codes.
+
+    Row i belongs to ``user_ids[i]`` (users without assignments get an empty
+    row); columns are the sorted distinct labels, the same order
+    ``pivot_table`` produced. Assignments of unknown users are dropped and
+    duplicates count once. Memory is proportional to the number of
+    assignments, not users x labels.
+    """
+    labels = pd.Index(np.sort(assignments[label_column].dropna().unique()))
+    unique_ids = pd.Index(pd.unique(pd.Series(user_ids).dropna()))
+    user_codes = unique_ids.get_indexer(assignments[user_column])
+    label_codes = labels.get_indexer(assignments[label_column])
+    keep = (user_codes >= 0) & (label_codes >= 0)
+    matrix = sp.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float32), (user_codes[keep].astype(np.int32), label_codes[keep].astype(np.int32))),
+        shape=(len(unique_ids), len(labels)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    rows = unique_ids.get_indexer(user_ids)
+    if np.any(rows < 0):
+        # Missing user ids: code -1 selects an appended empty row.
+        matrix = sp.vstack([matrix, sp.csr_matrix((1, len(labels)), dtype=matrix.dtype)], format="csr")
+    if len(rows) != len(unique_ids) or np.any(rows != np.arange(len(rows))):
+        matrix = matrix[rows]
+    return matrix, list(labels)
+
+
+def permission_ids(catalog: pd.DataFrame, id_column: str = "id") -> dict:
+    """Permission id by ``resource_type_action`` label; the first id wins for duplicate labels."""
+    labels = catalog["resource_type"].astype(str) + "_" + catalog["action"].astype(str)
+    ids = pd.Series(catalog[id_column].to_numpy(), index=labels)
+    ids = ids[~ids.index.duplicated()].dropna()
+    return {label: int(value) for label, value in ids.items()}
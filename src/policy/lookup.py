@@ -0,0 +1,111 @@
+import itertools
+import json
+import math
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from policy.forest import positive_scores
+
+# Numeric passthrough features that are enumerated with these values.
+DEFAULT_NUMERIC_VALUES = {"has_license_binary": [0, 1]}
+
+
+def _model_categories(model) -> dict:
+    """Categories learned by the pipeline's OneHotEncoder, per input column."""
+    preprocess = model.named_steps["preprocess"]
+    categories = {}
+    for name, transformer, columns in preprocess.transformers_:
+        if name == "cat":
+            for column, values in zip(columns, transformer.categories_):
+                categories[column] = [v.item() if hasattr(v, "item") else v for v in values]
+    return categories
+
+
+class LookupTable:
+    """Exhaustive profile -> score table for a fitted recommendation pipeline.
+
+    Every combination of known feature values is mapped to a row of ``proba``
+    through a mixed-radix integer code, so a lookup is a handful of dict hits
+    and one array index. Profiles holding any value the model has never seen
+    are not in the table and must be scored by the live model.
+    """
+
+    def __init__(self, features: Sequence[str], categories: Sequence[Sequence], proba: np.ndarray, version: str):
+        self.features = list(features)
+        self.categories = [list(values) for values in categories]
+        self.proba = proba
+        self.version = version
+        self._codes = [{value: code for code, value in enumerate(values)} for values in self.categories]
+        strides = []
+        stride = 1
+        for values in reversed(self.categories):
+            strides.append(stride)
+            stride *= len(values)
+        self._strides = list(reversed(strides))
+
+    def __len__(self) -> int:
+        return len(self.proba)
+
+    @classmethod
+    def build(
+        cls,
+        model,
+        features: Sequence[str],
+        version: str,
+        numeric_values: dict | None = None,
+        predict: Callable[[pd.DataFrame], np.ndarray] | None = None,
+        max_rows: int = 1_000_000,
+    ) -> "LookupTable":
+        numeric_values = DEFAULT_NUMERIC_VALUES if numeric_values is None else numeric_values
+        known = _model_categories(model)
+        categories = []
+        for feature in features:
+            if feature in known:
+                categories.append(known[feature])
+            elif feature in numeric_values:
+                categories.append(list(numeric_values[feature]))
+            else:
+                raise ValueError(f"No known values for feature {feature!r}")
+
+        n_rows = math.prod(len(values) for values in categories)
+        if n_rows > max_rows:
+            raise ValueError(f"Lookup table would have {n_rows} rows (max_rows={max_rows})")
+
+        # itertools.product enumerates in the same row-major order as the codes.
+        grid = pd.DataFrame(list(itertools.product(*categories)), columns=list(features))
+        if predict is None:
+            proba = positive_scores(model, grid)
+        else:
+            proba = predict(grid)
+        return cls(features, categories, np.ascontiguousarray(proba, dtype=np.float64), version)
+
+    def index_of(self, key: Sequence) -> int | None:
+        """Row of a normalized profile tuple (ordered like ``features``)."""
+        index = 0
+        for value, codes, stride in zip(key, self._codes, self._strides):
+            code = codes.get(value)
+            if code is None:
+                return None
+            index += code * stride
+        return index
+
+    def lookup(self, key: Sequence) -> np.ndarray | None:
+        index = self.index_of(key)
+        if index is None:
+            return None
+        return self.proba[index]
+
+    def save(self, path: Path) -> None:
+        meta = {"features": self.features, "categories": self.categories, "version": self.version}
+        with open(path, "wb") as fh:
+            np.savez(fh, proba=self.proba, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: Path) -> "LookupTable":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            proba = data["proba"]
+        return cls(meta["features"], meta["categories"], proba, meta["version"])
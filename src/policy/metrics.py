@@ -0,0 +1,270 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds, in milliseconds, for latency histograms.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# The same bounds in seconds, the unit Prometheus histograms use.
+LATENCY_BUCKETS_SECONDS = tuple(bound / 1000 for bound in LATENCY_BUCKETS_MS)
+
+
+def size_buckets(largest: int) -> tuple[int, ...]:
+    """Powers of two up to ``largest`` (inclusive), for batch-size histograms."""
+    buckets, size = [], 1
+    while size < largest:
+        buckets.append(size)
+        size *= 2
+    return tuple(buckets) + (largest,)
+
+
+class Histogram:
+    """Counts of observations per bucket with fixed upper bounds.
+
+    Buckets are reported cumulatively (each count includes every smaller
+    bucket), with a final ``+Inf`` bucket, as Prometheus expects.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total = list(self.counts), self.total
+        buckets, cumulative = {}, 0
+        for bound, count in zip(self.bounds + ("+Inf",), counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": cumulative, "sum": round(total, 3), "buckets": buckets}
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class HistogramFamily:
+    """A ``Histogram`` per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS_SECONDS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.children: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(key, Histogram(self.buckets))
+        child.observe(value)
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, child in sorted(self.children.items()):
+            lines.extend(render_histogram(self.name, child, self.labelnames, key))
+        return lines
+
+
+def render_histogram(name: str, histogram: Histogram, labelnames=(), values=()) -> list[str]:
+    snapshot = histogram.snapshot()
+    lines = []
+    for bound, count in snapshot["buckets"].items():
+        le = 'le="' + bound + '"'
+        lines.append(f"{name}_bucket{_labels(labelnames, values, le)} {count}")
+    lines.append(f"{name}_sum{_labels(labelnames, values)} {_number(histogram.total)}")
+    lines.append(f"{name}_count{_labels(labelnames, values)} {snapshot['count']}")
+    return lines
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered in the Prometheus text format.
+
+    Values owned by other components (queue depths, cache counters) are
+    read at scrape time through collectors: callables returning
+    ``(name, kind, help, lines)`` tuples.
+    """
+
+    def __init__(self):
+        self.metrics: list = []
+        self.collectors: list = []
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS_SECONDS) -> HistogramFamily:
+        metric = HistogramFamily(name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect) -> None:
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.help, m.render()) for m in self.metrics]
+        for collect in self.collectors:
+            families.extend(collect())
+        lines = []
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def gauge(name: str, help: str, value: float, **labels) -> tuple:
+    """A single-sample gauge family for a collector."""
+    return name, "gauge", help, [f"{name}{_labels(labels, labels.values())} {_number(value)}"]
+
+
+REGISTRY = MetricsRegistry()
+REQUESTS = REGISTRY.counter("policy_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "status"))
+ERRORS = REGISTRY.counter("policy_request_errors_total", "Requests that failed with a 5xx status.", ("endpoint",))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "policy_request_duration_seconds", "Time to the response headers, by endpoint.", ("endpoint",)
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "policy_stage_duration_seconds", "Time spent in each stage of an endpoint.", ("endpoint", "stage")
+)
+ROWS_SCANNED = REGISTRY.counter("policy_rows_scanned_total", "Data rows examined by endpoint.", ("endpoint",))
+PROFILES_SCORED = REGISTRY.counter("policy_profiles_scored_total", "Profiles sent to the model.", ("endpoint",))
+RECOMMENDATIONS = REGISTRY.counter(
+    "policy_recommendations_total", "Recommendations (or unused permissions) returned.", ("endpoint",)
+)
+
+_endpoint: ContextVar[str | None] = ContextVar("metrics_endpoint", default=None)
+_collected: ContextVar[list | None] = ContextVar("metrics_collected", default=None)
+_COUNTERS = {"rows_scanned": ROWS_SCANNED, "profiles_scored": PROFILES_SCORED, "recommendations": RECOMMENDATIONS}
+
+
+def _record(kind: str, key: str, value: float) -> None:
+    collected = _collected.get()
+    if collected is not None:
+        collected.append((kind, key, value))
+        return
+    endpoint = _endpoint.get()
+    if endpoint is None:
+        return
+    if kind == "stage":
+        STAGE_SECONDS.observe(value, endpoint=endpoint, stage=key)
+    else:
+        _COUNTERS[key].inc(value, endpoint=endpoint)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of the current request into ``policy_stage_duration_seconds``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record("stage", stage, time.perf_counter() - start)
+
+
+def count(counter: str, amount: float) -> None:
+    """Add to a per-endpoint counter: rows_scanned, profiles_scored or recommendations."""
+    _record("count", counter, amount)
+
+
+@contextmanager
+def collect():
+    """Hold the spans and counts recorded inside (in an executor worker) for ``replay``."""
+    collected = []
+    token = _collected.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected.reset(token)
+
+
+def replay(collected: list) -> None:
+    """Record what ``collect`` held against the current request."""
+    for kind, key, value in collected:
+        _record(kind, key, value)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them per endpoint.
+
+    The endpoint label is the request path when it is one of ``paths`` (by
+    default, the application's route paths) and ``other`` otherwise, so
+    unknown URLs cannot grow the label set. It is also made the current
+    endpoint for ``span`` and ``count``.
+    """
+
+    def __init__(self, app, paths=None):
+        self.app = app
+        self.paths = set(paths) if paths is not None else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.paths is None:
+            # Routes are registered after the middleware, so read them on first use.
+            self.paths = {getattr(route, "path", None) for route in scope["app"].routes}
+        endpoint = scope["path"] if scope["path"] in self.paths else "other"
+        token = _endpoint.set(endpoint)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS.inc(endpoint=endpoint, status=str(status))
+            if status >= 500:
+                ERRORS.inc(endpoint=endpoint)
+            _endpoint.reset(token)
@@ -0,0 +1,188 @@
+import io
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from policy.db import AUDIT_LOG_COLUMNS, audit_log_table, read_audit_logs
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseAuditSource:
+    """Audit-log rows with an id above a watermark, read from the database.
+
+    ``audit_logs.id`` is the primary key, so both queries are index range
+    scans over the new rows only.
+    """
+
+    def __init__(self, engine: Engine, chunk_size: int = 50_000):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.table = audit_log_table(engine)
+
+    def last_id(self) -> int:
+        with self.engine.connect() as conn:
+            return int(conn.execute(select(func.max(self.table.c.id))).scalar() or 0)
+
+    def fetch(self, after_id: int, limit: int) -> pd.DataFrame:
+        return read_audit_logs(
+            self.engine, chunk_size=min(self.chunk_size, limit), after_id=after_id, limit=limit, table=self.table
+        )
+
+    def pending(self, after_id: int) -> int:
+        query = select(func.count()).select_from(self.table).where(self.table.c.id > after_id)
+        with self.engine.connect() as conn:
+            return int(conn.execute(query).scalar_one())
+
+
+class CsvAuditTail:
+    """Rows appended to an audit-log CSV export, read from a byte offset.
+
+    Only complete lines are consumed, so a row that is still being written
+    is picked up by the next read. Rows at or below the watermark (written
+    between the initial load and taking the offset) are dropped. If the
+    file shrinks it was replaced, and is read again from the top.
+    """
+
+    def __init__(self, path: Path, offset: int):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.readline()
+        self.columns = header.decode().strip().split(",")
+        self.offset = max(offset, len(header))
+
+    def _read(self) -> bytes:
+        if self.path.stat().st_size < self.offset:
+            logger.warning("%s shrank; reading it again from the top", self.path)
+            self.offset = 0
+        with open(self.path, "rb") as f:
+            if self.offset == 0:
+                f.readline()
+                self.offset = f.tell()
+            f.seek(self.offset)
+            return f.read()
+
+    def fetch(self, after_id: int, limit: int) -> pd.DataFrame:
+        data = self._read()
+        end = 0
+        for _ in range(limit):
+            newline = data.find(b"\n", end)
+            if newline < 0:
+                break
+            end = newline + 1
+        usecols = [c for c in self.columns if c in AUDIT_LOG_COLUMNS]
+        if end == 0:
+            return pd.DataFrame(columns=usecols)
+        self.offset += end
+        rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self.columns, usecols=usecols)
+        rows["timestamp"] = pd.to_datetime(rows["timestamp"], errors="coerce")
+        return rows[rows["id"] > after_id].reset_index(drop=True)
+
+    def pending(self, after_id: int) -> int:
+        return self._read().count(b"\n")
+
+
+class AuditLogRefresher:
+    """Applies audit-log rows added after the initial load, in id order.
+
+    Each refresh fetches at most ``max_batch`` rows with an id above the
+    watermark, hands them to ``apply`` (which updates the derived indexes)
+    and only then advances the watermark, so a failed apply is retried.
+    ``ready`` gates refreshes until the indexes have been built.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[pd.DataFrame], None],
+        interval_seconds: float,
+        max_batch: int = 10_000,
+        ready: Callable[[], bool] = lambda: True,
+    ):
+        self.apply = apply
+        self.interval_seconds = interval_seconds
+        self.max_batch = max_batch
+        self.ready = ready
+        self.source = None
+        self.last_seen_id = 0
+        self.rows_behind = 0
+        self.caught_up_at: float | None = None
+        self.last_refresh_at: float | None = None
+        self.newest_event_at: pd.Timestamp | None = None
+        self.refreshes = 0
+        self.rows_applied = 0
+        self.last_error: str | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def reset(self, source, last_seen_id: int) -> None:
+        """Start following ``source`` from ``last_seen_id``, the newest id already loaded."""
+        with self._lock:
+            self.source = source
+            self.last_seen_id = int(last_seen_id)
+            self.rows_behind = 0
+            self.caught_up_at = time.time()
+
+    def refresh(self) -> int:
+        """Apply one batch of new rows; returns how many were applied."""
+        with self._lock:
+            if self.source is None or not self.ready():
+                return 0
+            try:
+                rows = self.source.fetch(self.last_seen_id, self.max_batch)
+                if len(rows):
+                    self.apply(rows)
+                    self.last_seen_id = max(self.last_seen_id, int(rows["id"].max()))
+                    newest = rows["timestamp"].max()
+                    if pd.notna(newest) and (self.newest_event_at is None or newest > self.newest_event_at):
+                        self.newest_event_at = newest
+                self.rows_behind = self.source.pending(self.last_seen_id)
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                raise
+            now = time.time()
+            self.last_refresh_at = now
+            if self.rows_behind == 0:
+                self.caught_up_at = now
+            self.refreshes += 1
+            self.rows_applied += len(rows)
+            self.last_error = None
+            return len(rows)
+
+    def status(self) -> dict:
+        now = time.time()
+        return {
+            "enabled": self._thread is not None,
+            "interval_seconds": self.interval_seconds,
+            "max_batch": self.max_batch,
+            "last_seen_id": self.last_seen_id,
+            "rows_behind": self.rows_behind,
+            "seconds_behind": None if self.caught_up_at is None else round(now - self.caught_up_at, 1),
+            "newest_event_at": None if self.newest_event_at is None else self.newest_event_at.isoformat(),
+            "last_refresh_at": self.last_refresh_at,
+            "refreshes": self.refreshes,
+            "rows_applied": self.rows_applied,
+            "last_error": self.last_error,
+        }
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                # Keep going without waiting while whole batches come back.
+                while self.refresh() >= self.max_batch and not self._stop.is_set():
+                    pass
+            except Exception as exc:
+                logger.warning("Refreshing audit logs failed: %s", exc)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="audit-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,258 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from policy.artifacts import load_model
+from policy.forest import CompiledForest, positive_scores
+
+logger = logging.getLogger(__name__)
+
+
+class ModelValidationError(ValueError):
+    """A model artifact failed the smoke test and was not activated."""
+
+
+class ReloadInProgressError(RuntimeError):
+    """Another reload is still loading or validating a model."""
+
+
+class ModelBundle:
+    """A model with everything that has to change together with it.
+
+    The label order comes from the model itself (``permission_labels_``, set
+    by train.py) when present; older artifacts fall back to the sorted
+    catalog labels, which is the order they were trained with. Permission
+    ids likewise come from ``permission_ids_`` first, then the catalog.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        version: str,
+        labels: list[str],
+        id_by_label: dict,
+        lookup_table=None,
+        path: Path | None = None,
+        compiled: CompiledForest | None = None,
+    ):
+        self.model = model
+        self.version = version
+        self.labels = labels
+        self.id_by_label = id_by_label
+        self.lookup_table = lookup_table
+        self.path = path
+        self.compiled = compiled
+        self.loaded_at = time.time()
+
+    @property
+    def engine(self) -> str:
+        return "compiled" if self.compiled is not None else "sklearn"
+
+    def predict_scores(self, df: pd.DataFrame) -> np.ndarray:
+        """Positive-class probability for every (profile row, permission label)."""
+        if self.compiled is not None:
+            return self.compiled.predict_scores(df)
+        return positive_scores(self.model, df)
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "path": str(self.path) if self.path else None,
+            "labels": len(self.labels),
+            "engine": self.engine,
+            "lookup_table": self.lookup_table is not None,
+            "loaded_at": datetime.fromtimestamp(self.loaded_at, timezone.utc).isoformat(),
+        }
+
+
+def model_labels(model: Any, catalog_labels: list[str]) -> list[str]:
+    labels = getattr(model, "permission_labels_", None)
+    return list(labels) if labels is not None else sorted(catalog_labels)
+
+
+def model_permission_ids(model: Any, labels: list[str], catalog: dict) -> dict:
+    stored = getattr(model, "permission_ids_", None) or {}
+    return {label: stored.get(label, catalog.get(label)) for label in labels}
+
+
+def validate_model(model: Any, labels: list[str], probe: pd.DataFrame) -> np.ndarray:
+    """Smoke test: one probability per label; returns the probe's scores."""
+    try:
+        proba = model.predict_proba(probe)
+        scores = positive_scores(model, probe)
+    except Exception as exc:
+        raise ModelValidationError(f"predict_proba failed on the probe profile: {exc}") from exc
+    n_outputs = len(proba) if isinstance(proba, list) else 1
+    if n_outputs != len(labels):
+        raise ModelValidationError(f"model predicts {n_outputs} labels but {len(labels)} are known")
+    if scores.shape != (len(probe), len(labels)) or not np.all((scores >= 0) & (scores <= 1)):
+        raise ModelValidationError("predict_proba returned invalid probabilities")
+    return scores
+
+
+def compile_model(model: Any, probe: pd.DataFrame, expected: np.ndarray) -> CompiledForest | None:
+    """Compiled engine for ``model``, or None if its structure is not supported."""
+    try:
+        compiled = CompiledForest.from_pipeline(model)
+    except (TypeError, ValueError) as exc:
+        logger.warning("Compiled inference not available for this model; using sklearn: %s", exc)
+        return None
+    if not np.allclose(compiled.predict_scores(probe), expected, rtol=0, atol=1e-9):
+        raise ModelValidationError("compiled engine disagrees with predict_proba on the probe profile")
+    return compiled
+
+
+def load_bundle(
+    path: Path,
+    catalog: dict,
+    probe: pd.DataFrame,
+    lookup_table: Callable[[ModelBundle], Any] | None = None,
+    engine: str = "sklearn",
+) -> ModelBundle:
+    """Load and validate the model at ``path``; ``catalog`` maps label -> permission id.
+
+    ``catalog`` is only a fallback for artifacts without ``permission_ids_``
+    (or ``permission_labels_``) and may be empty.
+    """
+    model, version = load_model(path)
+    labels = model_labels(model, list(catalog))
+    expected = validate_model(model, labels, probe)
+    bundle = ModelBundle(
+        model,
+        version,
+        labels,
+        model_permission_ids(model, labels, catalog),
+        path=Path(path),
+        compiled=compile_model(model, probe, expected) if engine == "compiled" else None,
+    )
+    if lookup_table is not None:
+        bundle.lookup_table = lookup_table(bundle)
+    return bundle
+
+
+class ModelRegistry:
+    """The active model bundle plus the previous one, kept for rollback.
+
+    Requests read ``current`` once and use that bundle throughout, so a swap
+    never mixes the labels of one model with the scores of another.
+    """
+
+    def __init__(self):
+        self.current: ModelBundle | None = None
+        self.previous: ModelBundle | None = None
+        self.swaps = 0
+        self.failures = 0
+        self.last_error: str | None = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def activate(self, bundle: ModelBundle) -> None:
+        with self._lock:
+            if self.current is not None:
+                self.previous = self.current
+                self.swaps += 1
+            self.current = bundle
+        logger.info("Activated model version %s", bundle.version)
+
+    def rollback(self) -> ModelBundle:
+        with self._lock:
+            if self.previous is None:
+                raise LookupError("No previous model version is loaded")
+            self.current, self.previous = self.previous, self.current
+            self.swaps += 1
+            bundle = self.current
+        logger.info("Rolled back to model version %s", bundle.version)
+        return bundle
+
+    def reload(self, load: Callable[[], ModelBundle]) -> ModelBundle:
+        """Load a new bundle off to the side and swap it in if it validates.
+
+        Raises ``ReloadInProgressError`` if a reload is already running; load
+        and validation errors leave the active model untouched.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("A model reload is already in progress")
+        try:
+            bundle = load()
+        except Exception as exc:
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.error("Model reload failed; keeping version %s: %s", self.version, self.last_error)
+            raise
+        finally:
+            self._reload_lock.release()
+        self.last_error = None
+        if self.current is not None and bundle.version == self.current.version:
+            return self.current
+        self.activate(bundle)
+        return bundle
+
+    @property
+    def version(self) -> str | None:
+        return self.current.version if self.current else None
+
+    def status(self) -> dict:
+        return {
+            "current": self.current.describe() if self.current else None,
+            "previous": self.previous.describe() if self.previous else None,
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class ModelFileWatcher:
+    """Polls a model file and calls ``on_change`` once a new version has settled.
+
+    A change is acted on only after the file's size and mtime are the same
+    on two consecutive polls, so a partially written artifact is not loaded.
+    """
+
+    def __init__(self, path: Path, interval_seconds: float, on_change: Callable[[], None]):
+        self.path = Path(path)
+        self.interval_seconds = interval_seconds
+        self.on_change = on_change
+        self._seen = self._stat()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def poll(self, pending: tuple[int, int] | None = None) -> tuple[int, int] | None:
+        """One polling step; returns the stat still waiting to settle, if any."""
+        stat = self._stat()
+        if stat is None or stat == self._seen:
+            return None
+        if stat != pending:
+            return stat
+        try:
+            self.on_change()
+        except ReloadInProgressError:
+            return stat
+        except Exception as exc:
+            logger.warning("Reloading %s failed: %s", self.path, exc)
+        self._seen = stat
+        return None
+
+    def run(self) -> None:
+        pending = None
+        while not self._stop.wait(self.interval_seconds):
+            pending = self.poll(pending)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
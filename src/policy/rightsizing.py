@@ -0,0 +1,228 @@
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import MetaData, Table, and_, exists, func, literal, or_, select, true, union_all
+from sqlalchemy.engine import Engine
+
+from policy import metrics
+from policy.usage import IncrementalUsageCube
+
+CHUNK_SIZE = 10_000
+FILTER_FIELDS = ("role", "department", "branch", "label")
+# Columns of the audit_logs index the pushed-down query relies on.
+AUDIT_USAGE_INDEX = "user_id, resource_type, action, timestamp"
+
+
+def rightsizing_cutoff(lookback_days: int, now: pd.Timestamp | None = None) -> pd.Timestamp:
+    """Start of the lookback window: midnight of the day ``lookback_days`` ago.
+
+    Both execution paths count usage in whole days from this instant.
+    """
+    return ((now or pd.Timestamp.now()) - pd.Timedelta(days=lookback_days)).normalize()
+
+
+def format_last_used(value) -> str | None:
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).isoformat()
+
+
+class InMemoryRightsizing:
+    """Assigned permissions and a usage cube built from the loaded audit logs.
+
+    Assigned (user_id, label) pairs are kept sorted, so a cursor is a binary
+    search and pages are contiguous row ranges.
+    """
+
+    def __init__(self, permissions: pd.DataFrame, user_profiles: pd.DataFrame, audit_logs: pd.DataFrame):
+        # Of duplicate (user_id, label) rows keep the lowest permission id,
+        # like the SQL path.
+        order = ["user_id", "label"] + (["permission_id"] if "permission_id" in permissions.columns else [])
+        assigned = (
+            permissions.sort_values(order, kind="stable")
+            .drop_duplicates(subset=["user_id", "label"])
+            .reset_index(drop=True)
+        )
+        self.user_ids = assigned["user_id"].to_numpy(dtype=object)
+        self.labels = assigned["label"].to_numpy(dtype=object)
+        self.attributes = (
+            user_profiles.reindex(self.user_ids)[["role", "department", "branch"]]
+            .reset_index(drop=True)
+        )
+        self.assigned = assigned
+        self.cube = IncrementalUsageCube.from_audit_logs(audit_logs)
+
+    def _mask(self, filters: dict) -> np.ndarray | None:
+        mask = None
+        for field, value in filters.items():
+            if field == "label":
+                matches = self.labels == value
+            else:
+                matches = (self.attributes[field] == value).to_numpy()
+            mask = matches if mask is None else mask & matches
+        return mask
+
+    def _start(self, after: tuple[str, str] | None) -> int:
+        """First assigned row after the (user_id, label) pair ``after``."""
+        if after is None:
+            return 0
+        user_id, label = after
+        lo = np.searchsorted(self.user_ids, user_id, side="left")
+        hi = np.searchsorted(self.user_ids, user_id, side="right")
+        return int(lo + np.searchsorted(self.labels[lo:hi], label, side="right"))
+
+    def count(self, filters: dict) -> int:
+        mask = self._mask(filters)
+        return len(self.assigned) if mask is None else int(mask.sum())
+
+    def iter_unused(
+        self,
+        cutoff: pd.Timestamp,
+        filters: dict,
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> Iterator[list[dict]]:
+        """Yield unused assigned permissions after ``after``, one chunk at a time.
+
+        With a ``limit``, at most that many are yielded. The first chunks are
+        small and grow up to ``CHUNK_SIZE``, so a page computes usage for
+        about as many rows as it returns instead of for a whole chunk.
+        """
+        mask = self._mask(filters)
+        start = self._start(after)
+        # Positions of the rows that pass the filters, scanned in order.
+        candidates = None if mask is None else start + np.flatnonzero(mask[start:])
+        total = len(self.assigned) - start if candidates is None else len(candidates)
+        size = CHUNK_SIZE if limit is None else min(max(2 * limit, 64), CHUNK_SIZE)
+        remaining = limit
+        offset = 0
+        while offset < total and remaining != 0:
+            end = min(offset + size, total)
+            rows = np.arange(start + offset, start + end) if candidates is None else candidates[offset:end]
+            offset, size = end, min(2 * size, CHUNK_SIZE)
+
+            metrics.count("rows_scanned", len(rows))
+            with metrics.span("usage_window"):
+                usage_count, last_used = self.cube.window(self.user_ids[rows], self.labels[rows], cutoff)
+            unused = usage_count == 0
+            rows, last_used = rows[unused], last_used[unused]
+            if remaining is not None:
+                rows, last_used = rows[:remaining], last_used[:remaining]
+                remaining -= len(rows)
+            with metrics.span("to_records"):
+                records = self.assigned.iloc[rows].to_dict(orient="records")
+                for record, last in zip(records, last_used):
+                    record["usage_count"] = 0
+                    record["last_used_at"] = format_last_used(last)
+            yield records
+
+
+class SqlRightsizing:
+    """The same query pushed down to the database as one anti-join.
+
+    Assigned permissions are the role_permissions / user_additional_permissions
+    union that ``policy.db.read_permissions_and_users`` reads; a pair is unused when no
+    allowed audit event for its resource and action exists since the cutoff.
+    Rows come back sorted by (user_id, label) in byte order, the order the
+    in-memory path uses, through a server-side cursor.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        metadata = MetaData()
+        tables = {
+            name: Table(name, metadata, autoload_with=engine)
+            for name in ("users", "roles", "role_permissions", "user_additional_permissions", "permissions", "audit_logs")
+        }
+        self.users, self.roles, self.audit = tables["users"], tables["roles"], tables["audit_logs"]
+        self.allowed = self.audit.c["allowed"] if "allowed" in self.audit.c else self.audit.c["success"]
+        self.assigned = self._assigned_query(tables)
+
+    def _assigned_query(self, tables: dict):
+        u, r, p = tables["users"], tables["roles"], tables["permissions"]
+        rp, uap = tables["role_permissions"], tables["user_additional_permissions"]
+        columns = (u.c.user_id, p.c.id.label("permission_id"), p.c.resource_type, p.c.action, p.c.scope)
+        union = union_all(
+            select(*columns).select_from(
+                u.join(r, u.c.role_id == r.c.id)
+                .join(rp, rp.c.role_id == r.c.id)
+                .join(p, p.c.id == rp.c.permission_id)
+            ),
+            select(*columns).select_from(
+                u.join(uap, uap.c.user_id == u.c.id).join(p, p.c.id == uap.c.permission_id)
+            ),
+        ).subquery("assignments")
+        label = union.c.resource_type + literal("_") + union.c.action
+        ranked = select(
+            *union.c,
+            label.label("label"),
+            func.row_number().over(
+                partition_by=(union.c.user_id, label), order_by=union.c.permission_id
+            ).label("duplicate"),
+        ).subquery("ranked")
+        return select(*[c for c in ranked.c if c.name != "duplicate"]).where(ranked.c.duplicate == 1).subquery("assigned")
+
+    def _sorted(self, column):
+        return column.collate("C") if self.engine.dialect.name == "postgresql" else column
+
+    def _filtered(self, query, filters: dict):
+        a = self.assigned
+        if filters.keys() & {"role", "department", "branch"}:
+            u, r = self.users, self.roles
+            query = query.where(
+                exists(
+                    select(literal(1))
+                    .select_from(u.join(r, u.c.role_id == r.c.id))
+                    .where(
+                        u.c.user_id == a.c.user_id,
+                        *[
+                            (r.c.name if field == "role" else u.c[field]) == value
+                            for field, value in filters.items()
+                            if field != "label"
+                        ],
+                    )
+                )
+            )
+        if "label" in filters:
+            query = query.where(a.c.label == filters["label"])
+        return query
+
+    def count(self, filters: dict) -> int:
+        query = self._filtered(select(func.count()).select_from(self.assigned), filters)
+        with self.engine.connect() as conn:
+            return int(conn.execute(query).scalar_one())
+
+    def unused_query(self, cutoff: pd.Timestamp, filters: dict, after=None, limit=None):
+        a, audit = self.assigned, self.audit
+        same_pair = and_(
+            audit.c.user_id == a.c.user_id,
+            audit.c.resource_type == a.c.resource_type,
+            audit.c.action == a.c.action,
+            self.allowed == true(),
+        )
+        last_used = select(func.max(audit.c["timestamp"])).where(same_pair).scalar_subquery()
+        used = exists(select(literal(1)).where(same_pair, audit.c["timestamp"] >= cutoff.to_pydatetime()))
+        query = self._filtered(select(*a.c, last_used.label("last_used_at")).where(~used), filters)
+        user_id, label = self._sorted(a.c.user_id), self._sorted(a.c.label)
+        if after is not None:
+            query = query.where(or_(user_id > after[0], and_(a.c.user_id == after[0], label > after[1])))
+        query = query.order_by(user_id, label)
+        return query.limit(limit) if limit is not None else query
+
+    def iter_unused(
+        self,
+        cutoff: pd.Timestamp,
+        filters: dict,
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> Iterator[list[dict]]:
+        query = self.unused_query(cutoff, filters, after, limit)
+        columns = [c.name for c in self.assigned.c]
+        with self.engine.connect().execution_options(stream_results=True, max_row_buffer=CHUNK_SIZE) as conn:
+            for rows in conn.execute(query).mappings().partitions(CHUNK_SIZE):
+                records = []
+                for row in rows:
+                    record = {name: row[name] for name in columns}
+                    record["usage_count"] = 0
+                    record["last_used_at"] = format_last_used(row["last_used_at"])
+                    records.append(record)
+                yield records
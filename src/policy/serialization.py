@@ -0,0 +1,37 @@
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import Response
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Types orjson does not encode itself; NaN and infinity already become null."""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """JSON bytes for ``content``, with NumPy scalars and arrays, timestamps and NA handled natively."""
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class FastJSONResponse(Response):
+    """A JSON response encoded with orjson.
+
+    Returning it from an endpoint also skips FastAPI's ``jsonable_encoder``
+    pass. ``content`` may be bytes that were already encoded.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_stat(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_snapshot(df: pd.DataFrame, directory: Path, source: dict) -> None:
+    """Write ``df`` as one .npy file per column (strings dictionary-encoded)."""
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            kind = "datetime"
+            np.save(tmp / f"{i}.npy", series.to_numpy(dtype="datetime64[ns]"))
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            kind = "numeric"
+            np.save(tmp / f"{i}.npy", series.to_numpy())
+        elif series.dropna().map(type).eq(bool).all() and series.notna().any():
+            # Booleans with missing values: keep them comparable to True/False.
+            kind = "numeric"
+            np.save(tmp / f"{i}.npy", series.astype(float).to_numpy())
+        else:
+            kind = "category"
+            categorical = pd.Categorical(series)
+            np.save(tmp / f"{i}.codes.npy", categorical.codes)
+            np.save(tmp / f"{i}.categories.npy", categorical.categories.to_numpy(dtype=str))
+        columns.append({"name": name, "kind": kind})
+
+    meta = {"format": SNAPSHOT_FORMAT, "source": source, "rows": len(df), "columns": columns}
+    (tmp / "meta.json").write_text(json.dumps(meta))
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(tmp, directory)
+
+
+def load_snapshot(directory: Path, categorical: bool = True) -> pd.DataFrame:
+    """Load a snapshot; numeric and datetime columns are memory-mapped."""
+    meta = json.loads((directory / "meta.json").read_text())
+    data = {}
+    for i, column in enumerate(meta["columns"]):
+        if column["kind"] == "category":
+            codes = np.load(directory / f"{i}.codes.npy")
+            categories = np.load(directory / f"{i}.categories.npy")
+            values = pd.Categorical.from_codes(codes, categories=categories.astype(object))
+            data[column["name"]] = values if categorical else np.asarray(values, dtype=object)
+        else:
+            data[column["name"]] = np.load(directory / f"{i}.npy", mmap_mode="r")
+    return pd.DataFrame(data, copy=False)
+
+
+def read_table(
+    csv_path: Path,
+    snapshot_dir: Path,
+    parse_dates: Sequence[str] = (),
+    categorical: bool = True,
+) -> pd.DataFrame:
+    """Read a CSV through its columnar snapshot, rebuilding it when the CSV changes.
+
+    The snapshot is reused while the CSV's size and mtime match. If only the
+    mtime changed, the content hash decides whether it is still valid.
+    """
+    csv_path = Path(csv_path)
+    directory = Path(snapshot_dir) / csv_path.stem
+    source = _source_stat(csv_path)
+
+    meta_path = directory / "meta.json"
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        recorded = meta["source"]
+        if meta.get("format") == SNAPSHOT_FORMAT:
+            if recorded["size"] == source["size"] and recorded["mtime_ns"] == source["mtime_ns"]:
+                return load_snapshot(directory, categorical)
+            if recorded["size"] == source["size"] and recorded["sha256"] == file_sha256(csv_path):
+                meta["source"]["mtime_ns"] = source["mtime_ns"]
+                meta_path.write_text(json.dumps(meta))
+                return load_snapshot(directory, categorical)
+        logger.info("Snapshot of %s is stale; rebuilding", csv_path.name)
+
+    df = pd.read_csv(csv_path)
+    for column in parse_dates:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    source["sha256"] = file_sha256(csv_path)
+    try:
+        write_snapshot(df, directory, source)
+    except OSError as exc:
+        logger.warning("Could not write snapshot of %s: %s", csv_path.name, exc)
+        return df
+    return load_snapshot(directory, categorical)
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+RETRYING = "retrying"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupLoader:
+    """Loads named components in order on a background thread.
+
+    Each step is ``(name, load, depends_on)``. Steps run one after another,
+    so earlier components become usable while later ones are still loading.
+    A step that raises is retried after ``retry_seconds``, doubling up to
+    ``max_retry_seconds``; its dependents wait meanwhile. After
+    ``max_attempts`` failed attempts (0: no limit; ``retry_seconds`` 0: no
+    retries) it is FAILED for good, and so is every step depending on it.
+    """
+
+    def __init__(
+        self,
+        steps: Sequence[tuple[str, Callable[[], None], Sequence[str]]],
+        retry_seconds: float = 0.0,
+        max_retry_seconds: float = 300.0,
+        max_attempts: int = 0,
+    ):
+        self.steps = list(steps)
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.max_attempts = max_attempts
+        self.status = {name: PENDING for name, _, _ in self.steps}
+        self.elapsed_ms: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.attempts: dict[str, int] = {}
+        self.next_attempt: dict[str, float] = {}
+        self.started_at = time.time()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self) -> threading.Thread:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="startup-loader", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            for name, load, depends_on in self.steps:
+                status = self.status[name]
+                if status == RETRYING and time.monotonic() >= self.next_attempt[name]:
+                    status = PENDING
+                if status != PENDING:
+                    continue
+                failed = [dep for dep in depends_on if self.status.get(dep) == FAILED]
+                if failed:
+                    self.status[name] = FAILED
+                    self.errors[name] = f"dependency not loaded: {', '.join(failed)}"
+                    logger.error("Skipping %s: %s", name, self.errors[name])
+                elif all(self.status.get(dep) == READY for dep in depends_on):
+                    self._load(name, load)
+
+            retries = [self.next_attempt[name] for name, status in self.status.items() if status == RETRYING]
+            if not retries:
+                # Anything still pending waits on a dependency that can no longer load.
+                for name, status in self.status.items():
+                    if status == PENDING:
+                        self.status[name] = FAILED
+                        self.errors[name] = "dependency not loaded"
+                return
+            self._stop.wait(max(0.0, min(retries) - time.monotonic()))
+
+    def _load(self, name: str, load: Callable[[], None]) -> None:
+        self.status[name] = LOADING
+        self.attempts[name] = self.attempts.get(name, 0) + 1
+        start = time.perf_counter()
+        try:
+            load()
+        except Exception as exc:
+            self.errors[name] = f"{type(exc).__name__}: {exc}"
+            attempts = self.attempts[name]
+            if self.retry_seconds > 0 and (self.max_attempts == 0 or attempts < self.max_attempts):
+                delay = min(self.retry_seconds * 2 ** (attempts - 1), self.max_retry_seconds)
+                self.next_attempt[name] = time.monotonic() + delay
+                self.status[name] = RETRYING
+                logger.exception("Failed to load %s (attempt %s); retrying in %.0fs", name, attempts, delay)
+            else:
+                self.status[name] = FAILED
+                logger.exception("Failed to load %s", name)
+        else:
+            self.status[name] = READY
+            self.errors.pop(name, None)
+            logger.info("Loaded %s", name)
+        self.elapsed_ms[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def retry_after(self, names: Sequence[str]) -> float | None:
+        """Seconds until ``names`` may be loaded; None if one of them has failed for good."""
+        if any(self.status.get(name) == FAILED for name in names):
+            return None
+        retries = [self.next_attempt[name] - time.monotonic() for name in names if self.status.get(name) == RETRYING]
+        return max(retries + [0.0])
+
+    def failed(self) -> list[str]:
+        return [name for name, status in self.status.items() if status == FAILED]
+
+    def missing(self, names: Sequence[str]) -> list[str]:
+        return [name for name in names if self.status.get(name) != READY]
+
+    def ready(self) -> bool:
+        return not self.missing(list(self.status))
+
+    def report(self) -> dict:
+        return {
+            name: {
+                "status": status,
+                "elapsed_ms": self.elapsed_ms.get(name),
+                "error": self.errors.get(name),
+                "attempts": self.attempts.get(name, 0),
+            }
+            for name, status in self.status.items()
+        }
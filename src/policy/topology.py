@@ -0,0 +1,159 @@
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import precision_recall_fscore_support
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+
+from policy.forest import CompiledForest, positive_scores
+
+# per_label:    one forest per permission label (MultiOutputClassifier).
+# multi_output: one forest fitted on the whole label matrix; every leaf holds
+#               a class distribution for each label.
+# capped:       multi_output with fewer, shallower trees.
+TOPOLOGIES = ("per_label", "multi_output", "capped")
+CAPPED_N_ESTIMATORS = 30
+CAPPED_MAX_DEPTH = 8
+
+
+def build_classifier(topology: str, random_state: int = 42):
+    if topology == "per_label":
+        return MultiOutputClassifier(
+            RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+        )
+    if topology == "multi_output":
+        return RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+    if topology == "capped":
+        return RandomForestClassifier(
+            n_estimators=CAPPED_N_ESTIMATORS,
+            max_depth=CAPPED_MAX_DEPTH,
+            random_state=random_state,
+            n_jobs=-1,
+        )
+    raise ValueError(f"Unknown model topology {topology!r}; expected one of {', '.join(TOPOLOGIES)}")
+
+
+def build_pipeline(topology: str, preprocessor, random_state: int = 42) -> Pipeline:
+    return Pipeline(steps=[
+        ("preprocess", clone(preprocessor)),
+        ("classifier", build_classifier(topology, random_state)),
+    ])
+
+
+def fit_pipeline(model: Pipeline, X: pd.DataFrame, Y) -> Pipeline:
+    """Fit ``model``; ``Y`` may be a sparse label matrix.
+
+    sklearn forests reject sparse targets. A per-label model is fitted one
+    label at a time from CSC columns, densifying a single column each time;
+    these are the fits MultiOutputClassifier.fit runs, and it gets the same
+    fitted attributes. A native multi-output forest needs the whole matrix
+    dense, at one byte per user and label.
+    """
+    if not sp.issparse(Y):
+        return model.fit(X, Y)
+    classifier = model[-1]
+    if not isinstance(classifier, MultiOutputClassifier):
+        return model.fit(X, Y.astype(np.uint8).toarray())
+    Xt = X
+    for _, step in model.steps[:-1]:
+        Xt = step.fit_transform(Xt)
+    Y = Y.tocsc()
+    classifier.estimators_ = [
+        clone(classifier.estimator).fit(Xt, Y[:, [label]].toarray().ravel().astype(np.float64))
+        for label in range(Y.shape[1])
+    ]
+    for name in ("n_features_in_", "feature_names_in_"):
+        if hasattr(classifier.estimators_[0], name):
+            setattr(classifier, name, getattr(classifier.estimators_[0], name))
+    classifier.classes_ = [estimator.classes_ for estimator in classifier.estimators_]
+    return model
+
+
+def latency_percentiles_ms(predict, X: pd.DataFrame, samples: int) -> tuple[float, float]:
+    """p50 and p99 of ``predict`` on one profile at a time, in milliseconds."""
+    rows = X.iloc[np.arange(samples) % len(X)]
+    timings = []
+    for i in range(len(rows)):
+        row = rows.iloc[[i]]
+        start = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(timings, [50, 99])
+    return float(p50) * 1000, float(p99) * 1000
+
+
+def artifact_size_bytes(model) -> int:
+    """Size of ``model`` as written by joblib.dump, as train.py saves it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.pkl")
+        joblib.dump(model, path)
+        return os.path.getsize(path)
+
+
+def topology_report(
+    model: Pipeline,
+    train_seconds: float,
+    X_test: pd.DataFrame,
+    Y_test: pd.DataFrame,
+    latency_samples: int = 50,
+) -> dict:
+    """Training time, artifact size, single-profile latency and macro P/R of a fitted model.
+
+    Latency is measured for the sklearn path and, when the model compiles,
+    for the compiled engine (INFERENCE_ENGINE=compiled in the API).
+    """
+    precision, recall, _, _ = precision_recall_fscore_support(
+        Y_test, model.predict(X_test), average="macro", zero_division=0
+    )
+    report = {
+        "train_s": train_seconds,
+        "size_mb": artifact_size_bytes(model) / 1e6,
+        "trees": _tree_count(model[-1]),
+        "precision": precision,
+        "recall": recall,
+    }
+    report["sklearn_p50_ms"], report["sklearn_p99_ms"] = latency_percentiles_ms(
+        lambda row: positive_scores(model, row), X_test, latency_samples
+    )
+    try:
+        compiled = CompiledForest.from_pipeline(model)
+    except (TypeError, ValueError):
+        report["compiled_p50_ms"] = report["compiled_p99_ms"] = None
+    else:
+        report["compiled_p50_ms"], report["compiled_p99_ms"] = latency_percentiles_ms(
+            compiled.predict_scores, X_test, max(latency_samples, 200)
+        )
+    return report
+
+
+def _tree_count(classifier) -> int:
+    if isinstance(classifier, MultiOutputClassifier):
+        return sum(len(forest.estimators_) for forest in classifier.estimators_)
+    return len(classifier.estimators_)
+
+
+def format_report_table(reports: dict[str, dict]) -> str:
+    header = (
+        f"{'topology':<14}{'train':>8}{'size':>10}{'trees':>7}"
+        f"{'sklearn p50/p99':>20}{'compiled p50/p99':>20}{'precision':>11}{'recall':>9}"
+    )
+    lines = [header]
+    for topology, r in reports.items():
+        sklearn = f"{r['sklearn_p50_ms']:.1f}/{r['sklearn_p99_ms']:.1f}ms"
+        compiled = (
+            f"{r['compiled_p50_ms']:.1f}/{r['compiled_p99_ms']:.1f}ms"
+            if r["compiled_p50_ms"] is not None else "n/a"
+        )
+        lines.append(
+            f"{topology:<14}{r['train_s']:>7.1f}s{r['size_mb']:>8.1f}MB{r['trees']:>7}"
+            f"{sklearn:>20}{compiled:>20}"
+            f"{r['precision'] * 100:>10.2f}%{r['recall'] * 100:>8.2f}%"
+        )
+    return "\n".join(lines)
@@ -1,13 +1,11 @@
 import pandas as pd
 import numpy as np
+import os
 import time
 
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.multioutput import MultiOutputClassifier
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score, precision_recall_fscore_support
 
 
@@ -74,25 +72,15 @@ if "has_license_binary" not in users.columns:
 # Create combined label: resource_action
 permissions["label"] = permissions["resource_type"] + "_" + permissions["action"]
 
-# Pivot to multi-label matrix
-label_df = (
-    permissions
-    .assign(value=1)
-    .pivot_table(
-        index="user_id",
-        columns="label",
-        values="value",
-        fill_value=0
-    )
-    .reset_index()
-)
+# Sparse multi-label matrix (users x labels) from integer-coded user and label
+# ids; one row per row of `users`, columns in sorted label order.
+from policy.labels import label_matrix, permission_ids
 
-# Merge user profile with labels
-data = users.merge(label_df, on="user_id", how="left")
-data.fillna(0, inplace=True)
+Y, label_columns = label_matrix(users["user_id"], permissions)
+data = users.fillna(0)
 
 print(f"Tổng số người dùng: {len(data)}")
-print(f"Tổng số nhãn quyền: {len(label_df.columns) - 1}")
+print(f"Tổng số nhãn quyền: {len(label_columns)}")
 
 # =========================
 # 3. FEATURE & TARGET
@@ -110,9 +98,6 @@ X = data[
     ]
 ]
 
-label_columns = [col for col in label_df.columns if col != "user_id"]
-Y = data[label_columns]
-
 # =========================
 # 4. PREPROCESSING
 # =========================
@@ -144,25 +129,24 @@ X_train, X_test, Y_train, Y_test = train_test_split(
 )
 
 X_test.to_csv("X_test.csv", index=False)
-Y_test.to_csv("Y_test.csv", index=False)
+pd.DataFrame(Y_test.toarray(), columns=label_columns).to_csv("Y_test.csv", index=False)
 
 # =========================
 # 6. MODEL
 # =========================
-model = Pipeline(steps=[
-    ("preprocess", preprocessor),
-    ("classifier", MultiOutputClassifier(
-        RandomForestClassifier(
-            n_estimators=100,
-            random_state=42,
-            n_jobs=-1
-        )
-    ))
-])
+# MODEL_TOPOLOGY picks the classifier (see policy/topology.py):
+#   per_label    - one RandomForest per permission label (default)
+#   multi_output - a single RandomForest fitted on the whole label matrix
+#   capped       - multi_output with fewer, shallower trees
+# The API serves any of them unchanged.
+from policy.topology import TOPOLOGIES, build_pipeline, fit_pipeline, format_report_table, topology_report
 
-print("Đang huấn luyện mô hình...")
+MODEL_TOPOLOGY = os.getenv("MODEL_TOPOLOGY", "per_label")
+model = build_pipeline(MODEL_TOPOLOGY, preprocessor)
+
+print(f"Đang huấn luyện mô hình ({MODEL_TOPOLOGY})...")
 train_start = time.perf_counter()
-model.fit(X_train, Y_train)
+fit_pipeline(model, X_train, Y_train)
 train_elapsed = time.perf_counter() - train_start
 print(f"Thời gian huấn luyện: {train_elapsed:.2f}s")
 
@@ -172,9 +156,36 @@ print(f"Thời gian huấn luyện: {train_elapsed:.2f}s")
 import joblib
 
 MODEL_PATH = "permission_recommender.pkl"
-joblib.dump(model, MODEL_PATH)
+# Output order of the model; the API reads labels from here when swapping models.
+model.permission_labels_ = label_columns
+# Permission ids of those labels, so the API can answer without the permission catalog.
+catalog = pd.read_csv("permissions.csv")
+if {"id", "resource_type", "action"} <= set(catalog.columns):
+    model.permission_ids_ = permission_ids(catalog)
+elif "permission_id" in catalog.columns:
+    model.permission_ids_ = permission_ids(catalog, "permission_id")
+# Write to a temporary file and rename, so a running API never sees a partial file.
+joblib.dump(model, f"{MODEL_PATH}.tmp")
+os.replace(f"{MODEL_PATH}.tmp", MODEL_PATH)
 print(f"Đã lưu mô hình vào {MODEL_PATH}")
 
+# =========================
+# 6.2 OPTIONAL: PRECOMPILED LOOKUP TABLE
+# =========================
+# BUILD_LOOKUP_TABLE=1 scores every known category combination once so the
+# API (LOOKUP_TABLE_MODE=load) can answer known profiles without inference.
+if os.getenv("BUILD_LOOKUP_TABLE") == "1":
+    from policy.artifacts import lookup_table_path, model_version
+    from policy.lookup import LookupTable
+
+    lookup_start = time.perf_counter()
+    lookup_table = LookupTable.build(model, list(X.columns), version=model_version(MODEL_PATH))
+    lookup_table.save(lookup_table_path(MODEL_PATH))
+    print(
+        f"Đã lưu bảng tra cứu ({len(lookup_table)} hồ sơ) vào {lookup_table_path(MODEL_PATH)} "
+        f"trong {time.perf_counter() - lookup_start:.2f}s"
+    )
+
 # =========================
 # 7. EVALUATION
 # =========================
@@ -184,7 +195,7 @@ Y_pred = model.predict(X_test)
 print(classification_report(
     Y_test,
     Y_pred,
-    target_names=Y.columns
+    target_names=label_columns
 ))
 
 accuracy = accuracy_score(Y_test, Y_pred)
@@ -202,6 +213,28 @@ print(f"Recall (Macro) | {recall_macro * 100:.2f}% | Dam bao khong bo sot quyen
 print(f"F1-Score | {f1_macro * 100:.2f}% | Can bang giua do chinh xac va do phu")
 print(f"Training Time | {train_elapsed:.2f}s | Thoi gian huan luyen nhanh, phu hop tai huan luyen")
 
+# =========================
+# 7.1 OPTIONAL: COMPARE MODEL TOPOLOGIES
+# =========================
+# COMPARE_TOPOLOGIES=1 also trains the other topologies on the same split
+# and prints training time, artifact size, single-profile latency and macro
+# precision/recall for each. Only the MODEL_TOPOLOGY model is saved.
+if os.getenv("COMPARE_TOPOLOGIES") == "1":
+    latency_samples = int(os.getenv("TOPOLOGY_LATENCY_SAMPLES", "50"))
+    reports = {}
+    for topology in TOPOLOGIES:
+        if topology == MODEL_TOPOLOGY:
+            candidate, candidate_elapsed = model, train_elapsed
+        else:
+            print(f"Đang huấn luyện mô hình so sánh ({topology})...")
+            candidate = build_pipeline(topology, preprocessor)
+            candidate_start = time.perf_counter()
+            fit_pipeline(candidate, X_train, Y_train)
+            candidate_elapsed = time.perf_counter() - candidate_start
+        reports[topology] = topology_report(candidate, candidate_elapsed, X_test, Y_test, latency_samples)
+    print("\nSo sánh cấu trúc mô hình:")
+    print(format_report_table(reports))
+
 # =========================
 # 8. DEMO: RECOMMEND PERMISSIONS FOR NEW USER
 # =========================
@@ -223,7 +256,7 @@ print("Input new_user:", new_user.to_dict(orient="records")[0])
 proba = model.predict_proba(new_user)
 
 recommendations = []
-for idx, label in enumerate(Y.columns):
+for idx, label in enumerate(label_columns):
     confidence = proba[idx][0][1]
     if confidence >= 0.6:
         recommendations.append((label, round(confidence, 2)))
@@ -289,14 +322,14 @@ old_proba = model.predict_proba(old_user_df)
 new_proba = model.predict_proba(new_user_df)
 
 old_perms = {
-    Y.columns[idx]: old_proba[idx][0][1]
-    for idx in range(len(Y.columns))
+    label_columns[idx]: old_proba[idx][0][1]
+    for idx in range(len(label_columns))
     if old_proba[idx][0][1] >= 0.6
 }
 
 new_perms = {
-    Y.columns[idx]: new_proba[idx][0][1]
-    for idx in range(len(Y.columns))
+    label_columns[idx]: new_proba[idx][0][1]
+    for idx in range(len(label_columns))
     if new_proba[idx][0][1] >= 0.6
 }
 
@@ -415,10 +448,12 @@ audit_with_role = audit_logs.merge(
     how="left"
 )
 
-# Rule 1: Access resource not typical for role
-audit_with_role["rule_role_violation"] = audit_with_role.apply(
-    lambda r: r["resource_type"] not in role_allowed_resources.get(r["role"], []),
-    axis=1
+# Rule 1: Access resource not typical for role (vectorized role x resource lookup)
+from policy.anomaly import AnomalyScorer
+
+audit_with_role["rule_role_violation"] = AnomalyScorer(role_allowed_resources).unexpected_resource(
+    audit_with_role["role"],
+    audit_with_role["resource_type"]
 )
 
 # Rule 2: Access outside working hours (08:00–18:00)
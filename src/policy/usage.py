@@ -0,0 +1,194 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+LABEL_BITS = 16
+DAY_BITS = 16
+
+
+def day_number(timestamps) -> np.ndarray:
+    """Days since the Unix epoch for naive timestamps."""
+    values = np.asarray(timestamps, dtype="datetime64[ns]")
+    return values.astype("datetime64[D]").astype(np.int64)
+
+
+def _encode(codes: dict, values: pd.Series) -> np.ndarray:
+    """Integer codes for ``values``, growing ``codes`` with unseen values."""
+    inverse, uniques = pd.factorize(values)
+    mapped = np.empty(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        mapped[i] = codes.setdefault(value, len(codes))
+    return mapped[inverse]
+
+
+class UsageCube:
+    """Allowed-access counts per (user, label, day) with cumulative sums.
+
+    Each (user, label) pair and day is packed into one sorted int64 key, and
+    ``cumulative[i]`` holds the number of events before key ``i``. The usage
+    of a pair since a given day is then ``cumulative[hi] - cumulative[lo]``,
+    where ``lo``/``hi`` are binary-searched from the pair's key range, so a
+    rightsizing query never touches the raw audit rows. Windows are
+    day-aligned: a cutoff includes the whole day it falls on.
+    """
+
+    def __init__(self):
+        self.user_codes: dict = {}
+        self.label_codes: dict = {}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.cumulative = np.zeros(1, dtype=np.int64)
+        self.pair_keys = np.empty(0, dtype=np.int64)
+        self.last_used = np.empty(0, dtype="datetime64[ns]")
+        self.events = 0
+
+    @classmethod
+    def from_audit_logs(cls, logs: pd.DataFrame) -> "UsageCube":
+        cube = cls()
+        cube.extend(logs)
+        return cube
+
+    def extend(self, logs: pd.DataFrame) -> None:
+        """Add the allowed events of ``logs`` to the cube."""
+        logs = logs[logs["allowed"] == True].dropna(subset=["user_id", "resource_type", "action"])
+        timestamps = pd.to_datetime(logs["timestamp"], errors="coerce")
+        valid = timestamps.notna().to_numpy()
+        if not valid.any():
+            return
+        logs = logs[valid]
+        timestamps = timestamps[valid].to_numpy(dtype="datetime64[ns]")
+
+        users = _encode(self.user_codes, logs["user_id"])
+        labels = _encode(self.label_codes, logs["resource_type"].astype(str) + "_" + logs["action"].astype(str))
+        pairs = (users << LABEL_BITS) | labels
+        days = np.clip(day_number(timestamps), 0, (1 << DAY_BITS) - 1)
+
+        keys, counts = np.unique((pairs << DAY_BITS) | days, return_counts=True)
+        self._add(keys, counts, pairs, timestamps, len(logs))
+
+    def merge(self, other: "UsageCube") -> None:
+        """Add the events of ``other``, which must share this cube's code tables."""
+        if other.user_codes is not self.user_codes or other.label_codes is not self.label_codes:
+            raise ValueError("Can only merge cubes that share code tables")
+        if len(other.keys):
+            self._add(other.keys, other.counts, other.pair_keys, other.last_used, other.events)
+
+    def empty_like(self) -> "UsageCube":
+        """An empty cube sharing this cube's code tables, for use with ``merge``."""
+        cube = UsageCube()
+        cube.user_codes, cube.label_codes = self.user_codes, self.label_codes
+        return cube
+
+    def _add(self, keys: np.ndarray, counts: np.ndarray, pairs: np.ndarray, last_used: np.ndarray, events: int) -> None:
+        if len(self.keys):
+            keys, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]), minlength=len(keys))
+        self.keys = keys
+        self.counts = counts.astype(np.int64)
+        self.cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+
+        all_pairs = np.concatenate([self.pair_keys, pairs])
+        all_last = np.concatenate([self.last_used, last_used])
+        order = np.lexsort((all_last, all_pairs))
+        all_pairs = all_pairs[order]
+        last_of_pair = np.r_[all_pairs[1:] != all_pairs[:-1], True]
+        self.pair_keys = all_pairs[last_of_pair]
+        self.last_used = all_last[order][last_of_pair]
+        self.events += events
+
+    def window(self, user_ids, labels, since: pd.Timestamp) -> tuple[np.ndarray, np.ndarray]:
+        """Usage counts since ``since`` and last-used time for each (user, label)."""
+        return self.window_pairs(*self.pair_codes(user_ids, labels), since)
+
+    def pair_codes(self, user_ids, labels) -> tuple[np.ndarray, np.ndarray]:
+        """Packed (user, label) codes of the known pairs, and which pairs are known."""
+        users = pd.Series(user_ids).map(self.user_codes).to_numpy(dtype=float, na_value=np.nan)
+        label_codes = pd.Series(labels).map(self.label_codes).to_numpy(dtype=float, na_value=np.nan)
+        known = ~(np.isnan(users) | np.isnan(label_codes))
+        pairs = (users[known].astype(np.int64) << LABEL_BITS) | label_codes[known].astype(np.int64)
+        return pairs, known
+
+    def window_pairs(self, pairs: np.ndarray, known: np.ndarray, since: pd.Timestamp) -> tuple[np.ndarray, np.ndarray]:
+        counts = np.zeros(len(known), dtype=np.int64)
+        last_used = np.full(len(known), np.datetime64("NaT"), dtype="datetime64[ns]")
+        if not known.any() or not len(self.keys):
+            return counts, last_used
+
+        since_day = int(np.clip(day_number([since])[0], 0, (1 << DAY_BITS) - 1))
+        lo = np.searchsorted(self.keys, (pairs << DAY_BITS) | since_day, side="left")
+        hi = np.searchsorted(self.keys, (pairs + 1) << DAY_BITS, side="left")
+        counts[known] = self.cumulative[hi] - self.cumulative[lo]
+
+        idx = np.searchsorted(self.pair_keys, pairs)
+        idx = np.minimum(idx, len(self.pair_keys) - 1)
+        found = self.pair_keys[idx] == pairs
+        known_last = np.full(len(pairs), np.datetime64("NaT"), dtype="datetime64[ns]")
+        known_last[found] = self.last_used[idx[found]]
+        last_used[known] = known_last
+        return counts, last_used
+
+
+class IncrementalUsageCube:
+    """A usage cube that takes appended events at a cost proportional to them.
+
+    The events are spread over cubes ("levels") sharing one set of code
+    tables, largest first. Appended events become a new small level, and
+    the last two levels are merged while the older one is at most twice the
+    size of the newer, so each event is merged O(log n) times and a query
+    visits O(log n) levels. There is a single writer (the refresher);
+    readers always see a complete set of levels.
+    """
+
+    def __init__(self, base: UsageCube):
+        self.levels = [base]
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Pickled into executor workers; the lock is not picklable.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_audit_logs(cls, logs: pd.DataFrame) -> "IncrementalUsageCube":
+        return cls(UsageCube.from_audit_logs(logs))
+
+    @property
+    def events(self) -> int:
+        return sum(level.events for level in self.levels)
+
+    @property
+    def cells(self) -> int:
+        return sum(len(level.keys) for level in self.levels)
+
+    def extend(self, logs: pd.DataFrame) -> None:
+        levels = list(self.levels)
+        with self._lock:
+            # Encoding adds to the shared code tables, which readers map through.
+            cube = levels[0].empty_like()
+            cube.extend(logs)
+        if not len(cube.keys):
+            return
+        while levels and len(levels[-1].keys) <= 2 * len(cube.keys):
+            merged = cube.empty_like()
+            merged.merge(levels.pop())
+            merged.merge(cube)
+            cube = merged
+        levels.append(cube)
+        with self._lock:
+            self.levels = levels
+
+    def window(self, user_ids, labels, since: pd.Timestamp) -> tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            levels = self.levels
+            pairs, known = levels[0].pair_codes(user_ids, labels)
+        counts, last_used = levels[0].window_pairs(pairs, known, since)
+        for level in levels[1:]:
+            level_counts, level_last = level.window_pairs(pairs, known, since)
+            counts, last_used = counts + level_counts, np.fmax(last_used, level_last)
+        return counts, last_used
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CATEGORICAL_FEATURES = ["role", "department", "branch", "position", "employment_type", "license", "seniority"]
+
+
+@pytest.fixture(scope="session")
+def test_split() -> tuple[pd.DataFrame, pd.DataFrame]:
+    return pd.read_csv(ROOT / "X_test.csv"), pd.read_csv(ROOT / "Y_test.csv")
+
+
+@pytest.fixture(scope="session")
+def tiny_model(test_split) -> Pipeline:
+    """Small pipeline with the same structure as the one train.py produces."""
+    X, Y = test_split
+    model = Pipeline(steps=[
+        ("preprocess", ColumnTransformer(
+            transformers=[
+                ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL_FEATURES),
+                ("num", "passthrough", ["has_license_binary"]),
+            ]
+        )),
+        ("classifier", MultiOutputClassifier(RandomForestClassifier(n_estimators=5, random_state=42))),
+    ])
+    return model.fit(X, Y)
@@ -1,223 +1,372 @@
-import random
-from datetime import datetime, timedelta
-
+"""Extend the DB exports with synthetic users, permissions, patients and audit logs.
+
+Reads users.csv, roles.csv, permissions.csv, role_permissions.csv,
+user_additional_permissions.csv, user_assigned_patients.csv and
+audit_logs.csv from --source-dir and writes the extended tables with
+--suffix (default ``_v2``) to --output-dir. Everything is sampled with NumPy
+from a seeded generator, so the same seed and scale give identical files.
+
+Audit logs are generated and written in blocks of ROWS_PER_BLOCK rows, so
+memory stays flat however many rows are requested. Each user's assigned
+permissions (role permissions plus additional ones), and the permissions
+they lack, are precomputed as CSR-style integer arrays, from which the
+allowed and denied events of a block are drawn at once. --format parquet
+writes Parquet files instead of CSV (needs pyarrow).
+Usage (from the repo root):
+
+    python tests/create_data_set_v2.py
+    python tests/create_data_set_v2.py --users 100000 --logs 10000000 --suffix _load --format parquet
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
-# ------------------------
-# CONFIG
-# ------------------------
-ADD_USERS = 500
-ADD_LOGS = 5000
-OUTPUT_SUFFIX = "_v2"
-SEED = 42
+ROWS_PER_BLOCK = 100_000
+ALLOW_RATE = 0.85
+ADDITIONAL_PERMISSION_RATE = 0.1
+LOG_WINDOW_DAYS = 90
+LICENSED_ROLES = {"Doctor", "Nurse"}
+PATIENT_ROLES = {"Doctor", "Nurse"}
+IP_SAMPLES = np.array(["10.0.0.10", "10.0.1.11", "172.19.0.1", "192.168.1.20"], dtype=object)
+AGENT_SAMPLES = np.array(["PostmanRuntime/7.51.0", "Mozilla/5.0", "okhttp/4.11.0"], dtype=object)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# Independent random streams, so changing one table's size leaves the others unchanged.
+USERS_STREAM, ADDITIONAL_STREAM, PATIENTS_STREAM, LOGS_STREAM = range(4)
 
-random.seed(SEED)
 
-# ------------------------
-# LOAD BASE DATA (DB EXPORTS)
-# ------------------------
-users = pd.read_csv("users.csv")
-roles = pd.read_csv("roles.csv")
-permissions = pd.read_csv("permissions.csv")
-role_permissions = pd.read_csv("role_permissions.csv")
-user_additional_permissions = pd.read_csv("user_additional_permissions.csv")
-user_assigned_patients = pd.read_csv("user_assigned_patients.csv")
-audit_logs = pd.read_csv("audit_logs.csv")
+def next_numeric(values) -> int:
+    digits = pd.Series(values, dtype=object).astype(str).str.replace(r"\D", "", regex=True)
+    numbers = pd.to_numeric(digits[digits != ""])
+    return int(numbers.max()) + 1 if len(numbers) else 0
 
-role_name_by_id = roles.set_index("id")["name"].to_dict()
 
-def next_numeric(values):
-    nums = []
-    for value in values:
-        digits = "".join(ch for ch in str(value) if ch.isdigit())
-        if digits:
-            nums.append(int(digits))
-    return (max(nums) + 1) if nums else 0
+def formatted(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    return (prefix + pd.Series(numbers).astype(str).str.zfill(width)).to_numpy(dtype=object)
 
 
-def now_str():
-    return datetime.now().isoformat(sep=" ", timespec="microseconds")
+def choice_by_group(rng: np.random.Generator, groups: np.ndarray, options: dict, fallback) -> np.ndarray:
+    """For each row, a uniform pick from ``options[group]`` (or ``fallback``)."""
+    picked = np.empty(len(groups), dtype=object)
+    for group in np.unique(groups):
+        rows = np.flatnonzero(groups == group)
+        values = options.get(group)
+        values = np.asarray(values if values is not None and len(values) else [fallback], dtype=object)
+        picked[rows] = values[rng.integers(0, len(values), len(rows))]
+    return picked
 
 
-def pick_weighted_role():
-    if "role_id" in users.columns and not users.empty:
-        counts = users["role_id"].value_counts()
-        role_ids = counts.index.tolist()
-        weights = counts.values.tolist()
-        return random.choices(role_ids, weights=weights, k=1)[0]
-    return random.choice(roles["id"].tolist())
+class TableWriter:
+    """Appends DataFrame chunks to one CSV or Parquet file."""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path.with_suffix(f".{fmt}")
+        self.fmt = fmt
+        self._writer = None
+        self._header = True
 
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False,
+                      date_format=TIMESTAMP_FORMAT)
+            self._header = False
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
 
-def sample_from_series(series, fallback):
-    unique = series.dropna().unique().tolist()
-    return random.choice(unique) if unique else fallback
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def write_table(df: pd.DataFrame, path: Path, fmt: str) -> Path:
+    writer = TableWriter(path, fmt)
+    writer.write(df)
+    writer.close()
+    return writer.path
 
 
 # ------------------------
-# GENERATE USERS
+# USERS
 # ------------------------
-start_user_id = next_numeric(users["user_id"]) if "user_id" in users.columns else 0
-start_username_id = next_numeric(users["username"]) if "username" in users.columns else start_user_id
-start_pk = (users["id"].max() + 1) if "id" in users.columns and not users.empty else 1
-departments_by_role = users.groupby("role_id")["department"].unique().to_dict() if "department" in users.columns else {}
-positions_by_role = users.groupby("role_id")["position"].unique().to_dict() if "position" in users.columns else {}
-license_rate_by_role = users.groupby("role_id")["has_license"].mean().to_dict() if "has_license" in users.columns else {}
-
-branches = users["branch"].dropna().unique().tolist() if "branch" in users.columns else ["CN_HN"]
-seniority_levels = users["seniority"].dropna().unique().tolist() if "seniority" in users.columns else ["Junior", "Mid", "Senior"]
-employment_types = users["employment_type"].dropna().unique().tolist() if "employment_type" in users.columns else ["FullTime"]
-
-new_users = []
-for i in range(ADD_USERS):
-    role_id = pick_weighted_role()
-    role_name = role_name_by_id.get(role_id, "Staff")
-
-    role_departments = departments_by_role.get(role_id, [])
-    department = random.choice(role_departments) if len(role_departments) else sample_from_series(users["department"], "General")
-    position = random.choice(positions_by_role.get(role_id, [role_name]))
-
-    has_license_rate = license_rate_by_role.get(role_id, 0.0)
-    has_license = random.random() < has_license_rate if has_license_rate > 0 else role_name in {"Doctor", "Nurse"}
-
-    user_id_numeric = start_user_id + i
-    username_numeric = start_username_id + i
-    user_id = f"U{user_id_numeric:04d}"
-    username = f"u{username_numeric:04d}"
-
-    new_users.append(
-        {
-            "id": start_pk + i,
-            "user_id": user_id,
-            "username": username,
-            "email": f"{username}@hospital.com",
-            "department": department,
-            "branch": random.choice(branches) if branches else "CN_HN",
-            "position": position,
-            "has_license": has_license,
-            "seniority": random.choice(seniority_levels),
-            "employment_type": random.choice(employment_types),
-            "enabled": True,
-            "account_non_expired": True,
-            "account_non_locked": True,
-            "credentials_non_expired": True,
-            "role_id": role_id,
-            "created_at": now_str(),
-            "updated_at": now_str(),
-        }
+def generate_users(base: dict, n: int, rng: np.random.Generator, created_at: str) -> pd.DataFrame:
+    users, roles = base["users"], base["roles"]
+    role_name_by_id = roles.set_index("id")["name"].to_dict()
+    if len(users):
+        counts = users["role_id"].value_counts()
+        role_ids = rng.choice(counts.index.to_numpy(), size=n, p=counts.to_numpy() / counts.sum())
+    else:
+        role_ids = rng.choice(roles["id"].to_numpy(), size=n)
+    role_names = np.array([role_name_by_id.get(role_id, "Staff") for role_id in role_ids], dtype=object)
+
+    departments = users["department"].dropna().unique()
+    department = choice_by_group(
+        rng, role_ids, users.groupby("role_id")["department"].unique().to_dict(),
+        departments[0] if len(departments) else "General",
     )
+    position = choice_by_group(rng, role_ids, users.groupby("role_id")["position"].unique().to_dict(), None)
+    position = np.where(pd.isna(position), role_names, position)
+
+    license_rate = users.assign(has_license=users["has_license"].astype(str).str.lower() == "true")
+    license_rate = license_rate.groupby("role_id")["has_license"].mean()
+    rate = license_rate.reindex(role_ids).fillna(0).to_numpy()
+    has_license = np.where(rate > 0, rng.random(n) < rate, np.isin(role_names, list(LICENSED_ROLES)))
+
+    def uniform(column: str, default: list) -> np.ndarray:
+        values = users[column].dropna().unique() if column in users.columns else []
+        values = np.asarray(values if len(values) else default, dtype=object)
+        return values[rng.integers(0, len(values), n)]
+
+    numbers = np.arange(n)
+    usernames = formatted("u", next_numeric(users["username"]) + numbers, 4)
+    return pd.DataFrame({
+        "id": int(users["id"].max()) + 1 + numbers if len(users) else 1 + numbers,
+        "user_id": formatted("U", next_numeric(users["user_id"]) + numbers, 4),
+        "username": usernames,
+        "email": usernames + "@hospital.com",
+        "department": department,
+        "branch": uniform("branch", ["CN_HN"]),
+        "position": position,
+        "has_license": has_license,
+        "seniority": uniform("seniority", ["Junior", "Mid", "Senior"]),
+        "employment_type": uniform("employment_type", ["FullTime"]),
+        "enabled": True,
+        "account_non_expired": True,
+        "account_non_locked": True,
+        "credentials_non_expired": True,
+        "role_id": role_ids,
+        "created_at": created_at,
+        "updated_at": created_at,
+    })
 
-new_users_df = pd.DataFrame(new_users)
-users_base = users.drop(columns=["password"], errors="ignore")
-users_v2 = pd.concat([users_base, new_users_df], ignore_index=True)
-users_v2.to_csv(f"users{OUTPUT_SUFFIX}.csv", index=False)
 
 # ------------------------
 # USER ADDITIONAL PERMISSIONS
 # ------------------------
-permission_ids = permissions["id"].tolist()
-role_perm_map = role_permissions.groupby("role_id")["permission_id"].apply(set).to_dict()
-
-additional_rows = []
-for _, user in new_users_df.iterrows():
-    if random.random() < 0.1:
-        role_perm_ids = role_perm_map.get(user["role_id"], set())
-        candidate_ids = [pid for pid in permission_ids if pid not in role_perm_ids]
-        if candidate_ids:
-            for pid in random.sample(candidate_ids, k=min(len(candidate_ids), random.randint(1, 3))):
-                additional_rows.append({"user_id": user["id"], "permission_id": pid})
-
-additional_df = pd.DataFrame(additional_rows)
-user_additional_v2 = pd.concat([user_additional_permissions, additional_df], ignore_index=True)
-user_additional_v2 = user_additional_v2.drop_duplicates()
-user_additional_v2.to_csv(f"user_additional_permissions{OUTPUT_SUFFIX}.csv", index=False)
+def role_permission_matrix(base: dict, permission_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Role ids, and a (role x permission) boolean matrix of role grants."""
+    role_ids = np.union1d(base["roles"]["id"].to_numpy(), base["role_permissions"]["role_id"].to_numpy())
+    grants = np.zeros((len(role_ids), len(permission_ids)), dtype=bool)
+    rp = base["role_permissions"]
+    known = np.isin(rp["permission_id"], permission_ids)
+    grants[np.searchsorted(role_ids, rp["role_id"][known]), np.searchsorted(permission_ids, rp["permission_id"][known])] = True
+    return role_ids, grants
+
+
+def generate_additional(
+    new_users: pd.DataFrame, role_ids: np.ndarray, grants: np.ndarray, permission_ids: np.ndarray, rng
+) -> pd.DataFrame:
+    """1-3 permissions outside their role for ~10% of the new users."""
+    chosen = np.flatnonzero(rng.random(len(new_users)) < ADDITIONAL_PERMISSION_RATE)
+    role_rows = np.searchsorted(role_ids, new_users["role_id"].to_numpy()[chosen])
+    # Random sort keys; permissions the role already grants sort last.
+    keys = rng.random((len(chosen), len(permission_ids)))
+    keys[grants[role_rows]] = np.inf
+    order = np.argsort(keys, axis=1)
+    wanted = np.minimum(rng.integers(1, 4, len(chosen)), (~grants[role_rows]).sum(axis=1))
+    take = np.arange(len(permission_ids)) < wanted[:, None]
+    return pd.DataFrame({
+        "user_id": np.repeat(new_users["id"].to_numpy()[chosen], wanted),
+        "permission_id": permission_ids[order[take]],
+    })
+
 
 # ------------------------
 # USER ASSIGNED PATIENTS
 # ------------------------
-existing_patient_ids = user_assigned_patients["patient_id"] if "patient_id" in user_assigned_patients.columns else []
-start_patient_id = next_numeric(existing_patient_ids)
-patient_counter = start_patient_id
-
-patient_rows = []
-for _, user in new_users_df.iterrows():
-    role_name = role_name_by_id.get(user["role_id"], "")
-    if role_name in {"Doctor", "Nurse"}:
-        for _ in range(random.randint(1, 5)):
-            patient_id = f"P{patient_counter:05d}"
-            patient_rows.append({"user_id": user["id"], "patient_id": patient_id})
-            patient_counter += 1
-
-patients_df = pd.DataFrame(patient_rows)
-user_assigned_patients_v2 = pd.concat([user_assigned_patients, patients_df], ignore_index=True)
-user_assigned_patients_v2 = user_assigned_patients_v2.drop_duplicates()
-user_assigned_patients_v2.to_csv(f"user_assigned_patients{OUTPUT_SUFFIX}.csv", index=False)
+def generate_patients(new_users: pd.DataFrame, base: dict, rng: np.random.Generator) -> pd.DataFrame:
+    """1-5 newly numbered patients for each new doctor and nurse."""
+    role_name_by_id = base["roles"].set_index("id")["name"]
+    carers = new_users[new_users["role_id"].map(role_name_by_id).isin(PATIENT_ROLES)]
+    counts = rng.integers(1, 6, len(carers))
+    patients = base["user_assigned_patients"]
+    start = next_numeric(patients["patient_id"]) if "patient_id" in patients.columns else 0
+    return pd.DataFrame({
+        "user_id": np.repeat(carers["id"].to_numpy(), counts),
+        "patient_id": formatted("P", start + np.arange(counts.sum()), 5),
+    })
+
 
 # ------------------------
 # AUDIT LOGS
 # ------------------------
-permission_lookup = permissions.set_index("id")[["resource_type", "action"]].to_dict("index")
-
-def permissions_for_user(user_row):
-    role_perm_ids = role_perm_map.get(user_row["role_id"], set())
-    user_perm_ids = user_additional_v2[user_additional_v2["user_id"] == user_row["id"]]["permission_id"].tolist()
-    return set(role_perm_ids).union(user_perm_ids)
-
-user_perm_cache = {row["id"]: permissions_for_user(row) for _, row in users_v2.iterrows()}
-
-start_log_id = (audit_logs["id"].max() + 1) if "id" in audit_logs.columns and not audit_logs.empty else 1
-start_time = datetime.now() - timedelta(days=90)
-
-ip_samples = ["10.0.0.10", "10.0.1.11", "172.19.0.1", "192.168.1.20"]
-agent_samples = ["PostmanRuntime/7.51.0", "Mozilla/5.0", "okhttp/4.11.0"]
-
-log_rows = []
-for i in range(ADD_LOGS):
-    user = users_v2.sample(1).iloc[0]
-    perm_ids = list(user_perm_cache.get(user["id"], set()))
-    allow = random.random() < 0.85 and bool(perm_ids)
-
-    if allow:
-        pid = random.choice(perm_ids)
-        deny_reason = None
-        policy_id = "ALLOW_DEFAULT"
-        risk_score = 0
-    else:
-        candidate_ids = [pid for pid in permission_ids if pid not in perm_ids]
-        pid = random.choice(candidate_ids) if candidate_ids else random.choice(permission_ids)
-        deny_reason = "NOT_ALLOWED"
-        policy_id = "DENY_POLICY"
-        risk_score = 3
-
-    res = permission_lookup[pid]["resource_type"]
-    act = permission_lookup[pid]["action"]
-    resource_id = f"{res[:3].upper()}-{random.randint(10000, 99999)}"
-
-    log_rows.append(
-        {
-            "id": start_log_id + i,
-            "user_id": user["user_id"],
-            "resource_type": res,
-            "resource_id": resource_id,
-            "action": act,
-            "allowed": allow,
-            "policy_id": policy_id,
-            "deny_reasons": deny_reason,
-            "risk_score": risk_score,
-            "timestamp": (start_time + timedelta(minutes=random.randint(0, 60 * 24 * 90))).isoformat(
-                sep=" ",
-                timespec="microseconds",
+class PermissionSampler:
+    """Per-user assigned and missing permissions as CSR-style integer arrays.
+
+    ``assigned[assigned_ptr[u]:assigned_ptr[u + 1]]`` are the permission
+    indexes user ``u`` holds; ``missing`` is laid out the same way for the
+    ones they lack.
+    """
+
+    def __init__(self, held: np.ndarray):
+        self.assigned_ptr, self.assigned = self._csr(held)
+        self.missing_ptr, self.missing = self._csr(~held)
+        self.n_permissions = held.shape[1]
+
+    @staticmethod
+    def _csr(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rows, columns = np.nonzero(matrix)
+        ptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=matrix.shape[0]), out=ptr[1:])
+        return ptr, columns.astype(np.int32)
+
+    @staticmethod
+    def _pick(ptr, indices, users, rng) -> np.ndarray:
+        counts = ptr[users + 1] - ptr[users]
+        offsets = (rng.random(len(users)) * counts).astype(np.int64)
+        return indices[np.minimum(ptr[users] + offsets, len(indices) - 1)] if len(indices) else offsets
+
+    def sample(self, users: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """A permission index per event and whether it was allowed (a held permission)."""
+        holds_any = self.assigned_ptr[users + 1] > self.assigned_ptr[users]
+        allowed = (rng.random(len(users)) < ALLOW_RATE) & holds_any
+        lacks_any = self.missing_ptr[users + 1] > self.missing_ptr[users]
+        permission = np.where(
+            allowed,
+            self._pick(self.assigned_ptr, self.assigned, users, rng),
+            np.where(
+                lacks_any,
+                self._pick(self.missing_ptr, self.missing, users, rng),
+                rng.integers(0, self.n_permissions, len(users)),
             ),
-            "ip_address": random.choice(ip_samples),
-            "user_agent": random.choice(agent_samples),
-        }
+        )
+        return permission, allowed
+
+
+def held_permissions(users: pd.DataFrame, additional: pd.DataFrame, role_ids, grants, permission_ids) -> np.ndarray:
+    """(user x permission) boolean matrix of role grants plus additional permissions."""
+    role_rows = np.searchsorted(role_ids, users["role_id"].to_numpy())
+    role_rows = np.minimum(role_rows, len(role_ids) - 1)
+    has_role = role_ids[role_rows] == users["role_id"].to_numpy()
+    held = grants[role_rows] & has_role[:, None]
+    user_rows = pd.Index(users["id"]).get_indexer(additional["user_id"])
+    permission_rows = np.searchsorted(permission_ids, additional["permission_id"].to_numpy())
+    permission_rows = np.minimum(permission_rows, len(permission_ids) - 1)
+    keep = (user_rows >= 0) & (permission_ids[permission_rows] == additional["permission_id"].to_numpy())
+    held[user_rows[keep], permission_rows[keep]] = True
+    return held
+
+
+def generate_log_block(
+    block: int, rows: int, first_id: int, user_ids: np.ndarray, sampler: PermissionSampler,
+    permissions: pd.DataFrame, start: np.datetime64, seed: int,
+) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, LOGS_STREAM, block])
+    users = rng.integers(0, len(user_ids), rows)
+    permission, allowed = sampler.sample(users, rng)
+    resource_type = permissions["resource_type"].to_numpy(dtype=object)[permission]
+    prefixes = permissions["resource_type"].astype(str).str[:3].str.upper().to_numpy(dtype=object)
+    minutes = rng.integers(0, 60 * 24 * LOG_WINDOW_DAYS + 1, rows).astype("timedelta64[m]")
+    return pd.DataFrame({
+        "id": first_id + np.arange(rows),
+        "user_id": user_ids[users],
+        "resource_type": resource_type,
+        "resource_id": prefixes[permission] + "-" + rng.integers(10000, 100000, rows).astype(str).astype(object),
+        "action": permissions["action"].to_numpy(dtype=object)[permission],
+        "allowed": allowed,
+        "policy_id": np.where(allowed, "ALLOW_DEFAULT", "DENY_POLICY"),
+        "deny_reasons": np.where(allowed, None, "NOT_ALLOWED"),
+        "risk_score": np.where(allowed, 0, 3),
+        "timestamp": start + minutes,
+        "ip_address": IP_SAMPLES[rng.integers(0, len(IP_SAMPLES), rows)],
+        "user_agent": AGENT_SAMPLES[rng.integers(0, len(AGENT_SAMPLES), rows)],
+    })
+
+
+def load_base(source_dir: Path) -> dict:
+    names = [
+        "users", "roles", "permissions", "role_permissions",
+        "user_additional_permissions", "user_assigned_patients", "audit_logs",
+    ]
+    base = {name: pd.read_csv(source_dir / f"{name}.csv") for name in names}
+    base["audit_logs"]["timestamp"] = pd.to_datetime(base["audit_logs"]["timestamp"], format="mixed")
+    return base
+
+
+def generate(
+    source_dir: Path, output_dir: Path, users: int, logs: int, suffix: str = "_v2", seed: int = 42,
+    fmt: str = "csv", end: pd.Timestamp | None = None,
+) -> dict[str, Path]:
+    """Write the extended tables; returns their paths by table name.
+
+    New events fall in the LOG_WINDOW_DAYS days before ``end`` (default: the
+    newest base audit event), and new users are created at ``end``.
+    """
+    base = load_base(source_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if end is None:
+        end = base["audit_logs"]["timestamp"].max() if len(base["audit_logs"]) else pd.Timestamp("2026-01-01")
+    created_at = end.strftime(TIMESTAMP_FORMAT)
+    written = {}
+
+    new_users = generate_users(base, users, np.random.default_rng([seed, USERS_STREAM]), created_at)
+    all_users = pd.concat([base["users"].drop(columns=["password"], errors="ignore"), new_users], ignore_index=True)
+    written["users"] = write_table(all_users, output_dir / f"users{suffix}", fmt)
+
+    permissions = base["permissions"].sort_values("id").reset_index(drop=True)
+    permission_ids = permissions["id"].to_numpy()
+    role_ids, grants = role_permission_matrix(base, permission_ids)
+    additional = generate_additional(
+        new_users, role_ids, grants, permission_ids, np.random.default_rng([seed, ADDITIONAL_STREAM])
+    )
+    additional = pd.concat([base["user_additional_permissions"], additional], ignore_index=True).drop_duplicates()
+    written["user_additional_permissions"] = write_table(
+        additional, output_dir / f"user_additional_permissions{suffix}", fmt
+    )
+
+    patients = generate_patients(new_users, base, np.random.default_rng([seed, PATIENTS_STREAM]))
+    patients = pd.concat([base["user_assigned_patients"], patients], ignore_index=True).drop_duplicates()
+    written["user_assigned_patients"] = write_table(patients, output_dir / f"user_assigned_patients{suffix}", fmt)
+
+    sampler = PermissionSampler(held_permissions(all_users, additional, role_ids, grants, permission_ids))
+    user_ids = all_users["user_id"].to_numpy(dtype=object)
+    del all_users, additional, patients, new_users
+    start = np.datetime64(end - pd.Timedelta(days=LOG_WINDOW_DAYS), "us")
+    first_id = int(base["audit_logs"]["id"].max()) + 1 if len(base["audit_logs"]) else 1
+
+    writer = TableWriter(output_dir / f"audit_logs{suffix}", fmt)
+    if len(base["audit_logs"]):
+        writer.write(base["audit_logs"])
+    for block, offset in enumerate(range(0, logs, ROWS_PER_BLOCK)):
+        rows = min(ROWS_PER_BLOCK, logs - offset)
+        writer.write(generate_log_block(block, rows, first_id + offset, user_ids, sampler, permissions, start, seed))
+    writer.close()
+    written["audit_logs"] = writer.path
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500, help="users to add")
+    parser.add_argument("--logs", type=int, default=5000, help="audit events to add")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--suffix", default="_v2")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--source-dir", type=Path, default=Path("."))
+    parser.add_argument("--output-dir", type=Path, default=Path("."))
+    parser.add_argument("--end", type=pd.Timestamp, help="end of the event window (default: newest base event)")
+    args = parser.parse_args()
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+
+    started = time.perf_counter()
+    written = generate(
+        args.source_dir, args.output_dir, args.users, args.logs, args.suffix, args.seed, args.format, args.end
     )
+    print(f"Dataset {args.suffix.lstrip('_') or 'base'} generated in {time.perf_counter() - started:.1f}s:")
+    for path in written.values():
+        print(f"- {path}")
 
-logs_df = pd.DataFrame(log_rows)
-audit_logs_v2 = pd.concat([audit_logs, logs_df], ignore_index=True)
-audit_logs_v2.to_csv(f"audit_logs{OUTPUT_SUFFIX}.csv", index=False)
 
-print("Dataset v2 generated:")
-print(f"- users{OUTPUT_SUFFIX}.csv")
-print(f"- user_additional_permissions{OUTPUT_SUFFIX}.csv")
-print(f"- user_assigned_patients{OUTPUT_SUFFIX}.csv")
-print(f"- audit_logs{OUTPUT_SUFFIX}.csv")
+if __name__ == "__main__":
+    main()
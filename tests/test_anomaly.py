@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from policy.anomaly import ROLE_ALLOWED_RESOURCES, ScoredAuditLog
+from policy.ingest import RecentEventBuffer
+
+
+def test_vectorized_scores_match_rowwise_rules() -> None:
+    users = pd.DataFrame({"user_id": ["U1", "U2", "U3"], "role": ["Doctor", "HR", "Manager"]})
+    logs = pd.DataFrame({
+        "user_id": ["U1", "U1", "U2", "U3", "anonymous", "U2"],
+        "resource_type": ["MedicalRecord", "Invoice", "StaffProfile", "StaffProfile", "Authentication", "Unknown"],
+        "allowed": [True, False, True, True, False, None],
+        "timestamp": [
+            "2026-01-14 09:00:00", "2026-01-14 22:00:00", "2026-01-14 18:59:00",
+            "2026-01-14 07:59:00", "2026-01-14 12:00:00", "not a timestamp",
+        ],
+    })
+
+    merged = logs.merge(users, on="user_id", how="left")
+    hour = pd.to_datetime(merged["timestamp"], errors="coerce").dt.hour
+    unexpected = merged.apply(
+        lambda row: row["resource_type"] not in ROLE_ALLOWED_RESOURCES.get(row["role"], []), axis=1
+    )
+    expected = unexpected.astype(int) * 3 + (~hour.between(8, 18)).astype(int) * 2 + (merged["allowed"] == False).astype(int)
+
+    scored = ScoredAuditLog(logs, users)
+    np.testing.assert_array_equal(scored.risk_score, expected.to_numpy())
+    for threshold in range(0, 8):
+        assert scored.count(threshold) == int((expected >= threshold).sum())
+        assert scored.sample_rows(threshold, limit=2).tolist() == np.flatnonzero(expected >= threshold)[:2].tolist()
+
+
+def test_extend_matches_single_scoring() -> None:
+    rng = np.random.default_rng(0)
+    n = 3000
+    users = pd.DataFrame({"user_id": ["U1", "U2", "U3"], "role": ["Doctor", "HR", "Manager"]})
+    logs = pd.DataFrame({
+        "user_id": rng.choice(["U1", "U2", "U3", "anonymous"], n),
+        "resource_type": rng.choice(["MedicalRecord", "Invoice", "StaffProfile"], n),
+        "allowed": rng.random(n) < 0.7,
+        "timestamp": pd.Timestamp("2026-01-14") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+    })
+    full = ScoredAuditLog(logs, users)
+    scored = ScoredAuditLog(logs.iloc[:1000], users)
+    scored.sample_rows(7, limit=5)
+    for start in range(1000, n, 400):
+        scored.extend(logs.iloc[start:start + 400])
+
+    assert len(scored) == n
+    np.testing.assert_array_equal(scored.risk_score, full.risk_score)
+    for threshold in range(0, 8):
+        assert scored.count(threshold) == full.count(threshold)
+        assert scored.sample_rows(threshold, limit=5).tolist() == full.sample_rows(threshold, limit=5).tolist()
+        pd.testing.assert_frame_equal(
+            scored.samples(threshold).reset_index(drop=True), full.samples(threshold).reset_index(drop=True)
+        )
+
+
+def test_recent_event_buffer_scores_and_counts_incrementally() -> None:
+    buffer = RecentEventBuffer(pd.Series({"U1": "Doctor"}), maxlen=2)
+    event = {"user_id": "U1", "resource_type": "Invoice", "allowed": False, "timestamp": "2026-01-14 23:00:00"}
+    scores = buffer.ingest([dict(event), dict(event, resource_type="MedicalRecord", allowed=True)])
+    buffer.ingest([dict(event, timestamp="2026-01-14 10:00:00")])
+
+    assert scores.tolist() == [6, 2]
+    assert len(buffer.events) == 2
+    assert buffer.ingested == 3
+    assert buffer.count(0) == 2
+    assert buffer.count(4) == 1
+    assert [e["risk_score"] for e in buffer.samples(3)] == [4]
+
+    buffer.ingest([dict(event) for _ in range(3)])
+    assert buffer.ingested == 6
+    assert buffer.count(0) == buffer.count(6) == 2
+
+
+def test_recent_event_buffer_counts_loaded_events_once() -> None:
+    buffer = RecentEventBuffer(pd.Series({"U1": "Doctor"}))
+    event = {"user_id": "U1", "resource_type": "Invoice", "allowed": False, "timestamp": "2026-01-14 23:00:00"}
+    scores = buffer.ingest([dict(event, id=5), dict(event, id=11), dict(event, id=12), dict(event, id=None)], loaded_through=10)
+
+    assert scores.tolist() == [6, 6, 6, 6]
+    assert [e["id"] for e in buffer.events] == [11, 12, None]
+    assert buffer.discard(pd.Series([12, 13])) == 1
+    assert [e["id"] for e in buffer.events] == [11, None]
+    assert buffer.count(0) == 2
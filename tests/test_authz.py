@@ -0,0 +1,94 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from policy.authz import DEFAULT_DECISION, PolicyEngine, load_tables
+from policy.startup import READY
+
+ROOT = Path(__file__).resolve().parents[1]
+# Input documents with the decision emr_authz.rego should produce, worked out
+# by hand from the rules. Denials also list the rule values behind them.
+CASES = json.loads((ROOT / "tests" / "authz_conformance.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def engine() -> PolicyEngine:
+    return PolicyEngine.from_file(ROOT / "emr_authz.rego")
+
+
+def test_tables_are_read_from_the_policy() -> None:
+    tables = load_tables(ROOT / "emr_authz.rego")
+
+    assert tables["role_perms"]["Doctor"]["Prescription"] == {"read", "create", "update", "approve"}
+    assert tables["role_perms"]["Nurse"]["LabResult"] == {"read"}
+    assert len(tables["role_perms"]) == 8
+    assert tables["high_risk_actions"] == {"export", "delete"}
+    assert tables["high_risk_resources"] == {"MedicalRecord", "AuditLog", "AccessPolicy", "SystemConfig"}
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_conformance(engine: PolicyEngine, case: dict) -> None:
+    rules = engine.evaluate(case["input"])
+
+    assert engine.decide(case["input"]) == case["decision"]
+    assert rules["allow"] == case["decision"]["allow"]
+    if not case["decision"]["allow"]:
+        assert rules["deny_reasons"] == case["deny_reasons"]
+        assert rules["risk_score"] == case["risk_score"]
+
+
+def test_batch_matches_single_decisions(engine: PolicyEngine) -> None:
+    requests = [case["input"] for case in CASES]
+
+    assert engine.decide_batch(requests) == [engine.decide(request) for request in requests]
+
+
+def test_malformed_input_is_denied(engine: PolicyEngine) -> None:
+    for request in [{}, {"subject": None}, {"subject": {"role": ["Doctor"]}, "resource": {"type": {}}, "action": 1}]:
+        assert engine.decide(request) == DEFAULT_DECISION
+
+
+@pytest.fixture(scope="module")
+def client(engine: PolicyEngine):
+    sys.path.insert(0, str(ROOT))
+    api = pytest.importorskip("api")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(api, "authz_engine", engine)
+        patch.setitem(api.startup.status, "authz", READY)
+        patch.setattr(api, "AUTHZ_BATCH_MAX_SIZE", 3)
+        # No lifespan: nothing else is loaded.
+        yield TestClient(api.app)
+
+
+def test_decide_endpoint(engine: PolicyEngine, client) -> None:
+    document = CASES[0]["input"]
+
+    single = client.post("/authz/decide", params={"explain": "true"}, json=document)
+    assert single.status_code == 200
+    assert single.json()["decision"] == engine.decide(document)
+    assert single.json()["explain"]["allow"] == engine.evaluate(document)["allow"]
+
+    batch = client.post("/authz/decide", json=[document, document])
+    assert batch.json()["decisions"] == [engine.decide(document)] * 2
+
+
+def test_decide_endpoint_accepts_numeric_ids_and_unknown_fields(engine: PolicyEngine, client) -> None:
+    document = {
+        "subject": {"user_id": 7, "role": "Doctor", "branch": "CN_HN", "assigned_patients": [1, 2], "title": "Dr"},
+        "resource": {"type": "MedicalRecord", "branch": "CN_HN", "patient_id": 2, "ward": "A"},
+        "action": "read",
+        "environment": {"hour": 10},
+    }
+
+    response = client.post("/authz/decide", json=document)
+    assert response.status_code == 200
+    assert response.json() == engine.decide(document)
+    assert response.json()["allow"]
+
+
+def test_decide_endpoint_checks_the_batch_size_before_validation(client) -> None:
+    assert client.post("/authz/decide", json=[{"subject": "not a subject"}] * 4).status_code == 413
+    assert client.post("/authz/decide", json=[{"subject": "not a subject"}] * 3).status_code == 422
@@ -0,0 +1,54 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from policy.batching import MicroBatcher
+
+
+def fake_predict(calls: list):
+    def predict(bundle, df: pd.DataFrame) -> np.ndarray:
+        calls.append((bundle, len(df)))
+        return np.column_stack([df["x"].to_numpy() * bundle, df["x"].to_numpy() + 0.5])
+    return predict
+
+
+def test_concurrent_calls_share_one_prediction() -> None:
+    calls = []
+    batcher = MicroBatcher(fake_predict(calls), max_wait_ms=200, max_batch=64)
+    frames = [pd.DataFrame({"x": [i % 5, 7]}) for i in range(12)]
+    results = [None] * len(frames)
+
+    def call(i: int) -> None:
+        results[i] = batcher.predict(2, frames[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(frames))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    for frame, scores in zip(frames, results):
+        np.testing.assert_array_equal(scores, np.column_stack([frame["x"] * 2, frame["x"] + 0.5]))
+    # Identical rows across requests are scored once.
+    assert sum(rows for _, rows in calls) == batcher.unique_rows <= 6
+    stats = batcher.stats()
+    assert stats["requests"] == 12 and stats["rows"] == 24
+    assert stats["batch_size"]["count"] == stats["batches"] == len(calls) < 12
+
+
+def test_errors_reach_every_caller_and_large_calls_skip_the_queue() -> None:
+    def failing(bundle, df):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(failing, max_wait_ms=1, max_batch=4)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        batcher.predict(1, pd.DataFrame({"x": [1]}))
+    batcher.stop()
+
+    calls = []
+    direct = MicroBatcher(fake_predict(calls), max_batch=4)
+    direct.predict(1, pd.DataFrame({"x": range(4)}))
+    assert calls == [(1, 4)] and direct._thread is None
@@ -0,0 +1,28 @@
+from policy.cache import ProfileCache
+
+
+def test_lru_eviction_and_counters() -> None:
+    cache = ProfileCache(maxsize=2)
+    cache.put(("a",), "v1", 1)
+    cache.put(("b",), "v1", 2)
+    assert cache.get(("a",), "v1") == 1
+    cache.put(("c",), "v1", 3)
+
+    assert cache.get(("b",), "v1") is None
+    assert cache.get(("c",), "v1") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_model_version_change_invalidates() -> None:
+    cache = ProfileCache(maxsize=8)
+    cache.put(("a",), "v1", 1)
+    assert cache.get(("a",), "v2") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_ttl_expiry() -> None:
+    cache = ProfileCache(maxsize=8, ttl_seconds=-1)
+    cache.put(("a",), "v1", 1)
+    assert cache.get(("a",), "v1") is None
+    assert cache.stats()["expirations"] == 1
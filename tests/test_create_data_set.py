@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pandas as pd
+
+import create_data_set_v2
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_generator_is_deterministic_and_consistent(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(create_data_set_v2, "ROWS_PER_BLOCK", 400)
+    first = create_data_set_v2.generate(ROOT, tmp_path / "a", users=60, logs=1000, suffix="_t", seed=7)
+    second = create_data_set_v2.generate(ROOT, tmp_path / "b", users=60, logs=1000, suffix="_t", seed=7)
+    for table, path in first.items():
+        assert path.read_bytes() == second[table].read_bytes()
+
+    base_users = pd.read_csv(ROOT / "users.csv")
+    users = pd.read_csv(first["users"])
+    logs = pd.read_csv(first["audit_logs"])
+    assert len(users) == len(base_users) + 60 and users["user_id"].is_unique
+    assert len(logs) == len(pd.read_csv(ROOT / "audit_logs.csv")) + 1000 and logs["id"].is_unique
+
+    # Allowed events use a permission the user holds (through the role or an additional grant).
+    permissions = pd.read_csv(ROOT / "permissions.csv").rename(columns={"id": "permission_id"})
+    role_grants = users[["user_id", "role_id"]].merge(pd.read_csv(ROOT / "role_permissions.csv"), on="role_id")
+    extra = pd.read_csv(first["user_additional_permissions"]).rename(columns={"user_id": "id"})
+    extra = extra.merge(users[["id", "user_id"]], on="id")
+    held = pd.concat([role_grants, extra])[["user_id", "permission_id"]].merge(permissions, on="permission_id")
+    held = set(zip(held["user_id"], held["resource_type"], held["action"]))
+    new = logs.tail(1000)
+    is_held = [event in held for event in zip(new["user_id"], new["resource_type"], new["action"])]
+    assert (pd.Series(is_held, index=new.index) == new["allowed"]).all()
+    assert 0.75 < new["allowed"].mean() < 0.95
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from policy.db import AUDIT_LOG_COLUMNS, read_audit_logs, window_start
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def audit_db(tmp_path):
+    logs = pd.read_csv(ROOT / "audit_logs.csv", parse_dates=["timestamp"])
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    logs.to_sql("audit_logs", engine, index=False)
+    return engine, logs
+
+
+def test_chunked_read_projects_columns_and_pushes_down_window(audit_db) -> None:
+    engine, logs = audit_db
+    since = window_start(3, now=logs["timestamp"].max())
+
+    loaded = read_audit_logs(engine, since=since, chunk_size=50)
+
+    expected = logs[logs["timestamp"] >= since].reset_index(drop=True)
+    assert 50 < len(expected) < len(logs)
+    assert list(loaded.columns) == list(AUDIT_LOG_COLUMNS)
+    assert isinstance(loaded["user_id"].dtype, pd.CategoricalDtype)
+    for column in AUDIT_LOG_COLUMNS:
+        pd.testing.assert_series_equal(
+            loaded[column].astype(object), expected[column].astype(object), check_names=False
+        )
+
+
+def test_success_column_is_read_as_allowed(audit_db) -> None:
+    engine, logs = audit_db
+    logs.rename(columns={"allowed": "success"}).to_sql("audit_logs", engine, index=False, if_exists="replace")
+
+    loaded = read_audit_logs(engine, chunk_size=1000)
+
+    assert loaded["allowed"].tolist() == logs["allowed"].tolist()
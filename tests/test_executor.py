@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+import pytest
+
+from policy.executor import ExecutorSaturatedError, ExecutorUnavailableError, InferenceExecutor
+
+STATE = {"value": "initial"}
+
+
+def load_state(state: dict) -> None:
+    STATE.update(state)
+
+
+def read_state(suffix: str) -> tuple[str, int]:
+    return STATE["value"] + suffix, os.getpid()
+
+
+def append_state(suffix: str) -> None:
+    STATE["value"] += suffix
+
+
+def test_bounded_admission_rejects_when_queue_is_full() -> None:
+    executor = InferenceExecutor("inline", workers=1, queue_size=1)
+    release = threading.Event()
+    started = threading.Barrier(2)
+
+    def block():
+        started.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=executor.run, args=(block,))]
+    threads[0].start()
+    started.wait()
+    threads.append(threading.Thread(target=executor.run, args=(lambda: None,)))
+    threads[1].start()
+    while executor.in_flight < 2:
+        pass
+    with pytest.raises(ExecutorSaturatedError):
+        executor.run(lambda: None)
+    assert executor.stats()["queue_depth"] == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    stats = executor.stats()
+    assert (stats["completed"], stats["rejected"], stats["in_flight"]) == (2, 1, 0)
+    assert stats["wait"]["max_ms"] > 0
+
+
+def test_process_workers_load_a_snapshot_and_follow_updates() -> None:
+    executor = InferenceExecutor(
+        "process", workers=2, queue_size=4, initializer=load_state, snapshot=lambda: dict(STATE, value="snapshot")
+    )
+    try:
+        value, pid = executor.run(read_state, "!")
+        assert value == "snapshot!" and pid != os.getpid()
+
+        executor.update(append_state, "+1")
+        assert STATE["value"] == "initial+1"
+        assert {executor.run(read_state, "")[0] for _ in range(4)} == {"snapshot+1"}
+
+        executor.invalidate()
+        assert executor.run(read_state, "")[0] == "snapshot"
+        stats = executor.stats()
+        assert (stats["pools_started"], stats["updates"]) == (2, 1)
+    finally:
+        STATE["value"] = "initial"
+        executor.shutdown()
+
+
+def test_timed_out_task_keeps_its_slot_until_it_finishes() -> None:
+    executor = InferenceExecutor("process", workers=1, queue_size=0, timeout_seconds=0.5)
+    try:
+        executor.run(read_state, "")  # start the worker outside the timed task
+        with pytest.raises(ExecutorUnavailableError):
+            executor.run(time.sleep, 2)
+        with pytest.raises(ExecutorSaturatedError):
+            executor.run(read_state, "")
+        deadline = time.monotonic() + 10
+        while executor.in_flight and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert executor.run(read_state, "")[0] == "initial"
+    finally:
+        executor.shutdown()
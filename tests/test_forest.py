@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from policy.forest import CompiledForest, positive_scores
+
+
+def test_per_label_forest_matches_sklearn(tiny_model, test_split) -> None:
+    X, _ = test_split
+    compiled = CompiledForest.from_pipeline(tiny_model)
+    unseen = X.head(3).assign(department="Unknown_Department", has_license_binary=[0, 1, 1])
+    frame = pd.concat([X, unseen], ignore_index=True)
+    np.testing.assert_allclose(compiled.predict_scores(frame), positive_scores(tiny_model, frame), atol=1e-12)
+
+
+def test_multi_output_forest_and_single_class_labels(tiny_model, test_split) -> None:
+    X, Y = test_split
+    Y = Y.assign(**{Y.columns[0]: 0, Y.columns[1]: 1})
+    model = Pipeline(steps=[
+        ("preprocess", clone(tiny_model.named_steps["preprocess"])),
+        ("classifier", RandomForestClassifier(n_estimators=5, random_state=0)),
+    ]).fit(X, Y)
+    compiled = CompiledForest.from_pipeline(model)
+    expected = positive_scores(model, X)
+    assert (expected[:, 0] == 0).all() and (expected[:, 1] == 1).all()
+    np.testing.assert_allclose(compiled.predict_scores(X), expected, atol=1e-12)
+
+    per_label = clone(tiny_model).fit(X, Y)
+    np.testing.assert_allclose(
+        CompiledForest.from_pipeline(per_label).predict_scores(X), positive_scores(per_label, X), atol=1e-12
+    )
+
+
+def test_trees_wider_than_one_word(tiny_model) -> None:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "role": rng.choice([f"r{i}" for i in range(12)], 3000),
+        "department": rng.choice([f"d{i}" for i in range(12)], 3000),
+        "branch": rng.choice(["b0", "b1", "b2"], 3000),
+        "position": rng.choice(["p0", "p1"], 3000),
+        "employment_type": "FullTime",
+        "license": rng.choice(["Yes", "No"], 3000),
+        "seniority": rng.choice(["Junior", "Senior"], 3000),
+        "has_license_binary": rng.integers(0, 2, 3000),
+    })
+    Y = pd.DataFrame(rng.integers(0, 2, (3000, 3)), columns=["a", "b", "c"])
+    model = clone(tiny_model).fit(X, Y)
+    compiled = CompiledForest.from_pipeline(model)
+    assert compiled.words > 1
+    np.testing.assert_allclose(compiled.predict_scores(X), positive_scores(model, X), atol=1e-12)
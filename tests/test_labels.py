@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from policy.labels import label_matrix
+
+
+def test_label_matrix_matches_dense_pivot() -> None:
+    users = pd.DataFrame({"user_id": ["U3", "U1", "U2", "U4"]})
+    permissions = pd.DataFrame({
+        "user_id": ["U1", "U1", "U1", "U3", "U9", "U2"],
+        "label": ["Bill_read", "Appointment_read", "Bill_read", "Appointment_create", "Audit_read", None],
+    })
+
+    matrix, labels = label_matrix(users["user_id"], permissions)
+
+    label_df = (
+        permissions.assign(value=1)
+        .pivot_table(index="user_id", columns="label", values="value", fill_value=0)
+        .reset_index()
+    )
+    expected = users.merge(label_df, on="user_id", how="left").fillna(0)
+    assert labels == [c for c in label_df.columns if c != "user_id"]
+    np.testing.assert_array_equal(matrix.toarray(), expected[labels].to_numpy())
@@ -0,0 +1,23 @@
+import numpy as np
+
+from policy.lookup import LookupTable
+
+
+def test_lookup_matches_live_model(tiny_model, test_split, tmp_path) -> None:
+    X, _ = test_split
+    table = LookupTable.build(tiny_model, list(X.columns), version="v1")
+    path = tmp_path / "table.npz"
+    table.save(path)
+    table = LookupTable.load(path)
+
+    live = np.column_stack([p[:, 1] for p in tiny_model.predict_proba(X)])
+    looked_up = np.array([table.lookup(tuple(row)) for row in X.itertuples(index=False)])
+    np.testing.assert_array_equal(looked_up, live)
+
+
+def test_unseen_category_misses(tiny_model, test_split) -> None:
+    X, _ = test_split
+    table = LookupTable.build(tiny_model, list(X.columns), version="v1")
+    row = list(X.iloc[0])
+    row[1] = "Unknown_Department"
+    assert table.lookup(tuple(row)) is None
@@ -0,0 +1,88 @@
+import threading
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from policy import metrics
+from policy.metrics import MetricsMiddleware, MetricsRegistry, collect, count, gauge, replay, span
+
+
+def sample(name: str, **labels) -> float:
+    lines = metrics.REGISTRY.render().splitlines()
+    prefix = name + ("{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else "")
+    values = [float(line.rsplit(" ", 1)[1]) for line in lines if line.startswith(prefix + " ")]
+    return values[0] if values else 0.0
+
+
+def test_registry_renders_prometheus_text() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("path",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    registry.add_collector(lambda: [gauge("depth", "Queue depth.", 3, queue='a"b')])
+    requests.inc(path="/x")
+    requests.inc(2, path="/x")
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{path="/x"} 3',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 0',
+        'latency_seconds_bucket{le="1"} 1',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_sum 5.5",
+        "latency_seconds_count 2",
+        "# HELP depth Queue depth.",
+        "# TYPE depth gauge",
+        'depth{queue="a\\"b"} 3',
+    ]
+
+
+def test_spans_are_recorded_per_endpoint_and_replayed_from_workers() -> None:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    def worker_task() -> list:
+        # What an executor worker does: hold the spans for the submitting request.
+        with collect() as collected:
+            with span("predict"):
+                count("profiles_scored", 4)
+        return collected
+
+    @app.get("/score")
+    def score():
+        with span("normalize"):
+            pass
+        result = []
+        thread = threading.Thread(target=lambda: result.append(worker_task()))
+        thread.start()
+        thread.join()
+        replay(result[0])
+        return {"ok": True}
+
+    @app.get("/fail")
+    def fail():
+        raise HTTPException(status_code=503)
+
+    client = TestClient(app)
+    before = sample("policy_profiles_scored_total", endpoint="/score")
+    assert client.get("/score").status_code == 200
+    client.get("/fail")
+    client.get("/missing/123")
+
+    assert sample("policy_profiles_scored_total", endpoint="/score") == before + 4
+    for stage in ("normalize", "predict"):
+        assert sample("policy_stage_duration_seconds_count", endpoint="/score", stage=stage) >= 1
+    assert sample("policy_request_errors_total", endpoint="/fail") >= 1
+    assert sample("policy_requests_total", endpoint="other", status="404") >= 1
+    assert sample("policy_request_duration_seconds_count", endpoint="/score") >= 1
+
+
+def test_spans_outside_a_request_are_dropped() -> None:
+    before = metrics.REGISTRY.render()
+    with span("startup"):
+        count("rows_scanned", 10)
+    assert metrics.REGISTRY.render() == before
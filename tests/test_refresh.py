@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from policy.refresh import AuditLogRefresher, CsvAuditTail, DatabaseAuditSource
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def logs() -> pd.DataFrame:
+    return pd.read_csv(ROOT / "audit_logs.csv", parse_dates=["timestamp"])
+
+
+def collect(source, last_seen_id: int, max_batch: int) -> tuple[AuditLogRefresher, list[pd.DataFrame]]:
+    applied = []
+    refresher = AuditLogRefresher(applied.append, interval_seconds=0, max_batch=max_batch)
+    refresher.reset(source, last_seen_id)
+    return refresher, applied
+
+
+def test_database_refresh_reads_only_new_rows(tmp_path, logs) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    logs.iloc[:4000].to_sql("audit_logs", engine, index=False)
+    refresher, applied = collect(DatabaseAuditSource(engine), int(logs["id"].iloc[:4000].max()), max_batch=400)
+
+    assert refresher.refresh() == 0
+    logs.iloc[4000:].to_sql("audit_logs", engine, index=False, if_exists="append")
+    assert refresher.refresh() == 400
+    assert refresher.status()["rows_behind"] == len(logs) - 4400
+    while refresher.refresh():
+        pass
+
+    status = refresher.status()
+    assert status["rows_behind"] == 0 and status["last_seen_id"] == logs["id"].max()
+    new = pd.concat(applied, ignore_index=True)
+    assert new["id"].tolist() == sorted(logs["id"].iloc[4000:])
+    assert "ip_address" not in new.columns
+
+
+def test_csv_tail_skips_loaded_rows_and_partial_lines(tmp_path, logs) -> None:
+    path = tmp_path / "audit_logs.csv"
+    logs.iloc[:3000].to_csv(path, index=False)
+    offset = path.stat().st_size
+    # Appended between taking the offset and the initial load: already loaded.
+    with open(path, "a") as f:
+        logs.iloc[3000:3100].to_csv(f, header=False, index=False)
+    refresher, applied = collect(CsvAuditTail(path, offset), int(logs["id"].iloc[:3100].max()), max_batch=500)
+
+    text = logs.iloc[3100:].to_csv(header=False, index=False)
+    cut = text.rindex("\n", 0, len(text) - 1) + 10
+    with open(path, "a") as f:
+        f.write(text[:cut])
+    while refresher.refresh():
+        pass
+    with open(path, "a") as f:
+        f.write(text[cut:])
+    refresher.refresh()
+
+    new = pd.concat(applied, ignore_index=True)
+    assert new["id"].tolist() == logs["id"].iloc[3100:].tolist()
+    pd.testing.assert_series_equal(new["timestamp"], logs["timestamp"].iloc[3100:].reset_index(drop=True))
+    assert refresher.status()["rows_behind"] == 0
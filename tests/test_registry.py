@@ -0,0 +1,98 @@
+import joblib
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from policy.artifacts import model_version
+from policy.registry import ModelRegistry, ModelValidationError, load_bundle
+from policy.topology import build_pipeline, fit_pipeline
+
+
+def test_reload_swaps_validated_model_and_keeps_previous(tiny_model, test_split, tmp_path) -> None:
+    X, Y = test_split
+    catalog = {label: i for i, label in enumerate(Y.columns)}
+    path = tmp_path / "model.pkl"
+    joblib.dump(tiny_model, path)
+
+    registry = ModelRegistry()
+    first = registry.reload(lambda: load_bundle(path, catalog, X.head(1)))
+    assert first.version == model_version(path)
+    assert first.labels == sorted(Y.columns)
+    assert first.id_by_label == {label: catalog[label] for label in first.labels}
+
+    tiny_model.permission_labels_ = list(Y.columns)
+    joblib.dump(tiny_model, path)
+    del tiny_model.permission_labels_
+    second = registry.reload(lambda: load_bundle(path, catalog, X.head(1)))
+    assert second.version != first.version
+    assert second.labels == list(Y.columns)
+    assert (registry.current, registry.previous) == (second, first)
+
+    assert registry.rollback() is first
+    assert registry.previous is second
+
+
+def test_invalid_model_is_rejected(tiny_model, test_split, tmp_path) -> None:
+    X, Y = test_split
+    path = tmp_path / "model.pkl"
+    joblib.dump(tiny_model, path)
+    registry = ModelRegistry()
+    current = registry.reload(lambda: load_bundle(path, {label: None for label in Y.columns}, X.head(1)))
+
+    with pytest.raises(ModelValidationError):
+        registry.reload(lambda: load_bundle(path, {"MedicalRecord_read": 1}, X.head(1)))
+    assert registry.current is current
+    assert registry.failures == 1
+
+
+@pytest.mark.parametrize("topology", ["multi_output", "capped"])
+def test_native_multi_output_topologies_load_with_both_engines(tiny_model, test_split, tmp_path, topology) -> None:
+    X, Y = test_split
+    model = build_pipeline(topology, tiny_model.named_steps["preprocess"]).fit(X, Y)
+    model.permission_labels_ = list(Y.columns)
+    path = tmp_path / "model.pkl"
+    joblib.dump(model, path)
+    catalog = {label: i for i, label in enumerate(Y.columns)}
+
+    sklearn_bundle = load_bundle(path, catalog, X.head(1))
+    compiled_bundle = load_bundle(path, catalog, X.head(1), engine="compiled")
+    assert compiled_bundle.engine == "compiled"
+    assert sklearn_bundle.labels == list(Y.columns)
+    np.testing.assert_allclose(
+        compiled_bundle.predict_scores(X), sklearn_bundle.predict_scores(X), rtol=0, atol=1e-9
+    )
+
+
+def test_per_label_model_fitted_on_sparse_labels_survives_a_joblib_round_trip(tiny_model, test_split, tmp_path) -> None:
+    X, Y = test_split
+    def per_label():
+        return build_pipeline("per_label", tiny_model.named_steps["preprocess"]).set_params(
+            classifier__estimator__n_estimators=5
+        )
+
+    model = fit_pipeline(per_label(), X, sp.csr_matrix(Y.to_numpy()))
+    path = tmp_path / "model.pkl"
+    joblib.dump(model, path)
+
+    dense = per_label().fit(X, Y)
+    loaded = joblib.load(path)
+    # The same fitted attributes MultiOutputClassifier.fit sets.
+    assert vars(loaded[-1]).keys() == vars(dense[-1]).keys()
+    for fitted, expected in zip(loaded[-1].classes_, dense[-1].classes_):
+        assert fitted.dtype == expected.dtype
+        np.testing.assert_array_equal(fitted, expected)
+    for fitted, expected in zip(loaded.predict_proba(X), dense.predict_proba(X)):
+        np.testing.assert_array_equal(fitted, expected)
+
+
+def test_permission_ids_stored_in_the_artifact_need_no_catalog(tiny_model, test_split, tmp_path) -> None:
+    X, Y = test_split
+    tiny_model.permission_labels_ = list(Y.columns)
+    tiny_model.permission_ids_ = {label: i + 100 for i, label in enumerate(Y.columns[1:])}
+    path = tmp_path / "model.pkl"
+    joblib.dump(tiny_model, path)
+    del tiny_model.permission_labels_, tiny_model.permission_ids_
+
+    bundle = load_bundle(path, {Y.columns[0]: 7}, X.head(1))
+    assert bundle.labels == list(Y.columns)
+    assert bundle.id_by_label == {Y.columns[0]: 7, **{label: i + 100 for i, label in enumerate(Y.columns[1:])}}
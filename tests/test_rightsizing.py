@@ -0,0 +1,60 @@
+from itertools import chain
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from policy.db import read_audit_logs, read_permissions_and_users
+from policy.rightsizing import AUDIT_USAGE_INDEX, InMemoryRightsizing, SqlRightsizing, rightsizing_cutoff
+
+ROOT = Path(__file__).resolve().parents[1]
+TABLES = ["users", "roles", "role_permissions", "user_additional_permissions", "permissions", "audit_logs"]
+
+
+@pytest.fixture(scope="module")
+def both_paths(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'rbac.db'}")
+    for table in TABLES:
+        parse_dates = ["timestamp"] if table == "audit_logs" else None
+        pd.read_csv(ROOT / f"{table}.csv", parse_dates=parse_dates).to_sql(table, engine, index=False)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE INDEX audit_usage ON audit_logs ({AUDIT_USAGE_INDEX})")
+        conn.exec_driver_sql("CREATE UNIQUE INDEX users_user_id ON users (user_id)")
+
+    permissions, users = read_permissions_and_users(engine)
+    permissions["label"] = permissions["resource_type"] + "_" + permissions["action"]
+    profiles = users.drop_duplicates(subset=["user_id"]).set_index("user_id")
+    memory = InMemoryRightsizing(permissions, profiles, read_audit_logs(engine))
+    last_event = pd.read_sql("SELECT MAX(timestamp) AS t FROM audit_logs", engine)["t"].iloc[0]
+    return memory, SqlRightsizing(engine), pd.Timestamp(last_event)
+
+
+@pytest.mark.parametrize("days_before_last_event", [0, 2, 30])
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"role": "Doctor"}, {"department": "Khoa_Noi", "branch": "CN_HN"}, {"label": "PatientProfile_read"}],
+)
+def test_sql_pushdown_matches_in_memory(both_paths, days_before_last_event, filters) -> None:
+    memory, sql, last_event = both_paths
+    cutoff = rightsizing_cutoff(days_before_last_event, now=last_event)
+
+    expected = list(chain.from_iterable(memory.iter_unused(cutoff, filters)))
+    assert list(chain.from_iterable(sql.iter_unused(cutoff, filters))) == expected
+    assert sql.count(filters) == memory.count(filters)
+
+    if len(expected) > 10:
+        after = (expected[4]["user_id"], expected[4]["label"])
+        page = list(chain.from_iterable(sql.iter_unused(cutoff, filters, after, limit=5)))
+        assert page == expected[5:10]
+        assert list(chain.from_iterable(memory.iter_unused(cutoff, filters, after)))[:5] == page
+        assert list(chain.from_iterable(memory.iter_unused(cutoff, filters, after, limit=5))) == page
+    for limit in (1, 40, len(expected)):
+        assert list(chain.from_iterable(memory.iter_unused(cutoff, filters, limit=limit))) == expected[:limit]
+
+
+def test_lookback_splits_used_and_unused(both_paths) -> None:
+    memory, _, last_event = both_paths
+    recent = list(chain.from_iterable(memory.iter_unused(rightsizing_cutoff(0, now=last_event), {})))
+    everything = list(chain.from_iterable(memory.iter_unused(rightsizing_cutoff(30, now=last_event), {})))
+    assert 0 < len(everything) < len(recent) < memory.count({})
@@ -0,0 +1,77 @@
+from policy.startup import FAILED, READY, RETRYING, StartupLoader
+
+
+def test_components_load_in_order_and_failures_propagate() -> None:
+    loaded = []
+
+    def broken() -> None:
+        raise RuntimeError("database unreachable")
+
+    loader = StartupLoader([
+        ("model", lambda: loaded.append("model"), ()),
+        ("audit_logs", broken, ()),
+        ("anomaly", lambda: loaded.append("anomaly"), ("audit_logs",)),
+    ])
+    assert loader.missing(["model"]) == ["model"]
+    loader.start().join()
+
+    assert loaded == ["model"]
+    assert loader.missing(["model"]) == []
+    assert not loader.ready()
+    report = loader.report()
+    assert report["model"]["status"] == READY and report["model"]["elapsed_ms"] is not None
+    assert report["audit_logs"] == {
+        "status": FAILED,
+        "elapsed_ms": report["audit_logs"]["elapsed_ms"],
+        "error": "RuntimeError: database unreachable",
+        "attempts": 1,
+    }
+    assert report["anomaly"]["status"] == FAILED
+    assert loader.failed() == ["audit_logs", "anomaly"]
+    assert loader.retry_after(["anomaly"]) is None
+
+
+def test_failed_components_are_retried_with_backoff() -> None:
+    attempts = []
+
+    def flaky() -> None:
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise ConnectionError("database unreachable")
+
+    loader = StartupLoader(
+        [("permissions", flaky, ()), ("rightsizing", lambda: None, ("permissions",))],
+        retry_seconds=0.01,
+    )
+    loader.start().join(timeout=5)
+
+    assert loader.ready()
+    assert loader.report()["permissions"]["attempts"] == 3
+    assert loader.report()["permissions"]["error"] is None
+
+
+def test_retries_stop_after_max_attempts() -> None:
+    statuses = []
+
+    def broken() -> None:
+        statuses.append(loader.status["anomaly"])
+        raise ConnectionError("database unreachable")
+
+    loader = StartupLoader(
+        [("audit_logs", broken, ()), ("anomaly", lambda: None, ("audit_logs",))],
+        retry_seconds=0.01,
+        max_attempts=2,
+    )
+    loader.start().join(timeout=5)
+
+    assert statuses == ["pending", "pending"]
+    assert loader.status == {"audit_logs": FAILED, "anomaly": FAILED}
+    assert loader.attempts["audit_logs"] == 2
+
+
+def test_retry_after_while_waiting_to_retry() -> None:
+    loader = StartupLoader([("model", lambda: 1 / 0, ())], retry_seconds=60)
+    loader._load("model", lambda: 1 / 0)
+
+    assert loader.status["model"] == RETRYING
+    assert 59 < loader.retry_after(["model"]) <= 60
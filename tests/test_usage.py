@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from policy.usage import IncrementalUsageCube, UsageCube
+
+
+def make_logs(n: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-10-01")
+    return pd.DataFrame({
+        "user_id": rng.choice([f"U{i:04d}" for i in range(30)], n),
+        "resource_type": rng.choice(["MedicalRecord", "Invoice", "StaffProfile"], n),
+        "action": rng.choice(["read", "update"], n),
+        "allowed": rng.random(n) < 0.8,
+        "timestamp": start + pd.to_timedelta(rng.integers(0, 120 * 86400, n), unit="s"),
+    })
+
+
+def reference_counts(logs: pd.DataFrame, pairs: pd.DataFrame, since: pd.Timestamp) -> np.ndarray:
+    recent = logs[(logs["timestamp"] >= since.normalize()) & logs["allowed"]].copy()
+    recent["label"] = recent["resource_type"] + "_" + recent["action"]
+    usage = recent.groupby(["user_id", "label"]).size().reset_index(name="usage_count")
+    merged = pairs.merge(usage, on=["user_id", "label"], how="left").fillna({"usage_count": 0})
+    return merged["usage_count"].to_numpy(dtype=np.int64)
+
+
+def test_window_matches_groupby() -> None:
+    logs = make_logs()
+    cube = UsageCube.from_audit_logs(logs)
+    pairs = pd.DataFrame({
+        "user_id": ["U0000", "U0001", "U0029", "U9999", "U0003"],
+        "label": ["MedicalRecord_read", "Invoice_update", "StaffProfile_read", "Invoice_read", "Unknown_read"],
+    })
+    for days in (1, 7, 30, 90, 365):
+        since = pd.Timestamp("2026-01-29 12:00") - pd.Timedelta(days=days)
+        counts, _ = cube.window(pairs["user_id"], pairs["label"], since)
+        np.testing.assert_array_equal(counts, reference_counts(logs, pairs, since))
+
+
+def test_extend_matches_single_build() -> None:
+    logs = make_logs()
+    cube = UsageCube.from_audit_logs(logs.iloc[:1200])
+    cube.extend(logs.iloc[1200:])
+    full = UsageCube.from_audit_logs(logs)
+
+    users = [f"U{i:04d}" for i in range(30)] * 2
+    labels = ["MedicalRecord_read"] * 30 + ["Invoice_update"] * 30
+    since = pd.Timestamp("2025-12-01")
+    for a, b in zip(cube.window(users, labels, since), full.window(users, labels, since)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_incremental_cube_matches_single_build() -> None:
+    logs = make_logs(4000)
+    cube = IncrementalUsageCube.from_audit_logs(logs.iloc[:1000])
+    for start in range(1000, 4000, 150):
+        cube.extend(logs.iloc[start:start + 150])
+    full = UsageCube.from_audit_logs(logs)
+
+    assert cube.events == full.events
+    assert len(cube.levels) < 10
+    users = [f"U{i:04d}" for i in range(30)] * 2 + ["U9999"]
+    labels = ["MedicalRecord_read"] * 30 + ["Invoice_update"] * 30 + ["Invoice_read"]
+    for since in (pd.Timestamp("2025-09-01"), pd.Timestamp("2025-12-01"), pd.Timestamp("2026-01-25")):
+        for a, b in zip(cube.window(users, labels, since), full.window(users, labels, since)):
+            np.testing.assert_array_equal(a, b)